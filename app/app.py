@@ -1,12 +1,71 @@
 # app/app.py（必须放在根目录的app文件夹下）
-import os
+import sqlite3
+from typing import Optional
 
-from flask import Flask, send_file
+from flask import Flask, Response, abort, request
 
+from app.infrastructure.db.post_repository import PostRepository
+from app.infrastructure.db.sqlite import open_database
+from app.infrastructure.http.admission import AdmissionMiddleware
+from app.infrastructure.http.scoreboard import render_status
+from app.infrastructure.metrics.exposition import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.infrastructure.metrics.exposition import render_metrics
+from app.infrastructure.metrics.middleware import MetricsMiddleware
+from app.infrastructure.metrics.registry import ROUTE_ENVIRON_KEY, ROUTE_UNMATCHED, RequestMetrics
 
-def create_app():
+from app.infrastructure.static.cache import StaticFileCache
+from app.infrastructure.static.compress import negotiate_variant
+from app.infrastructure.static.index import FrontendIndex, resolve_frontend_dir
+from app.infrastructure.static.manifest import (
+    IMMUTABLE_CACHE_CONTROL,
+    INDEX_CACHE_CONTROL,
+    AssetManifest,
+)
+from utils.logger import logError
+
+
+def create_app(config: Optional[dict] = None):
     """Flask应用工厂函数（必须有这个函数，且返回Flask实例）"""
     app = Flask(__name__)
+    frontend_config = (config or {}).get("frontend", {})
+    metrics_config = (config or {}).get("metrics", {})
+    watchdog_config = (config or {}).get("watchdog", {})
+    admission_config = (config or {}).get("admission", {})
+    database_config = (config or {}).get("database", {})
+    search_config = (config or {}).get("search", {})
+    render_config = (config or {}).get("render", {})
+
+    # 启动时一次性建立 pages/front 索引，后台线程定期刷新
+    frontend_index = FrontendIndex(
+        resolve_frontend_dir(frontend_config),
+        refresh_interval=frontend_config.get("index_refresh_interval", 2.0),
+    )
+    app.extensions["frontend_index"] = frontend_index
+
+    # 前端静态资源缓存（进程内LRU，所有Waitress线程共享）
+    static_cache = StaticFileCache(
+        max_bytes=frontend_config.get("cache_max_bytes", 64 * 1024 * 1024),
+        max_file_bytes=frontend_config.get("cache_max_file_bytes", 1024 * 1024),
+    )
+    # 资源指纹清单（asset-manifest.json，随目录索引自动重新加载）
+    asset_manifest = AssetManifest(frontend_index)
+
+    # 数据层：每个Waitress线程首次访问时创建自己的 SQLite 连接并一直复用；表结构在创建应用时升级到最新
+    db = open_database(database_config)
+    try:
+        db.migrate()
+    except sqlite3.Error as e:
+        # 未开启 dependencies.check_db 时数据库可能不可用：静态页面照常服务，接口返回 500
+        logError(f"❌ 数据库迁移失败：{e}")
+    posts = PostRepository(
+        db,
+        search_max_ranked=search_config.get("max_ranked", 0),
+        search_cache_max_bytes=search_config.get("cache_max_bytes", 8 * 1024 * 1024),
+        snippet_width=search_config.get("snippet_width", 120),
+        html_cache_max_bytes=render_config.get("cache_max_bytes", 32 * 1024 * 1024),
+    )
+    app.extensions["db"] = db
+    app.extensions["posts"] = posts
 
     # 测试路由（验证应用是否正常）
     @app.route("/")
@@ -17,24 +76,161 @@ def create_app():
             "path": "app/app.py"
         }
 
+    def lookup_static(url_path: str):
+        """查找静态资源缓存条目，优先返回客户端可接受的预压缩版本"""
+        meta = frontend_index.get(url_path)
+        if meta is None:
+            return None
+        variant, encoding = negotiate_variant(
+            frontend_index, url_path, request.headers.get("Accept-Encoding", "")
+        )
+        if variant is not None:
+            entry = static_cache.get(variant, encoding)
+            if entry is not None:
+                return entry
+        return static_cache.get(meta)
+
+    def lookup_index():
+        """查找 index.html：存在资源清单时返回引用已替换为指纹URL的版本"""
+        if not asset_manifest.active():
+            return lookup_static("index.html")
+        meta = frontend_index.get("index.html")
+        entry = static_cache.get(meta) if meta is not None else None
+        if entry is None:
+            return None
+        return asset_manifest.render_index(entry, request.headers.get("Accept-Encoding", ""))
+
     @app.route('/cs', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_vue(path):
-        FRONTEND_DIR = r"D:\project\blog\blog-frontend"
-        # 1. 如果是静态文件（js/css/img），直接返回
-        static_file = os.path.join(FRONTEND_DIR,"pages","front", path)
-        print(static_file)
-        if os.path.exists(static_file) and os.path.isfile(static_file):
+        cache_control = None
+        # 0. 带指纹的URL → 映射回原始文件，内容不变时允许长期缓存
+        resolved = asset_manifest.resolve(path)
+        if resolved is not None:
+            path, unchanged = resolved
+            cache_control = IMMUTABLE_CACHE_CONTROL if unchanged else INDEX_CACHE_CONTROL
+        # 1. 如果是静态文件（js/css/img），直接返回（索引只包含前端目录内的文件，天然防止 ../ 越权）
+        entry = lookup_static(path) if path != "index.html" else None
+        # 2. 非静态文件/非API，返回index.html（短缓存，每次回源校验）
+        if entry is None:
+            entry = lookup_index()
+            if entry is None:
+                abort(404)
+            cache_control = INDEX_CACHE_CONTROL
+        return static_cache.make_response(entry, request.environ, cache_control)
+
+    def listing_response(total: int, tag: Optional[str] = None, month: Optional[str] = None):
+        """文章列表的一页：按 (发布时间, id) 游标分页，下一页带上返回的 next_cursor；总数来自内存快照"""
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        try:
+            page = posts.list_published(limit, request.args.get("cursor"), tag=tag, month=month)
+        except ValueError:
+            return {"code": 400, "msg": "无效的分页游标"}, 400
+        return {
+            "code": 200,
+            "data": [post.to_dict(with_content=False) for post in page.posts],
+            "total": total,
+            "next_cursor": page.next_cursor,
+        }
+
+    @app.route("/api/posts")
+    def list_posts():
+        return listing_response(posts.counts().total)
 
-            return send_file(static_file)
-        # 2. 非静态文件/非API，返回index.html
-        print(1)
-        return send_file(os.path.join(FRONTEND_DIR, "pages", "front", "index.html"))
+    @app.route("/api/tags/<tag>/posts")
+    def list_tag_posts(tag):
+        return listing_response(posts.counts().tags.get(tag, 0), tag=tag)
+
+    @app.route("/api/archive/<int:year>/<int:month>/posts")
+    def list_month_posts(year, month):
+        key = f"{year:04d}-{month:02d}"
+        return listing_response(posts.counts().months.get(key, 0), month=key)
+
+    @app.route("/api/sidebar")
+    def sidebar():
+        """标签云与月份归档（文章数随文章增删改增量维护，数据未变时不查表）"""
+        return {"code": 200, "data": posts.counts().to_dict()}
+
+    @app.route("/api/posts/<slug>")
+    def get_post(slug):
+        post = posts.get(slug)
+        if post is None:
+            return {"code": 404, "msg": "文章不存在"}, 404
+        posts.record_view(post.id)
+        # 正文返回保存时渲染好的HTML（进程内缓存命中时无需解析 Markdown，也不读渲染结果表）
+        data = post.to_dict(with_content=False)
+        data["html"] = posts.html(post)
+        return {"code": 200, "data": data}
+
+    @app.route("/api/search")
+    def search_posts():
+        query = request.args.get("q", "").strip()[:100]
+        limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        hits, has_more = posts.search(query, limit, offset)
+        return {"code": 200, "data": [hit.to_dict() for hit in hits], "has_more": has_more}
 
     @app.route("/health")
     def health():
         return {"status": "ok"}
 
+    # 请求指标：先创建，准入控制拒绝的请求按原因计入其中
+    metrics = None
+    if metrics_config.get("enabled", True):
+        metrics = RequestMetrics(
+            snapshot_dir=metrics_config.get("dir"),
+            flush_interval=metrics_config.get("flush_interval", 1.0),
+        )
+        app.extensions["metrics"] = metrics
+
+    # 准入控制：过载时快速返回 503，健康检查/指标/已索引的静态资源不受限制（放在指标中间件内层，503 计入指标）
+    if admission_config.get("enabled", True):
+        bypass_paths = frozenset(admission_config.get("bypass_paths", ["/health"]))
+        bypass_static = admission_config.get("bypass_static", True)
+
+        def admission_bypass(environ) -> bool:
+            path = environ.get("PATH_INFO", "")
+            if path in bypass_paths:
+                return True
+            if not bypass_static:
+                return False
+            path = path.lstrip("/")
+            return frontend_index.get(path) is not None or asset_manifest.resolve(path) is not None
+
+        app.wsgi_app = AdmissionMiddleware(
+            app.wsgi_app,
+            max_in_flight=admission_config.get("max_in_flight", 0),
+            max_queue_wait=admission_config.get("max_queue_wait", 0),
+            retry_after=admission_config.get("retry_after", 1),
+            trust_request_start=admission_config.get("trust_request_start", False),
+            bypass=admission_bypass,
+            on_shed=metrics.shed if metrics is not None else None,
+        )
+
+    # 请求指标：中间件统计各路由请求数/耗时，/metrics 汇总所有子进程（Prometheus 文本格式）
+    if metrics is not None:
+        app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics)
+
+        @app.before_request
+        def tag_route():
+            # 路由标签用匹配到的规则，而非原始URL
+            rule = request.url_rule
+            request.environ[ROUTE_ENVIRON_KEY] = rule.rule if rule is not None else ROUTE_UNMATCHED
+
+        @app.route("/metrics")
+        def metrics_endpoint():
+            return Response(render_metrics(metrics), content_type=METRICS_CONTENT_TYPE)
+
+    # 进程状态页：读取共享内存记分板（由主进程创建、子进程挂载），独立运行时没有记分板
+    if watchdog_config.get("status_page", True):
+        @app.route("/server-status")
+        def server_status():
+            scoreboard = app.extensions.get("scoreboard")
+            if scoreboard is None:
+                abort(404)
+            threads = (config or {}).get("waitress", {}).get("threads", scoreboard.threads)
+            return Response(render_status(scoreboard, threads), content_type="text/plain; charset=utf-8")
+
     return app
 
 
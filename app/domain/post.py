@@ -0,0 +1,34 @@
+# 文章领域模型（与存储无关，由基础设施层的仓储读写）
+from dataclasses import asdict, dataclass
+
+STATUS_DRAFT = "draft"
+STATUS_PUBLISHED = "published"
+
+
+@dataclass(frozen=True, slots=True)
+class Post:
+    """一篇文章；列表查询不读取正文，content 为空字符串"""
+    slug: str
+    title: str
+    summary: str = ""
+    content: str = ""
+    tags: tuple[str, ...] = ()
+    status: str = STATUS_DRAFT
+    published_at: int = 0  # 发布时间（Unix 秒）
+    updated_at: int = 0
+    views: int = 0
+    content_hash: str = ""  # 正文的 SHA-256（渲染结果按它缓存）
+    id: int = 0  # 0 表示尚未保存
+
+    @property
+    def published(self) -> bool:
+        return self.status == STATUS_PUBLISHED
+
+    def to_dict(self, with_content: bool = True) -> dict:
+        """接口输出（content_hash 只用于渲染缓存，不对外）"""
+        data = asdict(self)
+        data["tags"] = list(self.tags)
+        del data["content_hash"]
+        if not with_content:
+            del data["content"]
+        return data
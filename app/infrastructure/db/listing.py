@@ -0,0 +1,188 @@
+# 文章列表索引：首页/标签/月份归档按 (published_at, id) 游标分页（keyset），翻到第几页耗时都一样
+# 标签→文章、月份→文章两张索引表与各列表的文章数随文章保存/删除增量维护，不做聚合查询
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from app.domain.post import Post
+
+# 各列表的文章数（kind：all 全部已发布 / tag 标签 / month 月份）
+KIND_ALL = "all"
+KIND_TAG = "tag"
+KIND_MONTH = "month"
+
+# 第一页的游标：比任何 (published_at, id) 都大
+_FIRST = (1 << 62, 1 << 62)
+# SQLite INTEGER 的取值范围（64 位有符号）
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+_INSERT_TAG = "INSERT OR IGNORE INTO post_tags (tag, published_at, post_id) VALUES (?, ?, ?)"
+_DELETE_TAG = "DELETE FROM post_tags WHERE tag = ? AND published_at = ? AND post_id = ?"
+_INSERT_MONTH = "INSERT OR IGNORE INTO post_months (month, published_at, post_id) VALUES (?, ?, ?)"
+_DELETE_MONTH = "DELETE FROM post_months WHERE month = ? AND published_at = ? AND post_id = ?"
+_INCREMENT = (
+    "INSERT INTO listing_counts (kind, key, count) VALUES (?, ?, 1) "
+    "ON CONFLICT (kind, key) DO UPDATE SET count = count + 1"
+)
+_DECREMENT = "UPDATE listing_counts SET count = count - 1 WHERE kind = ? AND key = ?"
+_DELETE_EMPTY = "DELETE FROM listing_counts WHERE count <= 0"
+_SELECT_COUNTS = "SELECT kind, key, count FROM listing_counts"
+
+# 索引表的主键就是排序键，范围扫描 + LIMIT，不需要排序也不需要跳过前面的行
+_PAGE_ALL = (
+    "SELECT {columns} FROM posts AS p WHERE status = 'published' AND (published_at, id) < (?, ?) "
+    "ORDER BY published_at DESC, id DESC LIMIT ?"
+)
+_PAGE_TAG = (
+    "SELECT {columns} FROM post_tags AS t JOIN posts AS p ON p.id = t.post_id "
+    "WHERE t.tag = ? AND (t.published_at, t.post_id) < (?, ?) ORDER BY t.published_at DESC, t.post_id DESC LIMIT ?"
+)
+_PAGE_MONTH = (
+    "SELECT {columns} FROM post_months AS m JOIN posts AS p ON p.id = m.post_id "
+    "WHERE m.month = ? AND (m.published_at, m.post_id) < (?, ?) ORDER BY m.published_at DESC, m.post_id DESC LIMIT ?"
+)
+
+
+def archive_month(published_at: int) -> str:
+    """发布时间所在的月份（服务器本地时区），如 "2026-10" """
+    return time.strftime("%Y-%m", time.localtime(published_at))
+
+
+def encode_cursor(post: Post) -> str:
+    return f"{post.published_at}.{post.id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> tuple[int, int]:
+    """游标为空时返回第一页；格式不对或超出 64 位整数范围时抛出 ValueError"""
+    if not cursor:
+        return _FIRST
+    published_at, _, post_id = cursor.partition(".")
+    before = int(published_at), int(post_id)
+    if not all(_INT64_MIN <= value <= _INT64_MAX for value in before):
+        raise ValueError(f"游标超出范围：{cursor}")
+    return before
+
+
+def _keys(post: Post) -> frozenset[tuple[str, str]]:
+    """文章出现在哪些列表中：[(kind, key)]；未发布的文章不在任何列表中"""
+    if not post.published:
+        return frozenset()
+    keys = {(KIND_ALL, ""), (KIND_MONTH, archive_month(post.published_at))}
+    keys.update((KIND_TAG, tag) for tag in post.tags)
+    return frozenset(keys)
+
+
+def _apply(conn: sqlite3.Connection, post: Post, keys: Iterable[tuple[str, str]], add: bool) -> None:
+    for kind, key in keys:
+        if kind == KIND_TAG:
+            conn.execute(_INSERT_TAG if add else _DELETE_TAG, (key, post.published_at, post.id))
+        elif kind == KIND_MONTH:
+            conn.execute(_INSERT_MONTH if add else _DELETE_MONTH, (key, post.published_at, post.id))
+        conn.execute(_INCREMENT if add else _DECREMENT, (kind, key))
+
+
+def index_post(conn: sqlite3.Connection, old: Optional[Post], new: Post) -> None:
+    """
+    在调用方的事务中更新一篇文章的列表索引与计数（old 为保存前的文章，新建时为 None）
+    状态、发布时间、标签都没变时（只改了标题/正文）不写任何表
+    """
+    old_keys = _keys(old) if old is not None else frozenset()
+    new_keys = _keys(new)
+    if old is not None and old.published_at == new.published_at:
+        _apply(conn, old, old_keys - new_keys, add=False)
+        _apply(conn, new, new_keys - old_keys, add=True)
+    else:
+        # 发布时间变化：所有索引行的排序键都变了
+        if old is not None:
+            _apply(conn, old, old_keys, add=False)
+        _apply(conn, new, new_keys, add=True)
+    if old_keys - new_keys:
+        conn.execute(_DELETE_EMPTY)
+
+
+def remove_post(conn: sqlite3.Connection, post: Post) -> None:
+    keys = _keys(post)
+    _apply(conn, post, keys, add=False)
+    if keys:
+        conn.execute(_DELETE_EMPTY)
+
+
+def rebuild_index(conn: sqlite3.Connection, posts: Iterable[Post]) -> int:
+    """在调用方的事务中清空并按 posts（全部已发布文章，不需要正文）重建列表索引与计数，返回文章数"""
+    for table in ("post_tags", "post_months", "listing_counts"):
+        conn.execute(f"DELETE FROM {table}")
+    counts = {}
+    tag_rows = []
+    month_rows = []
+    for post in posts:
+        for kind, key in _keys(post):
+            counts[(kind, key)] = counts.get((kind, key), 0) + 1
+            if kind == KIND_TAG:
+                tag_rows.append((key, post.published_at, post.id))
+            elif kind == KIND_MONTH:
+                month_rows.append((key, post.published_at, post.id))
+    conn.executemany(_INSERT_TAG, tag_rows)
+    conn.executemany(_INSERT_MONTH, month_rows)
+    conn.executemany(
+        "INSERT INTO listing_counts (kind, key, count) VALUES (?, ?, ?)",
+        [(kind, key, count) for (kind, key), count in counts.items()],
+    )
+    return counts.get((KIND_ALL, ""), 0)
+
+
+@dataclass(frozen=True, slots=True)
+class ListingCounts:
+    """各列表的文章数快照（侧边栏的标签云与归档直接从内存读取）"""
+    total: int
+    tags: dict[str, int]  # 按文章数降序
+    months: dict[str, int]  # 按月份倒序
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "tags": [{"tag": tag, "count": count} for tag, count in self.tags.items()],
+            "months": [{"month": month, "count": count} for month, count in self.months.items()],
+        }
+
+
+def load_counts(conn: sqlite3.Connection) -> ListingCounts:
+    total = 0
+    tags = []
+    months = []
+    for kind, key, count in conn.execute(_SELECT_COUNTS):
+        if kind == KIND_ALL:
+            total = count
+        elif kind == KIND_TAG:
+            tags.append((key, count))
+        elif kind == KIND_MONTH:
+            months.append((key, count))
+    tags.sort(key=lambda item: (-item[1], item[0]))
+    months.sort(reverse=True)
+    return ListingCounts(total, dict(tags), dict(months))
+
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    """一页列表：next_cursor 为 None 表示没有下一页"""
+    posts: list[Post]
+    next_cursor: Optional[str]
+
+
+def page(conn: sqlite3.Connection, columns: str, to_post: Callable, limit: int, cursor: Optional[str] = None,
+         tag: Optional[str] = None, month: Optional[str] = None) -> Page:
+    """
+    按发布时间倒序取一页已发布文章（tag/month 都为空时为首页）
+    :param columns: 读取 posts 表（别名 p）的列，to_post 把一行转换为 Post
+    :param cursor: 上一页返回的 next_cursor；格式不对时抛出 ValueError
+    """
+    before = decode_cursor(cursor)
+    if tag is not None:
+        rows = conn.execute(_PAGE_TAG.format(columns=columns), (tag, *before, limit + 1)).fetchall()
+    elif month is not None:
+        rows = conn.execute(_PAGE_MONTH.format(columns=columns), (month, *before, limit + 1)).fetchall()
+    else:
+        rows = conn.execute(_PAGE_ALL.format(columns=columns), (*before, limit + 1)).fetchall()
+    posts = [to_post(row) for row in rows[:limit]]
+    return Page(posts, encode_cursor(posts[-1]) if len(rows) > limit else None)
@@ -0,0 +1,211 @@
+# 文章仓储：所有 SQL 均为常量（参数用占位符），每个连接上只编译一次
+import json
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+from app.domain.post import STATUS_PUBLISHED, Post
+from app.infrastructure.db import listing, search
+from app.infrastructure.db.rendered_html import RenderedHtmlStore
+from app.infrastructure.db.sqlite import SQLiteDatabase
+from app.infrastructure.render.renderer import content_hash
+from utils.lru import LRUCache
+
+# 列表不读取正文，减少从页缓存复制的数据量
+_LIST_COLUMNS = "id, slug, title, summary, '' AS content, tags, status, published_at, updated_at, views, content_hash"
+_ALL_COLUMNS = "id, slug, title, summary, content, tags, status, published_at, updated_at, views, content_hash"
+# 列表分页与索引表联查，列名需要带上 posts 的别名
+_PAGE_COLUMNS = (
+    "p.id, p.slug, p.title, p.summary, '' AS content, p.tags, p.status, p.published_at, p.updated_at, p.views, "
+    "p.content_hash"
+)
+
+_SELECT_BY_SLUG = f"SELECT {_ALL_COLUMNS} FROM posts WHERE slug = ?"
+_SELECT_PUBLISHED_BY_SLUG = f"SELECT {_ALL_COLUMNS} FROM posts WHERE slug = ? AND status = 'published'"
+_SELECT_LISTED_BY_SLUG = f"SELECT {_LIST_COLUMNS} FROM posts WHERE slug = ?"
+_SELECT_ALL_PUBLISHED = f"SELECT {_ALL_COLUMNS} FROM posts WHERE status = 'published'"
+_SELECT_ALL_LISTED = f"SELECT {_LIST_COLUMNS} FROM posts WHERE status = 'published'"
+_UPSERT = (
+    "INSERT INTO posts (slug, title, summary, content, content_hash, tags, status, published_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (slug) DO UPDATE SET title = excluded.title, summary = excluded.summary, "
+    "content = excluded.content, content_hash = excluded.content_hash, tags = excluded.tags, "
+    "status = excluded.status, published_at = excluded.published_at, updated_at = excluded.updated_at"
+)
+_DELETE = f"DELETE FROM posts WHERE slug = ? RETURNING {_LIST_COLUMNS}"
+_INCREMENT_VIEWS = "UPDATE posts SET views = views + 1 WHERE id = ?"
+_SELECT_VERSION = "SELECT value FROM versions WHERE name = 'posts'"
+_BUMP_VERSION = "UPDATE versions SET value = value + 1 WHERE name = 'posts'"
+
+
+def load_tags(value: str) -> tuple[str, ...]:
+    return tuple(json.loads(value)) if value else ()
+
+
+def dump_tags(tags: Iterable[str]) -> str:
+    return json.dumps(list(tags), ensure_ascii=False)
+
+
+def _to_post(row) -> Post:
+    return Post(
+        id=row["id"], slug=row["slug"], title=row["title"], summary=row["summary"], content=row["content"],
+        tags=load_tags(row["tags"]), status=row["status"], published_at=row["published_at"],
+        updated_at=row["updated_at"], views=row["views"], content_hash=row["content_hash"],
+    )
+
+
+def _upsert_params(post: Post, digest: str, now: int) -> tuple:
+    published_at = post.published_at or (now if post.status == STATUS_PUBLISHED else 0)
+    return (post.slug, post.title, post.summary, post.content, digest, dump_tags(post.tags), post.status,
+            published_at, now)
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> int:
+    """在调用方的事务中按 posts 表重建全文索引，返回索引的文章数（reindex 命令使用）"""
+    return search.rebuild_index(conn, (_to_post(row) for row in conn.execute(_SELECT_ALL_PUBLISHED)))
+
+
+def rebuild_listing_index(conn: sqlite3.Connection) -> int:
+    """在调用方的事务中按 posts 表重建标签/月份索引与文章数，返回已发布文章数（reindex 命令使用）"""
+    return listing.rebuild_index(conn, (_to_post(row) for row in conn.execute(_SELECT_ALL_LISTED)))
+
+
+class PostRepository:
+    """
+    读：直接使用当前线程的连接，多个线程/进程并发读互不阻塞（WAL）；
+    写：save/save_many/delete 同步提交，全文索引、列表索引与渲染好的HTML在同一事务中增量更新（正文未变时不重新渲染）；
+        record_view 进入批量写队列，不阻塞请求线程
+    """
+
+    def __init__(self, db: SQLiteDatabase, search_max_ranked: int = 0, search_cache_max_bytes: int = 0,
+                 snippet_width: int = 120, html_cache_max_bytes: int = 0):
+        """
+        :param search_max_ranked: 只对最新的这么多篇命中文章排序（0 表示不限制；设置后更早的命中文章不会出现在结果中）
+        :param search_cache_max_bytes: 进程内检索结果缓存的字节预算（0 表示不缓存）
+        :param snippet_width: 检索结果摘要的字符数
+        :param html_cache_max_bytes: 进程内文章HTML缓存的字节预算（0 表示不缓存）
+        """
+        self.db = db
+        self.rendered = RenderedHtmlStore(db, html_cache_max_bytes)
+        self.search_max_ranked = search_max_ranked
+        self.snippet_width = snippet_width
+        self._search_cache = LRUCache(search_cache_max_bytes)
+        self._counts: Optional[tuple[int, listing.ListingCounts]] = None  # (数据版本号, 各列表文章数)
+
+    def get(self, slug: str, include_drafts: bool = False) -> Optional[Post]:
+        row = self.db.query_one(_SELECT_BY_SLUG if include_drafts else _SELECT_PUBLISHED_BY_SLUG, (slug,))
+        return _to_post(row) if row is not None else None
+
+    def html(self, post: Post) -> str:
+        """文章正文渲染后的HTML（保存时已渲染，请求时只做查找）"""
+        return self.rendered.html(post)
+
+    def list_published(self, limit: int = 20, cursor: Optional[str] = None, tag: Optional[str] = None,
+                       month: Optional[str] = None) -> listing.Page:
+        """
+        已发布文章按发布时间倒序的一页（不含正文）；可按标签或月份（"2026-10"）筛选
+        :param cursor: 上一页的 next_cursor（为空表示第一页）；格式不对时抛出 ValueError
+        """
+        return listing.page(self.db.connection(), _PAGE_COLUMNS, _to_post, limit, cursor, tag=tag, month=month)
+
+    def counts(self) -> listing.ListingCounts:
+        """已发布文章总数、各标签/各月份的文章数：数据版本号不变时直接返回内存中的快照"""
+        version = self.version()
+        cached = self._counts
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        counts = listing.load_counts(self.db.connection())
+        self._counts = (version, counts)
+        return counts
+
+    def version(self) -> int:
+        """数据版本号（任一进程增删改文章后变化）"""
+        return self.db.query_one(_SELECT_VERSION)[0]
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> tuple[list[search.SearchHit], bool]:
+        """
+        全文检索已发布文章，返回 (本页结果, 是否还有下一页)
+        结果按 (表达式, 分页) 缓存，数据版本号变化即失效（缓存中的浏览数可能略旧）
+        """
+        expression, terms = search.parse_query(query)
+        if expression is None:
+            return [], False
+        key = (expression, limit, offset)
+        version = self.version()
+        cached = self._search_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        result = search.search(
+            self.db.connection(), _ALL_COLUMNS, _to_post, expression, terms, limit, offset,
+            max_ranked=self.search_max_ranked, snippet_width=self.snippet_width,
+        )
+        # 估算占用：中文字符串每个字符占 2 字节，另加对象开销
+        size = 256 + sum(len(hit.title_html) + len(hit.snippet_html) + len(hit.post.summary) for hit in result[0]) * 2
+        self._search_cache.put(key, (version, result), size)
+        return result
+
+    def rebuild_search_index(self) -> int:
+        with self.db.transaction() as conn:
+            total = rebuild_search_index(conn)
+            conn.execute(_BUMP_VERSION)
+        return total
+
+    def rebuild_listing_index(self) -> int:
+        with self.db.transaction() as conn:
+            total = rebuild_listing_index(conn)
+            conn.execute(_BUMP_VERSION)
+        return total
+
+    def save(self, post: Post) -> Post:
+        """按 slug 新增或更新，返回保存后的文章（含 id）"""
+        now = int(time.time())
+        digest = content_hash(post.content)
+        # 渲染较慢，放在写事务之外，不占用写锁
+        markup = self.rendered.render_if_missing(digest, post.content)
+        with self.db.transaction() as conn:
+            saved = self._write(conn, post, digest, markup, now)
+            conn.execute(_BUMP_VERSION)
+        return saved
+
+    def _write(self, conn: sqlite3.Connection, post: Post, digest: str, markup: Optional[str], now: int) -> Post:
+        """写入一篇文章并增量更新各索引，返回保存后的文章"""
+        row = conn.execute(_SELECT_LISTED_BY_SLUG, (post.slug,)).fetchone()
+        old = _to_post(row) if row is not None else None
+        conn.execute(_UPSERT, _upsert_params(post, digest, now))
+        if markup is not None:
+            self.rendered.store(conn, digest, markup)
+        if old is not None and old.content_hash != digest:
+            self.rendered.release(conn, old.content_hash)
+        saved = _to_post(conn.execute(_SELECT_BY_SLUG, (post.slug,)).fetchone())
+        search.index_post(conn, saved)
+        listing.index_post(conn, old, saved)
+        return saved
+
+    def save_many(self, posts: Iterable[Post]) -> int:
+        """批量导入：在一个事务中写入，返回条数"""
+        now = int(time.time())
+        prepared = []
+        for post in posts:
+            digest = content_hash(post.content)
+            prepared.append((post, digest, self.rendered.render_if_missing(digest, post.content)))
+        with self.db.transaction() as conn:
+            for post, digest, markup in prepared:
+                self._write(conn, post, digest, markup, now)
+            conn.execute(_BUMP_VERSION)
+        return len(prepared)
+
+    def delete(self, slug: str) -> bool:
+        with self.db.transaction() as conn:
+            row = conn.execute(_DELETE, (slug,)).fetchone()
+            if row is None:
+                return False
+            deleted = _to_post(row)
+            search.remove_post(conn, deleted.id)
+            listing.remove_post(conn, deleted)
+            self.rendered.release(conn, deleted.content_hash)
+            conn.execute(_BUMP_VERSION)
+        return True
+
+    def record_view(self, post_id: int) -> None:
+        """浏览计数 +1（异步批量提交，短时间内对外不可见）"""
+        self.db.submit(_INCREMENT_VIEWS, (post_id,))
@@ -0,0 +1,83 @@
+# 文章HTML存储：Markdown 在保存时渲染一次，按 (正文哈希, 渲染器) 存入 rendered_html 表；
+# 请求时先查进程内LRU，再查表，都没有（渲染器刚升级、后台尚未重建完）才在请求线程中渲染
+import sqlite3
+from typing import Optional
+
+from app.domain.post import Post
+from app.infrastructure.db.sqlite import SQLiteDatabase
+from app.infrastructure.render.renderer import RENDERER_KEY, render
+from utils.lru import LRUCache
+
+_SELECT = "SELECT html FROM rendered_html WHERE content_hash = ? AND renderer = ?"
+_EXISTS = "SELECT 1 FROM rendered_html WHERE content_hash = ? AND renderer = ?"
+_INSERT = "INSERT OR REPLACE INTO rendered_html (content_hash, renderer, html) VALUES (?, ?, ?)"
+# 正文修改/删除后，不再被任何文章引用的旧HTML
+_DELETE_ORPHAN = (
+    "DELETE FROM rendered_html WHERE content_hash = ? "
+    "AND NOT EXISTS (SELECT 1 FROM posts WHERE content_hash = ?)"
+)
+_SELECT_UNRENDERED = (
+    "SELECT id, content_hash, content FROM posts AS p WHERE id > ? AND NOT EXISTS ("
+    "SELECT 1 FROM rendered_html AS r WHERE r.content_hash = p.content_hash AND r.renderer = ?"
+    ") ORDER BY id LIMIT ?"
+)
+_COUNT_UNRENDERED = (
+    "SELECT COUNT(*) FROM posts AS p WHERE NOT EXISTS ("
+    "SELECT 1 FROM rendered_html AS r WHERE r.content_hash = p.content_hash AND r.renderer = ?)"
+)
+_PURGE_STALE = "DELETE FROM rendered_html WHERE renderer != ?"
+
+
+class RenderedHtmlStore:
+    def __init__(self, db: SQLiteDatabase, cache_max_bytes: int = 0):
+        """:param cache_max_bytes: 进程内HTML缓存的字节预算（0 表示不缓存）"""
+        self.db = db
+        self._cache = LRUCache(cache_max_bytes)
+
+    def html(self, post: Post) -> str:
+        """文章正文的HTML：命中缓存时只有一次字典查找"""
+        key = (post.content_hash, RENDERER_KEY)
+        markup = self._cache.get(key)
+        if markup is not None:
+            return markup
+        row = self.db.query_one(_SELECT, key)
+        if row is not None:
+            markup = row[0]
+        else:
+            # 尚未渲染（后台重建中）：就地渲染，异步写回，其他进程随后可直接读取
+            markup = render(post.content)
+            self.db.submit(_INSERT, (post.content_hash, RENDERER_KEY, markup))
+        self._cache.put(key, markup, len(markup.encode("utf-8")))
+        return markup
+
+    def render_if_missing(self, digest: str, content: str) -> Optional[str]:
+        """保存文章前调用（在写事务之外渲染）：已有当前渲染器的结果时返回 None"""
+        if self.db.query_one(_EXISTS, (digest, RENDERER_KEY)) is not None:
+            return None
+        return render(content)
+
+    @staticmethod
+    def store(conn: sqlite3.Connection, digest: str, markup: str) -> None:
+        conn.execute(_INSERT, (digest, RENDERER_KEY, markup))
+
+    @staticmethod
+    def release(conn: sqlite3.Connection, digest: str) -> None:
+        """文章不再引用 digest 对应的正文时调用（在写事务中）"""
+        conn.execute(_DELETE_ORPHAN, (digest, digest))
+
+    # ---------- 后台重建 ----------
+    def count_unrendered(self) -> int:
+        return self.db.query_one(_COUNT_UNRENDERED, (RENDERER_KEY,))[0]
+
+    def unrendered(self, after_id: int, limit: int) -> list[tuple[int, str, str]]:
+        """id 大于 after_id 且没有当前渲染器结果的文章：[(id, 正文哈希, 正文)]"""
+        return [tuple(row) for row in self.db.query(_SELECT_UNRENDERED, (after_id, RENDERER_KEY, limit))]
+
+    def store_many(self, rendered: list[tuple[str, str]]) -> None:
+        with self.db.transaction() as conn:
+            conn.executemany(_INSERT, [(digest, RENDERER_KEY, markup) for digest, markup in rendered])
+
+    def purge_stale(self) -> int:
+        """删除其他渲染器版本的结果（重建完成后调用）"""
+        with self.db.transaction() as conn:
+            return conn.execute(_PURGE_STALE, (RENDERER_KEY,)).rowcount
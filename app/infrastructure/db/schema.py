@@ -0,0 +1,155 @@
+# 数据库表结构：按 PRAGMA user_version 顺序执行迁移脚本，已执行过的脚本不会重复执行
+import sqlite3
+
+
+def _add_tags_and_search(conn: sqlite3.Connection) -> None:
+    """v2：文章标签 + FTS5 全文索引（已有文章在升级时一次性写入索引）+ 数据版本号"""
+    import json
+
+    from app.domain.post import STATUS_PUBLISHED, Post
+    from app.infrastructure.db.search import RANK_FUNCTION, rebuild_index
+
+    conn.execute("ALTER TABLE posts ADD COLUMN tags TEXT NOT NULL DEFAULT '[]'")  # JSON 数组
+    # 中文在入库前切成二元组（见 search.segment），unicode61 只负责按空白/标点切分与大小写、变音符号归一；
+    # prefix='1' 额外索引单字符前缀，单个汉字/字母的前缀查询不必合并所有以它开头的词的倒排表
+    conn.execute(
+        "CREATE VIRTUAL TABLE posts_fts USING fts5("
+        "title, tags, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '1')"
+    )
+    conn.execute("INSERT INTO posts_fts (posts_fts, rank) VALUES ('rank', ?)", (RANK_FUNCTION,))
+    # 数据版本号：文章每次增删改 +1，各进程的结果缓存据此判断是否失效（浏览计数不计入）
+    conn.execute("CREATE TABLE versions (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID")
+    conn.execute("INSERT INTO versions (name, value) VALUES ('posts', 0)")
+    # 只读取 v2 时已有的列（不能复用仓储的查询：之后的迁移还会给 posts 加列）
+    rows = conn.execute("SELECT id, slug, title, content, tags FROM posts WHERE status = 'published'")
+    rebuild_index(conn, (
+        Post(id=row[0], slug=row[1], title=row[2], content=row[3], tags=tuple(json.loads(row[4])),
+             status=STATUS_PUBLISHED)
+        for row in rows
+    ))
+
+
+def _add_rendered_html(conn: sqlite3.Connection) -> None:
+    """v3：正文哈希 + 渲染结果表（已有文章的HTML由主进程启动后在后台渲染）"""
+    from app.infrastructure.render.renderer import content_hash
+
+    conn.execute("ALTER TABLE posts ADD COLUMN content_hash TEXT NOT NULL DEFAULT ''")
+    conn.executemany(
+        "UPDATE posts SET content_hash = ? WHERE id = ?",
+        [(content_hash(content), post_id) for post_id, content in conn.execute("SELECT id, content FROM posts")]
+    )
+    conn.execute("CREATE INDEX idx_posts_content_hash ON posts (content_hash)")
+    conn.execute(
+        "CREATE TABLE rendered_html ("
+        "content_hash TEXT NOT NULL, renderer TEXT NOT NULL, html TEXT NOT NULL, "
+        "PRIMARY KEY (content_hash, renderer))"
+    )
+
+
+def _add_listing_indexes(conn: sqlite3.Connection) -> None:
+    """v4：标签→文章、月份→文章索引表与各列表的文章数（已有文章在升级时一次性写入）"""
+    import json
+
+    from app.domain.post import STATUS_PUBLISHED, Post
+    from app.infrastructure.db.listing import rebuild_index
+
+    # 主键即分页顺序：按标签/月份定位后沿 (published_at, post_id) 倒序范围扫描，只包含已发布文章
+    conn.execute(
+        "CREATE TABLE post_tags (tag TEXT NOT NULL, published_at INTEGER NOT NULL, post_id INTEGER NOT NULL, "
+        "PRIMARY KEY (tag, published_at, post_id)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE post_months (month TEXT NOT NULL, published_at INTEGER NOT NULL, post_id INTEGER NOT NULL, "
+        "PRIMARY KEY (month, published_at, post_id)) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE listing_counts (kind TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, "
+        "PRIMARY KEY (kind, key)) WITHOUT ROWID"
+    )
+    # 只读取 v4 时已有的列，且不依赖连接的 row_factory
+    rows = conn.execute("SELECT id, slug, title, tags, published_at FROM posts WHERE status = 'published'")
+    rebuild_index(conn, (
+        Post(id=row[0], slug=row[1], title=row[2], tags=tuple(json.loads(row[3])), published_at=row[4],
+             status=STATUS_PUBLISHED)
+        for row in rows
+    ))
+
+
+# 第 i 个脚本（SQL 脚本或接收连接的函数）把库从版本 i 升级到 i+1；只能追加，不能修改已发布的脚本
+MIGRATIONS = (
+    """
+    CREATE TABLE IF NOT EXISTS posts (
+        id           INTEGER PRIMARY KEY,
+        slug         TEXT    NOT NULL UNIQUE,
+        title        TEXT    NOT NULL,
+        summary      TEXT    NOT NULL DEFAULT '',
+        content      TEXT    NOT NULL DEFAULT '',
+        status       TEXT    NOT NULL DEFAULT 'draft' CHECK (status IN ('draft', 'published')),
+        published_at INTEGER NOT NULL DEFAULT 0,
+        updated_at   INTEGER NOT NULL DEFAULT 0,
+        views        INTEGER NOT NULL DEFAULT 0
+    );
+    -- 首页/列表按发布时间倒序读取已发布文章
+    CREATE INDEX IF NOT EXISTS idx_posts_status_published ON posts (status, published_at DESC, id DESC);
+    """,
+    _add_tags_and_search,
+    _add_rendered_html,
+    _add_listing_indexes,
+)
+
+
+def _statements(script: str):
+    """
+    把脚本拆成单条语句（executescript 会先提交当前事务，因此逐条执行以保持在同一事务中）
+    按行累积直到 sqlite3.complete_statement 为真，触发器 BEGIN ... END 中的分号不会被拆开
+    """
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer.strip()
+            buffer = ""
+    if buffer.strip() and not all(line.strip().startswith("--") or not line.strip() for line in buffer.splitlines()):
+        raise ValueError(f"迁移脚本末尾有不完整的语句：{buffer.strip()[:80]}")
+
+
+def check_migrations() -> int:
+    """
+    在内存中的空库上执行全部迁移，确认从零建库到最新版本可以走通（启动探测时调用），返回最新版本号
+    建到 v1 后先写入一篇已发布文章，让回填已有数据的迁移也实际执行一遍
+    """
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    try:
+        migrate(conn, target=1)
+        conn.execute(
+            "INSERT INTO posts (slug, title, content, status, published_at) "
+            "VALUES ('migration-check', '迁移检查', '正文', 'published', 1)"
+        )
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+def migrate(conn: sqlite3.Connection, target: int = len(MIGRATIONS)) -> int:
+    """
+    把库升级到 target 版本（默认最新），返回升级后的版本号
+    多个进程同时启动时：BEGIN IMMEDIATE 串行化，取得写锁后重新读取版本，只有第一个进程真正执行脚本
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+        return target
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for index in range(version, target):
+            migration = MIGRATIONS[index]
+            if callable(migration):
+                migration(conn)
+                continue
+            for statement in _statements(migration):
+                conn.execute(statement)
+        conn.execute(f"PRAGMA user_version={max(version, target)}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return target
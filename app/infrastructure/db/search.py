@@ -0,0 +1,182 @@
+# 全文检索：SQLite FTS5 索引已发布文章的标题/标签/正文，BM25 排序
+# unicode61 分词器不切分中文（整段连续汉字是一个词），因此入库前把中日韩文字切成二元组（bigram），
+# 查询时把连续汉字转成二元组短语，等价于子串匹配且倒排表远小于单字索引
+import html
+import re
+import sqlite3
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Optional
+
+from app.domain.post import Post
+
+# 中日韩文字（CJK 统一表意文字及扩展A、兼容表意文字、假名、谚文音节）
+_CJK = "㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+# 连续的中日韩文字，或其他字母数字（排除下划线与中日韩文字，与 unicode61 的切分一致）
+_TOKEN = re.compile(rf"([{_CJK}]+)|([^\W_{_CJK}]+)")
+
+# 各列 BM25 权重：标题 > 标签 > 正文（写入 FTS5 的 rank 配置，ORDER BY rank 时直接使用）
+RANK_FUNCTION = "bm25(10.0, 5.0, 1.0)"
+# 批量重建时每批写入的文章数
+REBUILD_BATCH = 500
+
+_DELETE = "DELETE FROM posts_fts WHERE rowid = ?"
+_INSERT = "INSERT INTO posts_fts (rowid, title, tags, body) VALUES (?, ?, ?, ?)"
+# 命中过多时只对最新的 max_ranked 篇计算 BM25：
+# 先按 rowid 倒序（倒排表顺序，无需打分）取第 max_ranked 篇的 rowid 作为下限
+_RANK_FLOOR = (
+    "SELECT min(rowid) FROM (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ? ORDER BY rowid DESC LIMIT ?)"
+)
+_SEARCH = (
+    "SELECT {columns} FROM ("
+    "SELECT rowid, rank FROM posts_fts WHERE posts_fts MATCH ? AND rowid >= ? ORDER BY rank LIMIT ? OFFSET ?"
+    ") AS hits JOIN posts AS p ON p.id = hits.rowid ORDER BY hits.rank"
+)
+
+
+def segment(text: str) -> str:
+    """
+    入库前分词：连续汉字切成相邻二元组并追加末字（"全文检索" → "全文 文检 检索 索"），其余单词原样保留
+    末字使单字前缀查询（"索"*）也能命中位于词尾的字
+    """
+    parts = []
+    for match in _TOKEN.finditer(text):
+        run = match.group(1)
+        if run is None:
+            parts.append(match.group(2))
+            continue
+        parts.extend(run[i:i + 2] for i in range(len(run) - 1))
+        parts.append(run[-1])
+    return " ".join(parts)
+
+
+def parse_query(query: str) -> tuple[Optional[str], tuple[str, ...]]:
+    """
+    把用户输入转换为 FTS5 MATCH 表达式（所有词都加引号，用户输入中的 FTS5 语法字符不会生效）：
+    - 连续汉字 → 二元组短语 "全文 文检 检索"；单个汉字 → 前缀 "索"*；
+    - 其他单词 → 精确匹配，最后一个词按前缀匹配 "pyth"*（边输入边搜索；前缀要合并多个词的倒排表，只用在末尾）；
+    - 多个词之间为 AND。
+    :return: (MATCH 表达式，无可检索内容时为 None；用于高亮的原始词)
+    """
+    clauses = []
+    terms = []
+    matches = list(_TOKEN.finditer(query))
+    for position, match in enumerate(matches):
+        run, word = match.groups()
+        if run is not None:
+            terms.append(run)
+            if len(run) == 1:
+                clauses.append(f'"{run}"*')
+            else:
+                clauses.append('"' + " ".join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+        else:
+            terms.append(word.lower())
+            clauses.append(f'"{word.lower()}"' + ("*" if position == len(matches) - 1 else ""))
+    if not clauses:
+        return None, ()
+    return " ".join(clauses), tuple(dict.fromkeys(terms))
+
+
+def _highlight_pattern(terms: tuple[str, ...]) -> re.Pattern:
+    # 长词优先，避免短词先匹配把长词截断；西文词统一按前缀匹配到词尾
+    alternatives = []
+    for term in sorted(terms, key=len, reverse=True):
+        escaped = re.escape(term)
+        alternatives.append(escaped if _TOKEN.fullmatch(term).group(1) else rf"{escaped}[^\W_{_CJK}]*")
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def highlight(text: str, pattern: re.Pattern) -> str:
+    """转义 HTML 并用 <mark> 包住命中的词"""
+    out = []
+    last = 0
+    for match in pattern.finditer(text):
+        out.append(html.escape(text[last:match.start()]))
+        out.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        last = match.end()
+    out.append(html.escape(text[last:]))
+    return "".join(out)
+
+
+def make_snippet(text: str, pattern: re.Pattern, width: int = 120) -> str:
+    """摘要：以正文中第一个命中位置为中心截取约 width 个字符并高亮；正文未命中时取开头"""
+    text = " ".join(text.split())
+    match = pattern.search(text)
+    start = 0 if match is None else max(0, match.start() - width // 3)
+    end = min(len(text), start + width)
+    snippet = highlight(text[start:end], pattern)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    """一条检索结果（post 不含正文，便于缓存）"""
+    post: Post
+    title_html: str
+    snippet_html: str
+
+    def to_dict(self) -> dict:
+        data = self.post.to_dict(with_content=False)
+        data["title_html"] = self.title_html
+        data["snippet_html"] = self.snippet_html
+        return data
+
+
+def index_post(conn: sqlite3.Connection, post: Post) -> None:
+    """在调用方的事务中更新一篇文章的索引：已发布的写入（先删后插），其余状态移出索引"""
+    conn.execute(_DELETE, (post.id,))
+    if post.published:
+        conn.execute(_INSERT, (post.id, segment(post.title), segment(" ".join(post.tags)), segment(post.content)))
+
+
+def remove_post(conn: sqlite3.Connection, post_id: int) -> None:
+    conn.execute(_DELETE, (post_id,))
+
+
+def rebuild_index(conn: sqlite3.Connection, posts: Iterable[Post]) -> int:
+    """在调用方的事务中清空并重建整个索引（posts 为全部已发布文章），完成后合并索引段，返回索引的文章数"""
+    conn.execute("DELETE FROM posts_fts")
+    total = 0
+    for batch in _batched(posts, REBUILD_BATCH):
+        conn.executemany(_INSERT, [
+            (post.id, segment(post.title), segment(" ".join(post.tags)), segment(post.content)) for post in batch
+        ])
+        total += len(batch)
+    conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('optimize')")
+    return total
+
+
+def _batched(items: Iterable, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def search(conn: sqlite3.Connection, columns: str, to_post: Callable, expression: str, terms: tuple[str, ...],
+           limit: int = 20, offset: int = 0, max_ranked: int = 0,
+           snippet_width: int = 120) -> tuple[list[SearchHit], bool]:
+    """
+    检索已发布文章（BM25 排序）：先在 FTS5 中取出本页的 rowid，再按主键读取文章
+    BM25 需要逐篇打分（每篇约数微秒），常见词命中全部文章时耗时随文章数线性增长；
+    max_ranked > 0 时只在最新的 max_ranked 篇命中文章中排序，最坏耗时有上限，
+    但更早的命中文章（即使标题完全匹配）不会出现在结果中，也不计入是否有下一页；默认 0 不限制
+    :param expression/terms: parse_query 的结果
+    :param columns: 读取 posts 表（别名 p）的列，to_post 把一行转换为 Post
+    :return: (本页结果, 是否还有下一页)；多取一条判断是否有下一页，不单独统计总数
+    """
+    floor = 0
+    if max_ranked > 0:
+        floor = conn.execute(_RANK_FLOOR, (expression, max_ranked)).fetchone()[0] or 0
+    rows = conn.execute(_SEARCH.format(columns=columns), (expression, floor, limit + 1, offset)).fetchall()
+    pattern = _highlight_pattern(terms)
+    hits = []
+    for row in rows[:limit]:
+        post = to_post(row)
+        hits.append(SearchHit(
+            replace(post, content=""), highlight(post.title, pattern), make_snippet(post.content, pattern, snippet_width)
+        ))
+    return hits, len(rows) > limit
@@ -0,0 +1,266 @@
+# SQLite 连接层：每个Waitress线程一个长连接（WAL 模式下读不互相阻塞），写操作攒批后在一个事务中提交
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils.logger import logError, logInfo, logWarning
+
+URL_PREFIX = "sqlite:///"
+
+# 本进程中的数据库对象（弱引用：重新加载配置后旧对象可以被回收），fork 后由模块级钩子统一重置
+_databases: "weakref.WeakSet[SQLiteDatabase]" = weakref.WeakSet()
+# 子进程从父进程继承的连接：不能在子进程中使用或关闭（会破坏父进程持有的锁与 WAL 状态），
+# 放在模块级列表中使其永不被回收（数据库对象本身被回收时也不会关闭它们）
+_inherited_connections: list = []
+
+
+def _reset_after_fork() -> None:
+    for db in list(_databases):
+        db._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@dataclass(frozen=True, slots=True)
+class SQLiteOptions:
+    """连接参数（对应 launch.yaml 的 database 节）"""
+    busy_timeout_ms: int = 5000
+    synchronous: str = "NORMAL"
+    cache_size_kb: int = 16384
+    mmap_size_mb: int = 64
+    cached_statements: int = 256
+    write_batch_size: int = 100
+    write_flush_interval: float = 0.5
+
+
+def resolve_database_path(database_config: dict) -> str:
+    """
+    数据库文件路径：环境变量 DATABASE_URL 优先，其次 launch.yaml 的 database.url
+    仅支持 sqlite:///相对路径 与 sqlite:////绝对路径；内存库（:memory:）每个连接都是独立的库，不能用于多线程
+    """
+    url = os.getenv("DATABASE_URL") or database_config.get("url", f"{URL_PREFIX}./dev.db")
+    if not url.startswith(URL_PREFIX):
+        raise ValueError(f"不支持的数据库URL：{url}（仅支持 {URL_PREFIX}<文件路径>）")
+    path = url[len(URL_PREFIX):]
+    if not path or path == ":memory:":
+        raise ValueError(f"数据库URL必须指向文件：{url}")
+    return str(Path(path).absolute())
+
+
+def options_from_config(database_config: dict) -> SQLiteOptions:
+    defaults = SQLiteOptions()
+    return SQLiteOptions(**{
+        name: database_config.get(name, getattr(defaults, name)) for name in SQLiteOptions.__dataclass_fields__
+    })
+
+
+class SQLiteDatabase:
+    """
+    - 连接：每个线程首次访问时创建并一直复用（threading.local），避免每个请求重新连接、重新执行 PRAGMA；
+      连接以自动提交模式打开，读操作不持有事务，写操作显式 BEGIN IMMEDIATE，不会在提交时才发现锁冲突；
+    - 预编译语句：sqlite3 按 SQL 文本缓存每个连接上编译好的语句（cached_statements），
+      因此所有 SQL 都写成常量 + 参数占位符，不要拼接参数值；
+    - 批量写：submit() 只把写操作放入队列，由后台线程攒满 write_batch_size 条或每 write_flush_interval 秒
+      在一个事务中提交（WAL + synchronous=NORMAL 下每个事务只追加一次 WAL，不逐条 fsync）；
+    - fork：连接不能跨进程使用，子进程丢弃继承的连接与写线程，用到时重新创建。
+    """
+
+    def __init__(self, path: str, options: Optional[SQLiteOptions] = None):
+        self.path = path
+        self.options = options or SQLiteOptions()
+        self._local = threading.local()
+        self._connections: list = []  # 所有线程的连接（Waitress线程常驻，数量固定），close() 时统一关闭
+        self._connections_lock = threading.Lock()
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        _databases.add(self)
+
+    # ---------- 连接 ----------
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.options.busy_timeout_ms / 1000,
+            isolation_level=None,  # 自动提交，事务由 transaction() 显式控制
+            check_same_thread=False,  # 每个连接只在创建它的线程中使用；关闭时由 close() 在其他线程统一关闭
+            cached_statements=self.options.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        # journal_mode=WAL 持久保存在库文件中，这里确保新建的库也开启；其余 PRAGMA 只对本连接有效
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.options.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.options.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size={-int(self.options.cache_size_kb)}")  # 负数表示 KB
+        conn.execute(f"PRAGMA mmap_size={int(self.options.mmap_size_mb) * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """当前线程的连接（首次调用时创建）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError("数据库已关闭")
+            conn = self._local.conn = self._connect()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def query(self, sql: str, params: Iterable = ()) -> list:
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Iterable = ()) -> Optional[sqlite3.Row]:
+        return self.connection().execute(sql, params).fetchone()
+
+    @contextmanager
+    def transaction(self):
+        """写事务：BEGIN IMMEDIATE 一开始就取得写锁（等待时受 busy_timeout 约束），异常时回滚"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # ---------- 批量写 ----------
+    def submit(self, sql: str, params: Iterable = ()) -> None:
+        """异步写：放入队列立即返回，由写线程批量提交（适合浏览计数等允许短暂延迟、允许合并的写入）"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("数据库已关闭")
+        if self._writer is None:
+            self._start_writer()
+        self._pending.put((sql, tuple(params)))
+
+    def _start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="SQLiteWriter", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.options.write_flush_interval
+            stop = False
+            while len(batch) < self.options.write_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: list) -> None:
+        # 相邻的同一条 SQL 合并为一次 executemany
+        groups = []
+        for sql, params in batch:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+        try:
+            with self.transaction() as conn:
+                for sql, rows in groups:
+                    conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            logError(f"❌ 批量写入失败，丢弃 {len(batch)} 条：{e}")
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """停止写线程并提交队列中剩余的写操作"""
+        writer = self._writer
+        if writer is None:
+            return
+        self._pending.put(None)
+        writer.join(timeout)
+        if writer.is_alive():
+            logWarning(f"⚠️ SQLite写线程 {timeout} 秒内未结束，剩余写入可能丢失")
+        self._writer = None
+
+    def close(self) -> None:
+        """提交剩余写入并关闭所有线程的连接（进程退出前调用）"""
+        self.flush()
+        self._closed = True
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        _databases.discard(self)
+
+    def _reset_after_fork(self) -> None:
+        # 父进程的连接与写线程不属于本进程：丢弃引用，用到时重新创建
+        _inherited_connections.extend(self._connections)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._pending = queue.SimpleQueue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    # ---------- 启动检查 ----------
+    def migrate(self) -> int:
+        """建表/升级表结构（独立连接，用完即关），返回库版本"""
+        from app.infrastructure.db.schema import migrate
+
+        conn = self._connect()
+        try:
+            return migrate(conn)
+        finally:
+            conn.close()
+
+    def check(self) -> str:
+        """
+        启动探测：先在内存空库上走通全部迁移，再用独立连接（不进入线程池，避免 fork 后被子进程继承）
+        执行建表迁移并检查可读写
+        :return: 说明文本（SQLite 版本、日志模式、库版本）
+        :raise sqlite3.Error: 迁移脚本无法从空库建到最新版本/无法打开/无法加锁写入/库文件损坏
+        """
+        from app.infrastructure.db.schema import check_migrations, migrate
+
+        check_migrations()
+        conn = self._connect()
+        try:
+            version = migrate(conn)
+            conn.execute("SELECT 1").fetchone()
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal_mode.lower() != "wal":
+                logWarning(f"⚠️ 数据库未能开启 WAL（当前 {journal_mode}），读写会互相阻塞：{self.path}")
+            # 取得写锁后立即回滚：确认文件可写且没有被其他进程长期锁住
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("ROLLBACK")
+            return f"SQLite {sqlite3.sqlite_version}，journal_mode={journal_mode}，schema v{version}"
+        finally:
+            conn.close()
+
+
+def open_database(database_config: dict) -> SQLiteDatabase:
+    db = SQLiteDatabase(resolve_database_path(database_config), options_from_config(database_config))
+    logInfo(f"🗄️ 数据库：{db.path}")
+    return db
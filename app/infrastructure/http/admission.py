@@ -0,0 +1,171 @@
+# 准入控制：过载时快速返回 503（带 Retry-After），而不是让请求在 Waitress 队列里排到客户端超时
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+from waitress.task import ThreadedTaskDispatcher
+
+# 当前线程正在处理的请求在 Waitress 任务队列中的等待时长（由 TimedDispatcher 写入，中间件读取）
+_current = threading.local()
+
+
+def current_queue_wait() -> Optional[float]:
+    """当前请求的排队时长（秒）；不在 TimedDispatcher 的工作线程中时返回 None"""
+    return getattr(_current, "queue_wait", None)
+
+
+class _TimedTask:
+    """包装 Waitress 任务（HTTPChannel，每次 service() 处理一个请求），记录入队时间"""
+
+    __slots__ = ("task", "dispatcher", "enqueued_at")
+
+    def __init__(self, task, dispatcher: "TimedDispatcher"):
+        self.task = task
+        self.dispatcher = dispatcher
+        self.enqueued_at = time.monotonic()
+
+    def service(self):
+        _current.queue_wait = time.monotonic() - self.enqueued_at
+        self.dispatcher.task_started(self.task)
+        try:
+            return self.task.service()
+        finally:
+            _current.queue_wait = None
+            self.dispatcher.task_finished()
+
+    def cancel(self):
+        return self.task.cancel()
+
+    def __getattr__(self, name):
+        return getattr(self.task, name)
+
+
+class TimedDispatcher(ThreadedTaskDispatcher):
+    """Waitress任务分发器：记录每个请求的排队时长；子类可覆盖 task_started/task_finished 记录线程状态"""
+
+    def task_started(self, task) -> None:
+        pass
+
+    def task_finished(self) -> None:
+        pass
+
+    def add_task(self, task):
+        super().add_task(_TimedTask(task, self))
+
+
+def _request_start_wait(environ) -> Optional[float]:
+    """
+    从前置代理的 X-Request-Start 头（如 nginx 的 "t=${msec}"）计算请求到达后经过的时间，
+    兼容秒/毫秒/微秒时间戳；格式不对时返回 None
+    """
+    value = environ.get("HTTP_X_REQUEST_START", "")
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    # 按数量级判断单位：微秒 > 毫秒 > 秒
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(time.time() - started, 0.0)
+
+
+class _ReleasingIterable:
+    """包装应用返回的响应体：服务器发送完毕调用 close() 时才归还并发名额（只归还一次）"""
+
+    __slots__ = ("iterable", "release", "_released")
+
+    def __init__(self, iterable, release: Callable[[], None]):
+        self.iterable = iterable
+        self.release = release
+        self._released = False
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self) -> None:
+        try:
+            close = getattr(self.iterable, "close", None)
+            if close is not None:
+                close()
+        finally:
+            if not self._released:
+                self._released = True
+                self.release()
+
+
+class AdmissionMiddleware:
+    """
+    用法：app.wsgi_app = AdmissionMiddleware(app.wsgi_app, ...)
+    - 正在处理的（不可跳过的）请求数达到 max_in_flight → 503，为健康检查/静态资源保留线程；
+    - 请求排队时长超过 max_queue_wait → 503：排了这么久的请求多半已被客户端放弃，尽快清空队列；
+    - bypass(environ) 为 True 的请求（/health、缓存中的静态资源等）不受限制。
+    in_flight 统计到服务器发送完响应体、调用 close() 为止（流式响应也占用名额）；
+    交给 wsgi.file_wrapper 的文件由服务器在I/O线程中发送、不占工作线程，返回时即归还。
+    """
+
+    def __init__(self, wsgi_app, max_in_flight: int = 0, max_queue_wait: float = 0.0, retry_after: int = 1,
+                 trust_request_start: bool = False, bypass: Optional[Callable[[dict], bool]] = None,
+                 on_shed: Optional[Callable[[str], None]] = None):
+        """
+        :param max_in_flight: 本进程同时处理的请求上限（0 表示不限制）
+        :param max_queue_wait: 排队时长上限（秒，0 表示不限制）
+        :param retry_after: 503 响应的 Retry-After（秒）
+        :param trust_request_start: 是否采信前置代理的 X-Request-Start（需与代理时钟同步）
+        :param on_shed: 每拒绝一个请求调用一次，参数为原因（"queue_wait" / "in_flight"），用于导出计数
+        """
+        self.wsgi_app = wsgi_app
+        self.max_in_flight = max_in_flight
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self.trust_request_start = trust_request_start
+        self.bypass = bypass
+        self.on_shed = on_shed
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight > 0 else None
+
+    def __call__(self, environ, start_response):
+        if self.bypass is not None and self.bypass(environ):
+            return self.wsgi_app(environ, start_response)
+
+        # 1. 排队过久：直接拒绝
+        if self.max_queue_wait > 0:
+            waited = current_queue_wait()
+            if self.trust_request_start:
+                proxy_wait = _request_start_wait(environ)
+                if proxy_wait is not None:
+                    waited = max(waited or 0.0, proxy_wait)
+            if waited is not None and waited > self.max_queue_wait:
+                return self._reject(start_response, "queue_wait", f"排队 {waited:.2f} 秒")
+
+        # 2. 并发已满：直接拒绝（不阻塞等待）
+        if self._slots is None:
+            return self.wsgi_app(environ, start_response)
+        if not self._slots.acquire(blocking=False):
+            return self._reject(start_response, "in_flight", f"并发已达 {self.max_in_flight}")
+        try:
+            result = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self._slots.release()
+            raise
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(result, file_wrapper):
+            # 不包装：保留服务器的文件发送路径（Waitress 只对原始 file_wrapper 对象走异步发送）
+            self._slots.release()
+            return result
+        return _ReleasingIterable(result, self._slots.release)
+
+    def _reject(self, start_response, reason: str, detail: str):
+        if self.on_shed is not None:
+            self.on_shed(reason)
+        body = json.dumps({"code": 503, "msg": f"服务繁忙，请稍后重试（{detail}）"}, ensure_ascii=False).encode("utf-8")
+        start_response("503 Service Unavailable", [
+            ("Content-Type", "application/json; charset=utf-8"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", str(self.retry_after)),
+            ("Cache-Control", "no-store"),
+        ])
+        return [body]
@@ -0,0 +1,62 @@
+# 监听套接字：由主进程统一绑定，再交给所有Waitress子进程共享 accept
+import os
+import socket
+import sys
+from typing import Optional
+
+
+def create_listen_socket(host: str, port: int, backlog: int = 1024, reuse_port: bool = False) -> socket.socket:
+    """
+    创建并绑定监听套接字（主进程调用一次）
+    :param host: 监听地址（包含 ':' 时按IPv6处理）
+    :param port: 监听端口
+    :param backlog: 内核accept队列长度（子进程尚未就绪时新连接在队列中等待，不会被拒绝）
+    :param reuse_port: 是否设置 SO_REUSEPORT（仅Linux/BSD，便于新旧主进程交替时同时绑定同一端口）
+    :return: 已 listen 的套接字
+    :raise OSError: 端口被占用/无权限等绑定失败
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        if sys.platform == "win32":
+            # Windows 的 SO_REUSEADDR 允许抢占端口，改用独占绑定
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise OSError("当前平台不支持 SO_REUSEPORT")
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def accept_queue_depth(sock: socket.socket) -> Optional[int]:
+    """
+    监听套接字当前在内核accept队列中等待的连接数（仅Linux：LISTEN 状态下 /proc/net/tcp 的 rx_queue 即为该值）
+    :return: 无法获取（非Linux/套接字已关闭）时返回None
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+    except (OSError, ValueError):
+        return None
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table, "r") as f:
+                next(f, None)  # 表头
+                for line in f:
+                    fields = line.split()
+                    # sl local_address rem_address st tx_queue:rx_queue tr:when retrnsmt uid timeout inode
+                    if len(fields) > 9 and fields[9] == inode and fields[3] == "0A":
+                        return int(fields[4].split(":")[1], 16)
+        except OSError:
+            continue
+    return None
@@ -0,0 +1,166 @@
+# 共享内存记分板：每个子进程的每个工作线程把自己的状态（空闲/忙碌、当前请求、开始时间）写进一块共享内存，
+# 主进程直接读取即可发现"所有线程都卡住"的子进程，无需任何进程间往返
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+from app.infrastructure.http.admission import TimedDispatcher
+
+# 行头：PID、进程启动时间
+_HEADER = struct.Struct("<qd")
+# 线程条目：状态、请求开始时间、已处理请求数、方法、路径
+_ENTRY = struct.Struct("<B7xdq8s48s")
+STATE_IDLE = 0
+STATE_BUSY = 1
+
+
+@dataclass(frozen=True, slots=True)
+class ThreadState:
+    """记分板中的一个线程条目"""
+    index: int
+    busy: bool
+    started_at: float  # 当前请求开始时间（time.time）
+    requests: int  # 该线程累计处理的请求数
+    method: str
+    path: str
+
+
+@dataclass(frozen=True, slots=True)
+class ScoreboardSpec:
+    """子进程挂载记分板所需的信息（可 pickle，随启动参数传给子进程）"""
+    name: str
+    rows: int
+    threads: int
+    row: int
+
+
+class Scoreboard:
+    """
+    记分板共享内存：rows 行 × threads 个线程条目
+    - 主进程 create() 创建并负责 unlink；子进程 attach() 只写自己那一行；
+    - 每个条目只有一个写者（对应线程），先写时间/路径再写状态，读者看到"忙碌"时时间一定是新的。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, rows: int, threads: int):
+        self.shm = shm
+        self.rows = rows
+        self.threads = threads
+        self.row_size = _HEADER.size + _ENTRY.size * threads
+
+    @classmethod
+    def create(cls, rows: int, threads: int) -> "Scoreboard":
+        size = rows * (_HEADER.size + _ENTRY.size * threads)
+        return cls(shared_memory.SharedMemory(create=True, size=size), rows, threads)
+
+    @classmethod
+    def attach(cls, spec: ScoreboardSpec) -> "Scoreboard":
+        return cls(shared_memory.SharedMemory(name=spec.name), spec.rows, spec.threads)
+
+    def spec(self, row: int) -> ScoreboardSpec:
+        return ScoreboardSpec(self.shm.name, self.rows, self.threads, row)
+
+    def reset_row(self, row: int) -> None:
+        """清空一行（主进程在该行启动新进程前调用，避免把上个进程的忙碌状态当成卡死）"""
+        start = row * self.row_size
+        self.shm.buf[start:start + self.row_size] = bytes(self.row_size)
+
+    def set_header(self, row: int, pid: int, started_at: float) -> None:
+        _HEADER.pack_into(self.shm.buf, row * self.row_size, pid, started_at)
+
+    def write(self, row: int, thread: int, state: int, started_at: float, requests: int,
+              method: bytes = b"", path: bytes = b"") -> None:
+        _ENTRY.pack_into(
+            self.shm.buf, row * self.row_size + _HEADER.size + thread * _ENTRY.size,
+            state, started_at, requests, method, path
+        )
+
+    def read(self, row: int, threads: Optional[int] = None) -> tuple[int, float, list[ThreadState]]:
+        """读取一行：(PID, 进程启动时间, 线程状态列表)"""
+        base = row * self.row_size
+        pid, process_started = _HEADER.unpack_from(self.shm.buf, base)
+        states = []
+        for i in range(min(threads or self.threads, self.threads)):
+            state, started_at, requests, method, path = _ENTRY.unpack_from(
+                self.shm.buf, base + _HEADER.size + i * _ENTRY.size
+            )
+            states.append(ThreadState(
+                i, state == STATE_BUSY, started_at, requests,
+                method.rstrip(b"\0").decode("latin-1"), path.rstrip(b"\0").decode("latin-1", "replace")
+            ))
+        return pid, process_started, states
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ScoreboardDispatcher(TimedDispatcher):
+    """
+    Waitress任务分发器：每个工作线程在记分板中占一个条目
+    在分发器层面记录（task_started/task_finished 包住 service()）而不是在WSGI中间件中记录，
+    才能覆盖 wsgi.file_wrapper 发送大文件的阶段
+    """
+
+    def __init__(self, board: Scoreboard, row: int):
+        super().__init__()
+        self.board = board
+        self.row = row
+        self._local = threading.local()
+        self._next_index = iter(range(board.threads))
+        self._index_lock = threading.Lock()
+        board.set_header(row, os.getpid(), time.time())
+
+    def _slot(self):
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            with self._index_lock:
+                index = next(self._next_index, None)
+            # 线程数超过记分板容量时不记录
+            slot = self._local.slot = [index, 0]
+        return slot
+
+    def task_started(self, task) -> None:
+        slot = self._slot()
+        if slot[0] is None:
+            return
+        pending = getattr(task, "requests", None)
+        request = pending[0] if pending else None
+        method = (getattr(request, "command", None) or "").encode("latin-1", "replace")[:8]
+        path = (getattr(request, "path", None) or "").encode("latin-1", "replace")[:48]
+        self.board.write(self.row, slot[0], STATE_BUSY, time.time(), slot[1], method, path)
+
+    def task_finished(self) -> None:
+        slot = self._slot()
+        if slot[0] is None:
+            return
+        slot[1] += 1
+        self.board.write(self.row, slot[0], STATE_IDLE, 0.0, slot[1])
+
+
+def render_status(board: Scoreboard, threads: int) -> str:
+    """/server-status 文本：每个子进程一段，每个线程一行"""
+    now = time.time()
+    lines = [f"记分板：{board.rows} 行 × {board.threads} 线程，时间 {time.strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    for row in range(board.rows):
+        pid, process_started, states = board.read(row, threads)
+        if not pid:
+            continue
+        busy = [s for s in states if s.busy]
+        total = sum(s.requests for s in states)
+        lines.append(f"[槽位 {row}] PID {pid}  运行 {now - process_started:.0f}s  "
+                     f"忙碌 {len(busy)}/{len(states)}  已处理 {total}")
+        for s in states:
+            if s.busy:
+                lines.append(f"  线程{s.index:>3}  忙碌 {now - s.started_at:8.2f}s  {s.method} {s.path}")
+        lines.append("")
+    return "\n".join(lines) + "\n"
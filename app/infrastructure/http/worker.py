@@ -0,0 +1,227 @@
+# Waitress子进程服务：与主进程通过控制管道通信（就绪/负载上报/回收请求/优雅排空）
+import itertools
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from waitress.channel import HTTPChannel
+from waitress.server import BaseWSGIServer, create_server
+
+from app.infrastructure.http.admission import TimedDispatcher
+from app.infrastructure.http.scoreboard import Scoreboard, ScoreboardDispatcher
+from utils import startup_profile
+from utils.logger import logError, logInfo
+
+# 子进程 → 主进程：自检通过，服务已开始监听
+MSG_READY = "ready"
+# 子进程 → 主进程：负载上报（忙碌线程数/排队任务数/连接数）
+MSG_LOAD = "load"
+# 子进程 → 主进程：已达到回收条件（请求数上限），请求主进程先启动替代进程再排空自己
+MSG_RECYCLE = "recycle"
+# 主进程 → 子进程：停止接收新连接，处理完在途请求后退出
+MSG_DRAIN = "drain"
+# 主进程 → 子进程：记录所有线程的Python调用栈（看门狗判定卡死时下发）
+MSG_DUMP_STACKS = "dump_stacks"
+# 刚建立、尚未收到任何数据的连接在排空时保留的时长（秒）：请求数据可能已在路上
+FRESH_CONNECTION_GRACE = 1.0
+
+
+class GracefulServer:
+    """
+    Waitress服务封装，支持优雅排空：
+    1. 监听套接字移出事件循环，不再 accept（套接字由主进程持有，其他子进程照常 accept）；
+    2. 反复关闭空闲的长连接，等待在途请求全部响应完毕（或超时）；
+    3. 关闭事件循环中剩余的对象，run() 返回，进程正常退出。
+    所有对 Waitress 内部对象的修改都通过 trigger 投递到事件循环线程执行。
+    """
+
+    def __init__(self, app, dispatcher=None, **adjustments):
+        if dispatcher is not None:
+            # 自定义分发器时 create_server 不会启动工作线程，需自行设置
+            dispatcher.set_thread_count(adjustments.get("threads", 4))
+        self.server = create_server(app, _dispatcher=dispatcher, **adjustments)
+        self._map = self.server._map if isinstance(self.server, BaseWSGIServer) else self.server.map
+        self.dispatcher = self.server.task_dispatcher
+        self._listeners = [obj for obj in self._map.values() if isinstance(obj, BaseWSGIServer)]
+        self._trigger = self._listeners[0].trigger
+        self._draining = threading.Event()
+
+    @property
+    def draining(self) -> bool:
+        return self._draining.is_set()
+
+    def run(self) -> None:
+        try:
+            self.server.run()
+        finally:
+            self.dispatcher.shutdown()
+
+    def load(self) -> dict:
+        """当前负载：忙碌线程数、排队任务数、连接数"""
+        return {
+            "busy": self.dispatcher.active_count,
+            "queued": len(self.dispatcher.queue),
+            "connections": sum(1 for obj in list(self._map.values()) if isinstance(obj, HTTPChannel)),
+        }
+
+    def drain(self, timeout: float) -> None:
+        """开始优雅排空（可在任意线程调用，重复调用无效）"""
+        if self._draining.is_set():
+            return
+        self._draining.set()
+        threading.Thread(target=self._drain, args=(timeout,), name="WorkerDrain", daemon=True).start()
+
+    def _drain(self, timeout: float) -> None:
+        started = time.monotonic()
+        self._trigger.pull_trigger(self._stop_accepting)
+        while time.monotonic() - started < timeout:
+            self._trigger.pull_trigger(self._close_idle_channels)
+            if not any(isinstance(obj, HTTPChannel) for obj in list(self._map.values())):
+                break
+            time.sleep(0.05)
+        else:
+            logError(f"❌ 排空超时（{timeout}秒），强制关闭剩余连接")
+        logInfo(f"✅ 排空完成，耗时 {time.monotonic() - started:.2f} 秒")
+        try:
+            self._trigger.pull_trigger(self._close_all)
+        except OSError:
+            # pull_trigger 先登记回调再写管道：主循环可能已被上一次唤醒并执行了 _close_all（管道随之关闭）
+            pass
+
+    def _stop_accepting(self) -> None:
+        for listener in self._listeners:
+            listener.accepting = False
+            listener.del_channel()
+
+    def _close_idle_channels(self) -> None:
+        """关闭空闲连接：没有待处理/解析中的请求、没有待发送数据，且已完成过响应（或建立后一直没有数据）"""
+        now = time.time()
+        for obj in list(self._map.values()):
+            if (isinstance(obj, HTTPChannel)
+                    and not obj.requests
+                    and obj.request is None
+                    and not obj.total_outbufs_len
+                    and (obj.last_activity > obj.creation_time or now - obj.creation_time >= FRESH_CONNECTION_GRACE)):
+                obj.will_close = True
+
+    def _close_all(self) -> None:
+        for obj in list(self._map.values()):
+            try:
+                obj.close()
+            except OSError:
+                pass
+        self._map.clear()
+
+
+class RequestCounter:
+    """WSGI包装：统计本进程处理的请求数，达到上限后置位 limit_reached（由控制线程通知主进程）"""
+
+    def __init__(self, app, limit: int):
+        self.app = app
+        self.limit = limit
+        self.limit_reached = threading.Event()
+        self._counter = itertools.count(1)  # next() 在 GIL 下是原子的，无需加锁
+        self.count = 0
+
+    def __call__(self, environ, start_response):
+        self.count = next(self._counter)
+        if self.count >= self.limit:
+            self.limit_reached.set()
+        return self.app(environ, start_response)
+
+
+def check_ready(app, path: str) -> None:
+    """
+    进程内自检：不经过网络直接调用WSGI应用（监听套接字由所有子进程共享，走网络可能落到别的进程上）
+    :raise RuntimeError: 返回非 2xx
+    """
+    from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+    builder = EnvironBuilder(path=path)
+    try:
+        body, status, _ = run_wsgi_app(app, builder.get_environ(), buffered=True)
+        if hasattr(body, "close"):
+            body.close()
+    finally:
+        builder.close()
+    if not status.startswith("2"):
+        raise RuntimeError(f"就绪自检失败：GET {path} → {status}")
+
+
+def format_stacks() -> str:
+    """当前进程所有线程的Python调用栈"""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    parts = []
+    for ident, frame in sys._current_frames().items():
+        parts.append(f"--- 线程 {names.get(ident, '?')}（{ident}）---\n" + "".join(traceback.format_stack(frame)))
+    return "\n".join(parts)
+
+
+def serve_worker(app, control_conn=None, report_interval: float = 1.0, drain_timeout: float = 30.0,
+                 max_requests: int = 0, max_requests_jitter: int = 0, ready_check_path: str = "",
+                 scoreboard: Optional[Scoreboard] = None, scoreboard_row: int = 0, profile_role: str = "子进程",
+                 **adjustments) -> None:
+    """
+    运行Waitress服务直到退出
+    :param ready_check_path: 开始监听前在进程内请求的自检路径（如 /health，空表示不检查）；失败时抛出异常，进程以非0退出
+    :param control_conn: 与主进程的控制管道（None 表示独立运行，不上报负载也不响应排空）
+    :param report_interval: 负载上报间隔（秒）
+    :param drain_timeout: 收到排空指令后等待在途请求的最长时间（秒）
+    :param max_requests: 处理多少个请求后请求回收本进程（0 表示不限制）
+    :param max_requests_jitter: 上限额外加 [0, jitter] 的随机数，避免同时启动的进程同时回收
+    :param scoreboard: 共享内存记分板（None 表示不记录），本进程各线程写入第 scoreboard_row 行
+    :param profile_role: 开启启动耗时分析时报告中的进程名称
+    """
+    profile = startup_profile.current()
+    phase_started = time.perf_counter()
+    if ready_check_path:
+        check_ready(app, ready_check_path)
+        if profile is not None:
+            profile.mark("就绪自检（首次请求预热）", time.perf_counter() - phase_started)
+    counter = None
+    if max_requests > 0 and control_conn is not None:
+        counter = app = RequestCounter(app, max_requests + random.randint(0, max(max_requests_jitter, 0)))
+    # 分发器记录每个请求的排队时长（准入控制据此拒绝排队过久的请求），开启记分板时同时写入线程状态
+    dispatcher = ScoreboardDispatcher(scoreboard, scoreboard_row) if scoreboard is not None else TimedDispatcher()
+    phase_started = time.perf_counter()
+    if profile is not None:
+        # 第一个请求到达时输出本进程的启动耗时报告
+        app = startup_profile.FirstRequestProbe(app, profile, profile_role, logInfo)
+    server = GracefulServer(app, dispatcher=dispatcher, **adjustments)
+    if profile is not None:
+        profile.mark("创建Waitress服务", time.perf_counter() - phase_started)
+    if control_conn is not None:
+        threading.Thread(
+            target=_control_loop,
+            args=(server, control_conn, report_interval, drain_timeout, counter),
+            name="WorkerControl",
+            daemon=True
+        ).start()
+    server.run()
+
+
+def _control_loop(server: GracefulServer, conn, report_interval: float, drain_timeout: float,
+                  counter: Optional[RequestCounter]) -> None:
+    recycle_requested = False
+    try:
+        conn.send((MSG_READY, None))
+        while True:
+            if conn.poll(report_interval):
+                message: Optional[tuple] = conn.recv()
+                if message[0] == MSG_DRAIN:
+                    logInfo("🚰 收到排空指令，停止接收新连接")
+                    server.drain(drain_timeout)
+                elif message[0] == MSG_DUMP_STACKS:
+                    logError(f"🧵 主进程判定本进程卡死（{message[1]}），各线程调用栈：\n{format_stacks()}")
+            else:
+                conn.send((MSG_LOAD, server.load()))
+            if counter is not None and counter.limit_reached.is_set() and not recycle_requested:
+                recycle_requested = True
+                logInfo(f"♻️ 已处理 {counter.count} 个请求（上限 {counter.limit}），请求回收本进程")
+                conn.send((MSG_RECYCLE, f"max_requests={counter.limit}"))
+    except (EOFError, OSError):
+        # 主进程已退出/管道关闭：排空后退出，不留下无人管理的子进程
+        server.drain(drain_timeout)
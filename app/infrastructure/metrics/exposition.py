@@ -0,0 +1,139 @@
+# /metrics 输出：汇总快照目录中各子进程的请求指标与主进程的资源采样，渲染为 Prometheus 文本格式
+import json
+import os
+from typing import Iterable, Optional
+
+from app.infrastructure.metrics.registry import LATENCY_BUCKETS, MASTER_SNAPSHOT, RequestMetrics
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (主进程资源采样字段, 指标名, 类型, 说明)
+_WORKER_GAUGES = (
+    ("cpu_percent", "blog_worker_cpu_percent", "gauge", "子进程CPU占用（两次采样之间的平均值）"),
+    ("rss_bytes", "blog_worker_resident_memory_bytes", "gauge", "子进程常驻内存"),
+    ("threads", "blog_worker_threads", "gauge", "子进程线程数"),
+    ("open_fds", "blog_worker_open_fds", "gauge", "子进程打开的文件描述符（Windows为句柄）数"),
+    ("uptime_seconds", "blog_worker_uptime_seconds", "gauge", "子进程已运行时长"),
+    ("restarts", "blog_worker_restarts_total", "counter", "槽位上子进程被重建的次数"),
+)
+# (主进程配置快照字段, 指标名, 说明)
+_CONFIG_GAUGES = (
+    ("workers_serving", "blog_workers_serving", "当前在服务的Waitress子进程数（不含排空中的）"),
+    ("min_workers", "blog_config_min_workers", "自动扩缩容下限"),
+    ("max_workers", "blog_config_max_workers", "自动扩缩容上限"),
+    ("threads", "blog_config_waitress_threads", "每个子进程的Waitress工作线程数"),
+    ("connection_limit", "blog_config_waitress_connection_limit", "每个子进程的最大连接数"),
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def load_snapshots(snapshot_dir: str) -> tuple[Optional[dict], list[dict]]:
+    """读取快照目录：返回 (主进程快照, 子进程快照列表)，损坏/正在替换的文件直接跳过"""
+    master, workers = None, []
+    try:
+        names = os.listdir(snapshot_dir)
+    except OSError:
+        return master, workers
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(snapshot_dir, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if name == MASTER_SNAPSHOT:
+            master = data
+        else:
+            workers.append(data)
+    return master, workers
+
+
+def render_metrics(local: RequestMetrics) -> str:
+    """
+    渲染 /metrics 文本
+    :param local: 当前进程的指标（当前进程的数据直接取内存中的最新值，其余子进程取快照文件）
+    """
+    master, workers = (None, [])
+    if local.snapshot_dir is not None:
+        master, workers = load_snapshots(local.snapshot_dir)
+    workers = [w for w in workers if w.get("worker") != local.worker_id]
+    workers.append(local.snapshot())
+    workers.sort(key=lambda w: str(w.get("worker")))
+
+    lines: list[str] = []
+    lines.extend(_request_lines(workers))
+    if master is not None:
+        lines.extend(_master_lines(master))
+    return "\n".join(lines) + "\n"
+
+
+def _request_lines(workers: list[dict]) -> Iterable[str]:
+    yield "# HELP blog_http_requests_in_flight 正在处理的请求数"
+    yield "# TYPE blog_http_requests_in_flight gauge"
+    for w in workers:
+        yield f"blog_http_requests_in_flight{_labels(worker=w.get('worker'))} {w.get('in_flight', 0)}"
+
+    yield "# HELP blog_http_requests_total 已完成的请求数"
+    yield "# TYPE blog_http_requests_total counter"
+    for w in workers:
+        for method, route, status, count, *_ in w.get("series", []):
+            labels = _labels(worker=w.get("worker"), method=method, route=route, status=status)
+            yield f"blog_http_requests_total{labels} {count}"
+
+    yield "# HELP blog_http_request_duration_seconds 请求处理耗时"
+    yield "# TYPE blog_http_request_duration_seconds histogram"
+    for w in workers:
+        for method, route, status, count, total, *buckets in w.get("series", []):
+            base = dict(worker=w.get("worker"), method=method, route=route, status=status)
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, buckets):
+                cumulative += n
+                yield f"blog_http_request_duration_seconds_bucket{_labels(**base, le=bound)} {cumulative}"
+            yield f"blog_http_request_duration_seconds_bucket{_labels(**base, le='+Inf')} {count}"
+            yield f"blog_http_request_duration_seconds_sum{_labels(**base)} {_format(float(total))}"
+            yield f"blog_http_request_duration_seconds_count{_labels(**base)} {count}"
+
+    yield "# HELP blog_admission_shed_total 准入控制拒绝（返回503）的请求数"
+    yield "# TYPE blog_admission_shed_total counter"
+    for w in workers:
+        for reason, count in sorted(w.get("shed", {}).items()):
+            yield f"blog_admission_shed_total{_labels(worker=w.get('worker'), reason=reason)} {count}"
+
+
+def _master_lines(master: dict) -> Iterable[str]:
+    samples = master.get("workers", [])
+    for field, name, kind, help_text in _WORKER_GAUGES:
+        yield f"# HELP {name} {help_text}"
+        yield f"# TYPE {name} {kind}"
+        for sample in samples:
+            if sample.get(field) is not None:
+                # 计数器跨进程重建累计，不带 pid 标签
+                labels = (_labels(worker=sample.get("worker")) if kind == "counter"
+                          else _labels(worker=sample.get("worker"), pid=sample.get("pid")))
+                yield f"{name}{labels} {_format(sample[field])}"
+
+    config = master.get("config", {})
+    for field, name, help_text in _CONFIG_GAUGES:
+        if field in config:
+            yield f"# HELP {name} {help_text}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {config[field]}"
+
+    yield "# HELP blog_metrics_sample_timestamp_seconds 主进程最近一次资源采样时间"
+    yield "# TYPE blog_metrics_sample_timestamp_seconds gauge"
+    yield f"blog_metrics_sample_timestamp_seconds {_format(float(master.get('time', 0)))}"
@@ -0,0 +1,35 @@
+# WSGI指标中间件：包在 Flask 应用外层，记录每个请求的路由、状态码与处理耗时
+import time
+
+from app.infrastructure.metrics.registry import ROUTE_ENVIRON_KEY, ROUTE_UNMATCHED, RequestMetrics
+
+
+class MetricsMiddleware:
+    """
+    用法：app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics)
+    - 耗时为应用返回响应对象为止（不含流式发送大文件/慢客户端读取的时间）；
+    - 路由标签取自 Flask 匹配到的规则（如 /<path:path>），避免按原始URL产生无限多的序列。
+    """
+
+    def __init__(self, wsgi_app, metrics: RequestMetrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        status_holder = []
+
+        def _start_response(status, headers, exc_info=None):
+            status_holder.append(status)
+            return start_response(status, headers, exc_info)
+
+        started = time.perf_counter()
+        self.metrics.begin()
+        try:
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            self.metrics.observe(
+                environ.get("REQUEST_METHOD", "GET"),
+                environ.get(ROUTE_ENVIRON_KEY, ROUTE_UNMATCHED),
+                status_holder[-1][:3] if status_holder else "500",
+                time.perf_counter() - started
+            )
@@ -0,0 +1,121 @@
+# 请求指标：每个Waitress子进程在内存中累计各路由的请求数与耗时直方图，定期写入快照文件，由 /metrics 汇总
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional
+
+from utils.logger import logError
+
+# 耗时直方图分桶上界（秒），最后隐含 +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 请求未匹配任何路由时的路由标签
+ROUTE_UNMATCHED = "<unmatched>"
+# Flask 在 before_request 中把匹配到的路由规则写入 environ 的这个键
+ROUTE_ENVIRON_KEY = "blog.metrics.route"
+# 主进程资源采样快照文件名（子进程为 worker-<槽位>.json）
+MASTER_SNAPSHOT = "master.json"
+
+
+def worker_snapshot_name(worker_id) -> str:
+    return f"worker-{worker_id}.json"
+
+
+def write_snapshot(path: str, data: dict) -> None:
+    """原子写入快照：先写临时文件再替换，读取方不会读到半个文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class RequestMetrics:
+    """
+    单个进程内的请求指标：
+    - 按 (方法, 路由, 状态码) 累计请求数、耗时总和与各分桶计数；
+    - 记录当前正在处理的请求数（in-flight）与准入控制按原因拒绝的请求数；
+    - bind_worker 后由后台线程每 flush_interval 秒把快照写入 snapshot_dir。
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, flush_interval: float = 1.0):
+        """
+        :param snapshot_dir: 快照目录（None 表示只在进程内统计，/metrics 只输出本进程数据）
+        :param flush_interval: 快照写入间隔（秒）
+        """
+        self.snapshot_dir = snapshot_dir
+        self.flush_interval = flush_interval
+        self.worker_id = None
+        self._lock = threading.Lock()
+        # (方法, 路由, 状态码) → [请求数, 耗时总和, 分桶1计数, ..., +Inf计数]
+        self._series: dict[tuple[str, str, str], list] = {}
+        self._in_flight = 0
+        self._shed: dict[str, int] = {}  # 拒绝原因 → 请求数
+        self._writer: Optional[threading.Thread] = None
+
+    def begin(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def observe(self, method: str, route: str, status: str, seconds: float) -> None:
+        """记录一个已完成的请求（与 begin 成对调用）"""
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        key = (method, route, status)
+        with self._lock:
+            self._in_flight -= 1
+            values = self._series.get(key)
+            if values is None:
+                values = self._series[key] = [0, 0.0] + [0] * (len(LATENCY_BUCKETS) + 1)
+            values[0] += 1
+            values[1] += seconds
+            values[2 + bucket] += 1
+
+    def shed(self, reason: str) -> None:
+        """记录一个被准入控制拒绝的请求（AdmissionMiddleware 的 on_shed 回调）"""
+        with self._lock:
+            self._shed[reason] = self._shed.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        """当前计数的快照（分桶为非累计计数，输出时再累加）"""
+        with self._lock:
+            series = [[*key, *values] for key, values in self._series.items()]
+            in_flight = self._in_flight
+            shed = dict(self._shed)
+        return {
+            "worker": self.worker_id,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "in_flight": in_flight,
+            "series": series,
+            "shed": shed,
+        }
+
+    def bind_worker(self, worker_id) -> None:
+        """
+        子进程启动时调用：清空计数（fork 模式下继承自主进程的预加载应用）并启动快照写入线程
+        :param worker_id: 子进程槽位编号（同一槽位的新进程覆盖旧进程的快照）
+        """
+        with self._lock:
+            self._series = {}
+            self._in_flight = 0
+            self._shed = {}
+        self.worker_id = worker_id
+        if self.snapshot_dir is None:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name="MetricsWriter", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        path = os.path.join(self.snapshot_dir, worker_snapshot_name(self.worker_id))
+        failed = False
+        while True:
+            try:
+                write_snapshot(path, self.snapshot())
+                failed = False
+            except OSError as e:
+                # 连续失败只记录一次
+                if not failed:
+                    logError(f"❌ 写入指标快照失败：{path} → {e}")
+                failed = True
+            time.sleep(self.flush_interval)
@@ -0,0 +1,78 @@
+# 后台重新渲染：渲染器升级（RENDERER_KEY 变化）后，主进程用进程池把所有文章重新渲染一遍，不影响子进程服务请求
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.infrastructure.db.rendered_html import RenderedHtmlStore
+from app.infrastructure.render.renderer import RENDERER_KEY, render_many
+from utils.logger import logError, logInfo
+
+
+class RenderRebuilder:
+    """
+    - 每轮取出 batch_size × processes 篇没有当前渲染结果的文章，分块交给进程池渲染，结果在一个事务中写回；
+    - 按文章 id 递增推进，渲染失败的文章不会被反复取出；
+    - 全部完成后删除旧渲染器的结果；重建期间子进程遇到未渲染的文章会就地渲染（见 RenderedHtmlStore.html）。
+    """
+
+    def __init__(self, store: RenderedHtmlStore, mp_context, processes: int = 0, batch_size: int = 50):
+        """
+        :param mp_context: 进程池使用的 multiprocessing 上下文（与子进程启动方式一致）
+        :param processes: 进程数（0 表示 CPU 核数）
+        """
+        self.store = store
+        self.mp_context = mp_context
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="RenderRebuilder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            pending = self.store.count_unrendered()
+            if pending == 0:
+                purged = self.store.purge_stale()
+                if purged:
+                    logInfo(f"🧹 已删除 {purged} 条旧渲染器的HTML")
+                return
+            self._rebuild(pending)
+        except Exception as e:
+            logError(f"❌ 后台重新渲染失败：{e}")
+        finally:
+            self.store.db.close()
+
+    def _rebuild(self, pending: int) -> None:
+        logInfo(f"🖨️ 渲染器 {RENDERER_KEY}：{pending} 篇文章待渲染，开始后台重新渲染")
+        started = time.perf_counter()
+        done = 0
+        last_id = 0
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context) as pool:
+            while not self._stop.is_set():
+                rows = self.store.unrendered(last_id, self.batch_size * self.processes)
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                chunks = [
+                    [(digest, content) for _, digest, content in rows[i:i + self.batch_size]]
+                    for i in range(0, len(rows), self.batch_size)
+                ]
+                rendered = [item for chunk in pool.map(render_many, chunks) for item in chunk]
+                self.store.store_many(rendered)
+                done += len(rendered)
+        if self._stop.is_set():
+            logInfo(f"⏹️ 后台重新渲染已中止：完成 {done}/{pending} 篇，下次启动时继续")
+            return
+        purged = self.store.purge_stale()
+        logInfo(f"✅ 后台重新渲染完成：{done} 篇，耗时 {time.perf_counter() - started:.1f} 秒，"
+                f"删除旧渲染器的HTML {purged} 条")
@@ -0,0 +1,146 @@
+# Markdown 渲染：安装了 markdown 库时使用它，否则使用内置的简化渲染器；输出统一经过白名单清洗
+# 渲染结果按 (正文哈希, RENDERER_KEY) 保存，发布时渲染一次，之后的请求只做查找
+import hashlib
+import html
+import re
+
+from app.infrastructure.render.sanitize import sanitize
+
+try:
+    import markdown as markdown_lib  # 可选依赖，未安装时使用内置渲染器
+except ImportError:
+    markdown_lib = None
+
+# 渲染/清洗规则变化时递增：已保存的HTML全部失效，由主进程在后台重新渲染
+RENDERER_VERSION = 1
+# 渲染结果的键：规则版本 + 实际使用的渲染器（安装/升级 markdown 库后同样触发重新渲染）
+RENDERER_KEY = f"v{RENDERER_VERSION}:" + (f"markdown-{markdown_lib.__version__}" if markdown_lib else "builtin")
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render(text: str) -> str:
+    """Markdown → 清洗后的HTML"""
+    if markdown_lib is not None:
+        markup = markdown_lib.markdown(text, extensions=MARKDOWN_EXTENSIONS, output_format="html")
+    else:
+        markup = render_builtin(text)
+    return sanitize(markup)
+
+
+def render_many(items: list) -> list:
+    """进程池任务：[(正文哈希, 正文)] → [(正文哈希, HTML)]（模块级函数，可被子进程导入执行）"""
+    return [(digest, render(text)) for digest, text in items]
+
+
+# ---------- 内置渲染器 ----------
+# 支持：标题、段落、围栏代码块、引用、无序/有序列表、分隔线、行内代码、粗体、斜体、删除线、链接、图片
+_FENCE = re.compile(r"^(```|~~~)\s*([\w+#.-]*)\s*$")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_HR = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+_UL_ITEM = re.compile(r"^\s{0,3}[-*+]\s+(.*)$")
+_OL_ITEM = re.compile(r"^\s{0,3}\d{1,9}[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s{0,3}>\s?(.*)$")
+
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)(?:\s+&quot;(.*?)&quot;)?\)")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)(?:\s+&quot;(.*?)&quot;)?\)")
+_AUTOLINK = re.compile(r"&lt;(https?://[^\s&]+)&gt;")
+_STRONG = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_EM = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+_DEL = re.compile(r"~~(?=\S)(.+?)(?<=\S)~~")
+
+
+def _title_attr(title) -> str:
+    return f' title="{title}"' if title else ""
+
+
+def _inline_text(text: str) -> str:
+    text = html.escape(text)
+    text = _IMAGE.sub(lambda m: f'<img src="{m[2]}" alt="{m[1]}"{_title_attr(m[3])}>', text)
+    text = _LINK.sub(lambda m: f'<a href="{m[2]}"{_title_attr(m[3])}>{m[1]}</a>', text)
+    text = _AUTOLINK.sub(r'<a href="\1">\1</a>', text)
+    text = _STRONG.sub(r"<strong>\2</strong>", text)
+    text = _EM.sub(r"<em>\2</em>", text)
+    return _DEL.sub(r"<del>\1</del>", text)
+
+
+def _inline(text: str) -> str:
+    # 行内代码中的内容原样输出，不参与其他行内语法
+    out = []
+    last = 0
+    for match in _CODE_SPAN.finditer(text):
+        out.append(_inline_text(text[last:match.start()]))
+        out.append(f"<code>{html.escape(match.group(2).strip())}</code>")
+        last = match.end()
+    out.append(_inline_text(text[last:]))
+    # 行尾两个空格 → 换行
+    return "".join(out).replace("  \n", "<br>\n")
+
+
+def render_builtin(text: str) -> str:
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    out = []
+    paragraph = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{_inline(chr(10).join(paragraph))}</p>")
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE.match(line)
+        if fence:
+            flush_paragraph()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            language = f' class="language-{fence.group(2)}"' if fence.group(2) else ""
+            out.append(f"<pre><code{language}>{html.escape(chr(10).join(code))}\n</code></pre>")
+            i += 1
+            continue
+        if not line.strip():
+            flush_paragraph()
+            i += 1
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+        if _HR.match(line):
+            flush_paragraph()
+            out.append("<hr>")
+            i += 1
+            continue
+        if _QUOTE.match(line):
+            flush_paragraph()
+            quoted = []
+            while i < len(lines) and lines[i].strip() and _QUOTE.match(lines[i]):
+                quoted.append(_QUOTE.match(lines[i]).group(1))
+                i += 1
+            out.append(f"<blockquote>\n{render_builtin(chr(10).join(quoted))}\n</blockquote>")
+            continue
+        for pattern, tag in ((_UL_ITEM, "ul"), (_OL_ITEM, "ol")):
+            if pattern.match(line):
+                flush_paragraph()
+                items = []
+                while i < len(lines) and pattern.match(lines[i]):
+                    items.append(f"<li>{_inline(pattern.match(lines[i]).group(1))}</li>")
+                    i += 1
+                out.append(f"<{tag}>\n" + "\n".join(items) + f"\n</{tag}>")
+                break
+        else:
+            paragraph.append(line)
+            i += 1
+    flush_paragraph()
+    return "\n".join(out)
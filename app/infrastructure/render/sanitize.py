@@ -0,0 +1,97 @@
+# HTML 白名单清洗：只保留 Markdown 会生成的标签和属性，其余标签去掉（保留文字），script/style 连同内容删除
+import html
+import re
+from html.parser import HTMLParser
+
+ALLOWED_TAGS = frozenset({
+    "a", "abbr", "b", "blockquote", "br", "code", "del", "em", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i",
+    "img", "kbd", "li", "ol", "p", "pre", "s", "strong", "sub", "sup", "table", "tbody", "td", "th", "thead",
+    "tr", "ul",
+})
+VOID_TAGS = frozenset({"br", "hr", "img"})
+# 连同内容一起删除的标签
+DROP_CONTENT_TAGS = frozenset({"script", "style", "iframe", "object", "embed", "template", "noscript"})
+ALLOWED_ATTRS = {
+    "a": frozenset({"href", "title"}),
+    "img": frozenset({"src", "alt", "title"}),
+    "abbr": frozenset({"title"}),
+    "code": frozenset({"class"}),
+    "td": frozenset({"align"}),
+    "th": frozenset({"align"}),
+}
+URL_ATTRS = frozenset({"href", "src"})
+# 链接允许的协议；图片不允许 mailto
+_SAFE_SCHEMES = {"href": ("http", "https", "mailto"), "src": ("http", "https")}
+_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+_CONTROL = re.compile(r"[\x00-\x20\x7f]+")
+_CODE_CLASS = re.compile(r"^language-[\w+#.-]+$")
+
+
+def safe_url(value: str, attr: str) -> bool:
+    """相对地址、锚点或白名单协议（浏览器会忽略协议名中的空白/控制字符，判断前先去掉）"""
+    match = _SCHEME.match(_CONTROL.sub("", value))
+    return match is None or match.group(1).lower() in _SAFE_SCHEMES[attr]
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.dropping = 0  # 位于需要删除内容的标签内的层数
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRS.get(tag, ())
+        parts = [tag]
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRS and not safe_url(value, name):
+                continue
+            if name == "class" and not _CODE_CLASS.match(value):
+                continue
+            parts.append(f'{name}="{html.escape(value)}"')
+        self.out.append(f"<{' '.join(parts)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # <p/> 之类的自闭合写法：立即闭合
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # 自动闭合中间未闭合的标签，保证输出的标签嵌套正确
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self) -> str:
+        self.close()
+        while self.open_tags:
+            self.out.append(f"</{self.open_tags.pop()}>")
+        return "".join(self.out)
+
+
+def sanitize(markup: str) -> str:
+    """清洗 HTML 片段：注释、未知标签、事件属性、javascript:/data: 链接都会被去掉"""
+    parser = _Sanitizer()
+    parser.feed(markup)
+    return parser.result()
@@ -0,0 +1,140 @@
+# 前端静态资源内存缓存（LRU + 字节预算 + ETag/304），替代每次请求的 exists/isfile/send_file
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Response
+from werkzeug.http import http_date, is_resource_modified
+from werkzeug.utils import get_content_type
+
+from app.infrastructure.static.compress import is_compressible
+from app.infrastructure.static.index import FileMeta
+from app.infrastructure.static.ranges import make_file_response
+from utils.lru import LRUCache
+
+
+@dataclass(frozen=True, slots=True)
+class StaticEntry:
+    """缓存条目：文件内容 + 预先计算好的响应头"""
+    path: str
+    size: int
+    mtime_ns: int
+    etag: str
+    last_modified: datetime
+    headers: tuple
+    # 超过单文件上限的大文件不缓存内容（body=None），仅缓存元数据用于304判断
+    body: Optional[bytes] = None
+
+
+class StaticFileCache:
+    """
+    静态文件缓存：
+    - 按目录索引中的元数据（mtime/size）查找，命中时无需任何系统调用；
+    - 索引发现文件 mtime 或 size 变化后条目自动失效重建（预压缩版本按 (路径, 编码) 分别缓存）；
+    - 支持 If-None-Match / If-Modified-Since，直接返回304。
+    """
+
+    # 条目元数据的估算开销（字节），避免大量小文件时字节预算失真
+    ENTRY_OVERHEAD = 512
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_file_bytes: int = 1024 * 1024):
+        """
+        :param max_bytes: 缓存总字节预算
+        :param max_file_bytes: 单文件可缓存内容的上限，超过则视为大文件，从磁盘流式发送（支持Range）
+        """
+        self.max_file_bytes = max_file_bytes
+        self._lru = LRUCache(max_bytes=max_bytes)
+
+    def get(self, meta: FileMeta, encoding: Optional[str] = None) -> Optional[StaticEntry]:
+        """
+        按目录索引中的元数据查找（命中时零系统调用，由索引刷新负责发现文件变化）
+        :param encoding: meta 为预压缩文件时传入其 Content-Encoding（gzip/br）
+        """
+        key = meta.path if encoding is None else (meta.path, encoding)
+        entry = self._lru.get(key)
+        if entry is not None and entry.mtime_ns == meta.mtime_ns and entry.size == meta.size:
+            return entry
+        return self._load(meta.path, meta.size, encoding)
+
+    def _load(self, path: str, size: int, encoding: Optional[str] = None) -> Optional[StaticEntry]:
+        body = None
+        if size <= self.max_file_bytes:
+            try:
+                with open(path, "rb") as f:
+                    # 以打开后的 fstat 为准，避免 stat 与读取之间文件被替换
+                    st = os.fstat(f.fileno())
+                    body = f.read()
+            except OSError:
+                return None
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        else:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            # 大文件不读取内容，ETag 由 mtime+size 生成
+            etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+        last_modified = datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc)
+        # 预压缩文件（a.js.gz）的 Content-Type 取原始文件（a.js）的类型
+        source_path = os.path.splitext(path)[0] if encoding is not None else path
+        mimetype = mimetypes.guess_type(source_path)[0] or "application/octet-stream"
+        headers = [
+            ("Content-Type", get_content_type(mimetype, "utf-8")),
+            ("ETag", f'"{etag}"'),
+            ("Last-Modified", http_date(last_modified)),
+        ]
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+        # 可压缩资源的响应内容随 Accept-Encoding 变化，需告知缓存/CDN
+        if is_compressible(source_path):
+            headers.append(("Vary", "Accept-Encoding"))
+        entry = StaticEntry(
+            path=os.path.abspath(path),
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            etag=etag,
+            last_modified=last_modified,
+            headers=tuple(headers),
+            body=body,
+        )
+        key = path if encoding is None else (path, encoding)
+        self._lru.put(key, entry, (len(body) if body is not None else 0) + self.ENTRY_OVERHEAD)
+        return entry
+
+    @staticmethod
+    def make_response(entry: StaticEntry, environ: dict, cache_control: Optional[str] = None) -> Response:
+        """
+        根据条件请求头生成 304 或完整响应
+        :param cache_control: 需要附加的 Cache-Control 头（None 表示不设置）
+        """
+        if not is_resource_modified(environ, etag=entry.etag, last_modified=entry.last_modified):
+            # 304 不带 Content-Type/Content-Length，只回传校验头
+            response = Response(status=304, headers=entry.headers[1:])
+        else:
+            # 完整内容或 Range 分段（未缓存内容的大文件经 wsgi.file_wrapper 流式发送）
+            response = make_file_response(entry, environ)
+        if cache_control is not None:
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+
+def derive_entry(entry: StaticEntry, body: bytes, encoding: Optional[str] = None) -> StaticEntry:
+    """基于已有条目生成内容被改写后的新条目（沿用 Content-Type/Last-Modified，重新计算ETag）"""
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    headers = [entry.headers[0], ("ETag", f'"{etag}"'), entry.headers[2]]
+    if encoding is not None:
+        headers.append(("Content-Encoding", encoding))
+    headers.append(("Vary", "Accept-Encoding"))
+    return StaticEntry(
+        path=entry.path,
+        size=len(body),
+        mtime_ns=entry.mtime_ns,
+        etag=etag,
+        last_modified=entry.last_modified,
+        headers=tuple(headers),
+        body=body,
+    )
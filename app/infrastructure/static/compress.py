@@ -0,0 +1,121 @@
+# 前端资源预压缩（构建期生成 .gz/.br 兄弟文件）+ 请求时按 Accept-Encoding 选择压缩版本
+import gzip
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from werkzeug.http import parse_accept_header
+
+from app.infrastructure.static.index import FileMeta, FrontendIndex
+
+try:
+    import brotli  # 可选依赖，未安装时只生成 .gz
+except ImportError:
+    brotli = None
+
+# 值得压缩的文本类资源（图片/字体/视频等本身已压缩，不处理）
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    ".html", ".htm", ".js", ".mjs", ".css", ".json", ".map", ".svg",
+    ".txt", ".xml", ".wasm", ".ico", ".webmanifest",
+})
+# 按优先级排列：(Content-Encoding, 文件后缀)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+@dataclass(slots=True)
+class PrecompressStats:
+    """预压缩结果统计"""
+    scanned: int = 0
+    written: int = 0
+    up_to_date: int = 0
+    skipped_not_smaller: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def _write_variant(src: str, dst: str, data: bytes, compressed: bytes, stats: PrecompressStats) -> None:
+    # 压缩后不变小 → 不生成（顺便清理旧的过期文件）
+    if len(compressed) >= len(data):
+        stats.skipped_not_smaller += 1
+        if os.path.exists(dst):
+            os.remove(dst)
+        return
+    tmp = dst + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp, dst)  # 原子替换，服务进程不会读到半个文件
+    # 与源文件保持相同 mtime，便于判断是否过期
+    st = os.stat(src)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    stats.written += 1
+    stats.bytes_before += len(data)
+    stats.bytes_after += len(compressed)
+
+
+def precompress_directory(root: str, min_size: int = 256, level: int = 9) -> PrecompressStats:
+    """
+    遍历前端目录，为可压缩资源生成 .gz（以及安装了 brotli 时的 .br）兄弟文件
+    :param root: 前端静态目录（pages/front）
+    :param min_size: 小于该字节数的文件不压缩（压缩收益抵不过头部开销）
+    :param level: gzip 压缩级别（构建期执行，默认最高压缩率）
+    :return: 统计信息
+    """
+    stats = PrecompressStats()
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not is_compressible(name):
+                continue
+            src = os.path.join(dirpath, name)
+            src_stat = os.stat(src)
+            if src_stat.st_size < min_size:
+                continue
+            src_mtime = src_stat.st_mtime_ns
+            stats.scanned += 1
+            data = None
+            for encoding, suffix in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                dst = src + suffix
+                # 已存在且与源文件 mtime 一致 → 无需重新压缩
+                if os.path.exists(dst) and os.stat(dst).st_mtime_ns == src_mtime:
+                    stats.up_to_date += 1
+                    continue
+                if data is None:
+                    with open(src, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    # mtime=0 保证相同内容产出相同字节（ETag 稳定）
+                    compressed = gzip.compress(data, compresslevel=level, mtime=0)
+                _write_variant(src, dst, data, compressed, stats)
+    return stats
+
+
+def negotiate_variant(
+        index: FrontendIndex,
+        url_path: str,
+        accept_encoding: str
+) -> tuple[Optional[FileMeta], Optional[str]]:
+    """
+    按 Accept-Encoding 选择预压缩版本
+    :return: (压缩文件元数据, Content-Encoding)，无可用版本时返回 (None, None)
+    """
+    if not accept_encoding or not is_compressible(url_path):
+        return None, None
+    # 先查索引确认存在压缩版本，再解析请求头（大多数资源只需几次字典查找）
+    candidates = [(encoding, meta) for encoding, suffix in ENCODINGS
+                  if (meta := index.get(url_path + suffix)) is not None]
+    if not candidates:
+        return None, None
+    accepted = parse_accept_header(accept_encoding)
+    best_meta, best_encoding, best_quality = None, None, 0.0
+    for encoding, meta in candidates:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best_meta, best_encoding, best_quality = meta, encoding, quality
+    return best_meta, best_encoding
@@ -0,0 +1,129 @@
+# 前端目录索引：启动时扫描一次 pages/front，请求时只做一次字典查找，无需任何文件系统调用
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.logger import logDebug, logError, logInfo
+
+
+def resolve_frontend_dir(frontend_config: dict) -> str:
+    """前端静态目录（FRONTEND_DIR/pages/front）：环境变量 FRONTEND_DIR 优先，其次 launch.yaml 的 frontend.dir"""
+    frontend_dir = os.getenv("FRONTEND_DIR") or frontend_config.get("dir", "./blog-frontend")
+    return os.path.join(frontend_dir, "pages", "front")
+
+
+# 后台刷新线程在运行的索引（弱引用：重新加载配置后旧索引可以被回收）；fork 出的子进程不会继承后台线程，
+# 由模块级的 at-fork 钩子统一重新启动（每个实例各注册一个钩子会永久持有实例，且无法注销）
+_watched: "weakref.WeakSet[FrontendIndex]" = weakref.WeakSet()
+
+
+def _restart_watchers_after_fork() -> None:
+    for index in list(_watched):
+        index._restart_watcher_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_watchers_after_fork)
+
+
+@dataclass(frozen=True, slots=True)
+class FileMeta:
+    """索引中的文件元数据"""
+    path: str  # 绝对路径
+    size: int
+    mtime_ns: int
+
+
+class FrontendIndex:
+    """
+    前端静态目录索引（URL路径 → 文件元数据）
+    - 构建时一次性扫描整个目录，之后由后台线程定期增量刷新；
+    - 刷新时先构建新字典再整体替换引用，请求线程读取无需加锁；
+    - 未命中直接走 index.html 兜底，不再触碰磁盘。
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 2.0):
+        """
+        :param root: 前端静态目录（如 blog-frontend/pages/front）
+        :param refresh_interval: 后台刷新间隔（秒），<=0 表示不启动后台刷新
+        """
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        self._files: dict[str, FileMeta] = {}
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.refresh()
+        logInfo(f"📂 前端目录索引完成：{self.root}，共 {len(self._files)} 个文件")
+        if refresh_interval > 0:
+            self.start_watcher()
+
+    def get(self, url_path: str) -> Optional[FileMeta]:
+        """按URL路径查找文件（未命中返回None）"""
+        return self._files.get(url_path)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def refresh(self) -> bool:
+        """重新扫描目录，返回索引是否发生变化"""
+        files = self._scan()
+        if files == self._files:
+            return False
+        self._files = files
+        return True
+
+    def _scan(self) -> dict[str, FileMeta]:
+        files: dict[str, FileMeta] = {}
+        if not os.path.isdir(self.root):
+            return files
+        # 用 scandir 手动递归：DirEntry 自带类型信息，目录判断无需额外 stat
+        pending = [(self.root, "")]
+        while pending:
+            directory, prefix = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        url_path = prefix + entry.name
+                        try:
+                            if entry.is_dir():
+                                pending.append((entry.path, url_path + "/"))
+                            elif entry.is_file():
+                                st = entry.stat()
+                                files[url_path] = FileMeta(entry.path, st.st_size, st.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logDebug(f"⚠️ 扫描前端目录失败：{directory} → {e}")
+        return files
+
+    def start_watcher(self) -> None:
+        """启动后台刷新线程（守护线程，随进程退出）"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="FrontendIndexWatcher", daemon=True)
+        self._watcher.start()
+        _watched.add(self)
+
+    def _restart_watcher_after_fork(self) -> None:
+        # fork 前已停止的索引（如重新加载配置后被替换的旧应用）不再重启
+        if self._stop_event.is_set():
+            _watched.discard(self)
+            return
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self.start_watcher()
+
+    def stop_watcher(self) -> None:
+        self._stop_event.set()
+        _watched.discard(self)
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                if self.refresh():
+                    logDebug(f"🔄 前端目录有变化，索引已刷新：{len(self._files)} 个文件")
+            except Exception as e:
+                logError(f"❌ 刷新前端目录索引失败：{e}")
@@ -0,0 +1,154 @@
+# 资源指纹清单：带内容哈希的URL长期缓存（immutable），index.html 保持短缓存并在输出时替换为指纹URL
+import gzip
+import json
+import posixpath
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from werkzeug.http import parse_accept_header
+
+from app.infrastructure.static.cache import StaticEntry, derive_entry
+from app.infrastructure.static.compress import ENCODINGS
+from app.infrastructure.static.index import FrontendIndex
+from utils.logger import logError, logInfo
+
+try:
+    import brotli  # 可选依赖，未安装时改写后的 index.html 只提供 gzip
+except ImportError:
+    brotli = None
+
+# 清单文件名（位于前端静态目录根下，由 temp.py manifest 生成）
+MANIFEST_NAME = "asset-manifest.json"
+# 带指纹的资源内容永不变化 → 浏览器/CDN 缓存一年且不再回源校验
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html 必须每次回源校验（配合ETag通常只是一次304）
+INDEX_CACHE_CONTROL = "no-cache"
+# 匹配 HTML 中的 src="..." / href="..." 引用
+_REF_PATTERN = re.compile(rb'((?:src|href)\s*=\s*["\'])(\.?/)?([^"\'?#]+)')
+
+
+def fingerprint_name(logical: str, digest: str) -> str:
+    """assets/app.js + 哈希 → assets/app.<哈希>.js"""
+    stem, ext = posixpath.splitext(logical)
+    return f"{stem}.{digest}{ext}"
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestAsset:
+    """清单中的单个资源"""
+    logical: str
+    fingerprinted: str
+    size: int
+    mtime_ns: int
+
+
+class AssetManifest:
+    """
+    运行时资源清单：
+    - 清单文件随前端目录索引刷新自动重新加载；
+    - 带指纹URL反查原始文件，文件未变化时返回 immutable 缓存头；
+    - index.html 中的资源引用改写为指纹URL，改写结果按 (index.html ETag, 清单版本) 缓存。
+    """
+
+    def __init__(self, index: FrontendIndex):
+        self._index = index
+        self._lock = threading.Lock()
+        self._manifest_key: Optional[tuple] = None
+        self._assets: dict[str, ManifestAsset] = {}
+        self._reverse: dict[str, ManifestAsset] = {}
+        self._rendered: dict[tuple, StaticEntry] = {}
+
+    def _refresh(self) -> None:
+        meta = self._index.get(MANIFEST_NAME)
+        key = (meta.mtime_ns, meta.size) if meta is not None else None
+        if key == self._manifest_key:
+            return
+        with self._lock:
+            if key == self._manifest_key:
+                return
+            assets: dict[str, ManifestAsset] = {}
+            if meta is not None:
+                try:
+                    with open(meta.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    for logical, item in data.get("assets", {}).items():
+                        assets[logical] = ManifestAsset(logical, item["file"], item["size"], item["mtime_ns"])
+                    logInfo(f"📜 加载资源清单：{meta.path}，共 {len(assets)} 个资源")
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    logError(f"❌ 资源清单解析失败：{meta.path} → {e}")
+            self._assets = assets
+            self._reverse = {asset.fingerprinted: asset for asset in assets.values()}
+            self._rendered = {}
+            self._manifest_key = key
+
+    def active(self) -> bool:
+        """当前是否存在可用的资源清单"""
+        self._refresh()
+        return bool(self._assets)
+
+    def resolve(self, url_path: str) -> Optional[tuple[str, bool]]:
+        """
+        带指纹URL → 原始文件路径
+        :return: (原始路径, 文件是否仍与清单一致)；不是指纹URL时返回None
+        """
+        self._refresh()
+        asset = self._reverse.get(url_path)
+        if asset is None:
+            return None
+        # 清单生成后文件又被修改 → 仍返回内容，但不能再声明 immutable
+        meta = self._index.get(asset.logical)
+        unchanged = meta is not None and meta.size == asset.size and meta.mtime_ns == asset.mtime_ns
+        return asset.logical, unchanged
+
+    def render_index(self, entry: StaticEntry, accept_encoding: str = "") -> StaticEntry:
+        """
+        返回资源引用已替换为指纹URL的 index.html 条目，按 Accept-Encoding 附带 br/gzip 版本
+        （内容已改写，磁盘上预压缩的 .br/.gz 不适用，改写后在内存中压缩一次并缓存）
+        """
+        if entry.body is None:
+            return entry
+        encoding = _negotiate_encoding(accept_encoding)
+        rendered = self._rendered.get((entry.etag, self._manifest_key, encoding))
+        if rendered is not None:
+            return rendered
+        # 多个Waitress线程同时未命中时只渲染一次，也不会并发替换缓存字典
+        with self._lock:
+            key = (entry.etag, self._manifest_key, encoding)
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                return rendered
+            assets = self._assets
+
+            def replace(match: re.Match) -> bytes:
+                asset = assets.get(match.group(3).decode("utf-8", "replace"))
+                if asset is None:
+                    return match.group(0)
+                return match.group(1) + (match.group(2) or b"") + asset.fingerprinted.encode("utf-8")
+
+            body = _REF_PATTERN.sub(replace, entry.body)
+            if encoding == "br":
+                body = brotli.compress(body, quality=11)
+            elif encoding == "gzip":
+                body = gzip.compress(body, mtime=0)
+            rendered = derive_entry(entry, body, encoding)
+            # 只保留当前版本（index.html 或清单变化后旧结果自然作废）
+            self._rendered = {k: v for k, v in self._rendered.items() if k[:2] == key[:2]}
+            self._rendered[key] = rendered
+        return rendered
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """与 negotiate_variant 相同的选择规则：质量值最高者优先，相同时 br 优先；都不接受时返回 None"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    best_encoding, best_quality = None, 0.0
+    for encoding, _ in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
@@ -0,0 +1,157 @@
+# 大文件流式发送 + Range 断点续传（单段/多段 206），优先交给服务器的 wsgi.file_wrapper
+import uuid
+from typing import Iterator, Optional
+
+from flask import Response, abort
+from werkzeug.http import parse_if_range_header, parse_range_header
+
+# 单个请求最多允许的区间数（防止构造海量小区间消耗服务器资源）
+MAX_RANGES = 16
+# 流式读取块大小（慢客户端最多占用一个块的内存）
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_ranges(header: str, length: int) -> Optional[list[tuple[int, int]]]:
+    """
+    解析 Range 头
+    :return: [(start, end_exclusive), ...]；None 表示忽略 Range 按 200 处理；[] 表示无法满足（416）
+    """
+    rng = parse_range_header(header)
+    if rng is None or rng.units != "bytes" or len(rng.ranges) > MAX_RANGES:
+        return None
+    ranges = []
+    for start, stop in rng.ranges:
+        if start < 0:
+            # bytes=-N：最后N个字节
+            start, stop = max(length + start, 0), length
+        else:
+            stop = length if stop is None else min(stop, length)
+        if start < stop:
+            ranges.append((start, stop))
+    # 合并重叠/相邻区间，避免重复读取
+    ranges.sort()
+    merged: list[tuple[int, int]] = []
+    for start, stop in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def if_range_matches(environ: dict, etag: str, last_modified) -> bool:
+    """If-Range 校验：资源已变化时必须忽略 Range 返回完整内容"""
+    header = environ.get("HTTP_IF_RANGE")
+    if not header:
+        return True
+    if_range = parse_if_range_header(header)
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return if_range.date == last_modified
+    return False
+
+
+def _iter_file(path: str, ranges: list[tuple[int, int]], parts: Optional[list[bytes]] = None,
+               tail: bytes = b"") -> Iterator[bytes]:
+    """按块读取文件的若干区间（多段时在每段前插入分段头），结束后关闭文件"""
+    with open(path, "rb") as f:
+        for i, (start, stop) in enumerate(ranges):
+            if parts is not None:
+                yield parts[i]
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+            if parts is not None:
+                yield b"\r\n"
+        if tail:
+            yield tail
+
+
+def _file_body(environ: dict, path: str, start: int, stop: int):
+    """
+    单段文件内容：
+    - 服务器提供 wsgi.file_wrapper（如Waitress）时，定位到起点后交给它按 Content-Length 分块发送；
+    - 否则退回到按块读取的生成器。
+    """
+    file_wrapper = environ.get("wsgi.file_wrapper")
+    if file_wrapper is None:
+        return _iter_file(path, [(start, stop)])
+    try:
+        f = open(path, "rb")
+    except OSError:
+        # 索引刷新前文件已被删除
+        abort(404)
+    f.seek(start)
+    return file_wrapper(f, CHUNK_SIZE)
+
+
+def make_file_response(entry, environ: dict) -> Response:
+    """
+    构造文件响应（支持 Range）
+    :param entry: 静态文件缓存条目（StaticEntry），body 为 None 时从磁盘流式读取
+    """
+    headers = list(entry.headers) + [("Accept-Ranges", "bytes")]
+    content_type = entry.headers[0][1]
+    length = entry.size
+    is_head = environ.get("REQUEST_METHOD") == "HEAD"
+
+    ranges = None
+    range_header = environ.get("HTTP_RANGE")
+    if range_header and if_range_matches(environ, entry.etag, entry.last_modified):
+        ranges = parse_ranges(range_header, length)
+
+    # 1. 无 Range（或 Range 被忽略）→ 200 完整内容
+    if ranges is None:
+        headers.append(("Content-Length", str(length)))
+        if is_head:
+            body = None
+        elif entry.body is not None:
+            body = entry.body
+        else:
+            body = _file_body(environ, entry.path, 0, length)
+        return Response(body, status=200, headers=headers, direct_passthrough=True)
+
+    # 2. 区间全部越界 → 416
+    if not ranges:
+        return Response(status=416, headers=[("Content-Range", f"bytes */{length}"), ("Accept-Ranges", "bytes")])
+
+    # 3. 单段 → 206 + Content-Range
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        headers.append(("Content-Range", f"bytes {start}-{stop - 1}/{length}"))
+        headers.append(("Content-Length", str(stop - start)))
+        if is_head:
+            body = None
+        elif entry.body is not None:
+            body = entry.body[start:stop]
+        else:
+            body = _file_body(environ, entry.path, start, stop)
+        return Response(body, status=206, headers=headers, direct_passthrough=True)
+
+    # 4. 多段 → 206 multipart/byteranges
+    boundary = uuid.uuid4().hex
+    parts = [
+        (f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+         f"Content-Range: bytes {start}-{stop - 1}/{length}\r\n\r\n").encode("latin-1")
+        for start, stop in ranges
+    ]
+    tail = f"--{boundary}--\r\n".encode("latin-1")
+    body_length = sum(len(p) + (stop - start) + 2 for p, (start, stop) in zip(parts, ranges)) + len(tail)
+    headers = [(k, v) for k, v in headers if k != "Content-Type"]
+    headers.append(("Content-Type", f"multipart/byteranges; boundary={boundary}"))
+    headers.append(("Content-Length", str(body_length)))
+    if is_head:
+        body = None
+    elif entry.body is not None:
+        body = b"".join(
+            part + entry.body[start:stop] + b"\r\n" for part, (start, stop) in zip(parts, ranges)
+        ) + tail
+    else:
+        body = _iter_file(entry.path, ranges, parts, tail)
+    return Response(body, status=206, headers=headers, direct_passthrough=True)
@@ -0,0 +1,90 @@
+# 日志入口微基准：对比旧实现（inspect.stack）与新实现（_getframe + 级别短路）的每秒调用次数
+# 用法：python benchmarks/logger_bench.py [--seconds 1.0]
+import argparse
+import inspect
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import logDebug, logInfo  # noqa: E402
+
+
+def legacy_log(level: int, msg: str, *args, **kwargs):
+    """改造前的实现（每次调用 inspect.stack()，级别未启用时同样构造记录）"""
+    logger = logging.getLogger()
+    stack = inspect.stack()
+    if len(stack) >= 4:
+        frame_info = stack[3]
+        record = logging.LogRecord(
+            name=logger.name,
+            level=level,
+            pathname=frame_info.filename,
+            lineno=frame_info.lineno,
+            msg=msg,
+            args=args,
+            exc_info=kwargs.get("exc_info"),
+            func=frame_info.function,
+        )
+        record.module = os.path.basename(frame_info.filename).replace(".py", "")
+        record.process = os.getpid()
+        logger.handle(record)
+    else:
+        logger.log(level, msg, *args, **kwargs)
+
+
+def legacy_info(msg, *args):
+    legacy_log(logging.INFO, msg, *args)
+
+
+def legacy_debug(msg, *args):
+    legacy_log(logging.DEBUG, msg, *args)
+
+
+def measure(func, seconds: float) -> float:
+    """在模拟的请求处理调用栈中反复调用，返回每秒调用次数"""
+    def handler(depth: int):
+        # 模拟 Waitress → Flask → 视图函数 的调用深度
+        if depth:
+            return handler(depth - 1)
+        count = 0
+        deadline = time.perf_counter() + seconds
+        start = time.perf_counter()
+        while time.perf_counter() < deadline:
+            for _ in range(100):
+                func("请求处理中 %s", count)
+            count += 100
+        return count / (time.perf_counter() - start)
+
+    return handler(20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="utils.logger 微基准")
+    parser.add_argument("--seconds", type=float, default=1.0, help="每项测量时长（秒）")
+    options = parser.parse_args()
+
+    # 输出到空设备：只测日志调用本身，不测磁盘
+    root = logging.getLogger()
+    handler = logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s | %(process)-8d | %(levelname)-8s | %(name)-15s | %(module)s.%(funcName)s():%(lineno)d | %(message)s"
+    ))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    cases = [
+        ("INFO（已启用）", legacy_info, logInfo),
+        ("DEBUG（未启用）", legacy_debug, logDebug),
+    ]
+    print(f"{'场景':<16}{'改造前 次/秒':>16}{'改造后 次/秒':>16}{'提升':>10}")
+    for name, before, after in cases:
+        before_rate = measure(before, options.seconds)
+        after_rate = measure(after, options.seconds)
+        print(f"{name:<16}{before_rate:>16,.0f}{after_rate:>16,.0f}{after_rate / before_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
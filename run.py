@@ -1,31 +1,28 @@
-# 第一步 获取当前主地址
-from utils.logger import *
+# 第一步 启动耗时分析：必须在其他导入之前开启导入计时（子进程通过环境变量继承）
 import os
+import sys
+if "--profile-startup" in sys.argv:
+    os.environ["BLOG_PROFILE_STARTUP"] = "1"
+if os.environ.get("BLOG_PROFILE_STARTUP") == "1":
+    from utils import startup_profile
+    startup_profile.install()
+
+# 第二步 获取当前主地址
+# spawn 子进程会重新执行本文件的顶层代码：这里只导入主进程和子进程都需要的模块，yaml/psutil 等在用到时再导入
+from utils.config import ConfigError, LaunchConfig, deep_merge, load_launch_config
+from utils.logger import get_logger, init_logger, logDebug, logError, logInfo, logWarning
 from pathlib import Path
 import click
-import yaml
 
 
-def deep_merge(default: dict, custom: dict) -> dict:
+# 加载启动配置
+def init_config_logger(workspace: str = ".") -> LaunchConfig:
     """
-    深度合并两个字典：
-    - 自定义配置（custom）覆盖默认配置（default）的同名键；
-    - 嵌套字典逐层合并，而非整体替换；
-    - 非字典类型直接覆盖，字典类型递归合并。
+    加载 launch.yaml（与默认配置合并并校验）并初始化日志
+    :raise ConfigError: 配置项缺失/未知/类型错误/取值超出范围（消息包含键路径）
     """
-    merged = default.copy()  # 先复制默认配置（避免修改原字典）
-    for key, value in custom.items():
-        # 如果自定义值是字典，且默认配置中该键也是字典 → 递归合并
-        if isinstance(value, dict) and key in merged and isinstance(merged[key], dict):
-            merged[key] = deep_merge(merged[key], value)
-        # 否则直接覆盖（非字典类型/默认配置无此键）
-        else:
-            merged[key] = value
-    return merged
+    import yaml
 
-
-# 加载启动配置
-def init_config_logger(workspace: str = ".") -> dict:
     workspace_path = Path(workspace).absolute()  # 工作目录（文件夹）
     config_path = workspace_path / "launch.yaml"  # 配置文件（文件）
     default_config = {
@@ -40,11 +37,41 @@ def init_config_logger(workspace: str = ".") -> dict:
             "level": "DEBUG",
             "path": str(workspace_path / "logs"),  # 日志文件存工作目录下的 logs 子目录
             "use_json": False,
-            "backup_count": 15,
-            "max_bytes": 20 * 1024 * 1024,
+            "backup_count": 0,  # 已轮转日志最多保留个数（0 表示不限，由保留天数与总大小控制）
+            "max_bytes": 20 * 1024 * 1024,  # 单个日志文件超过该大小即轮转（另外每天零点轮转）
+            "compress": True,  # 轮转下来的日志在后台线程 gzip 压缩
+            "retention_days": 30,  # 已轮转日志保留天数（0 表示不限）
+            "retention_max_bytes": 1024 * 1024 * 1024,  # 日志目录总大小上限（0 表示不限），超出时删除最旧的
+            "async": False,  # 异步日志：请求线程只入队，由单独的写线程批量写入
+            "async_queue_size": 10000,  # 异步队列容量
+            "async_overflow": "block",  # 队列满时：block（等待）/drop_debug（丢弃DEBUG）/drop_oldest（丢弃最旧）
+            "async_batch_size": 256,  # 攒够多少条写一次
+            "async_flush_interval": 0.5,  # 最长多久写一次（秒）
+            "collect_workers": True,  # 子进程日志统一发给主进程写入（多进程时避免轮转竞争）
         },
         "dependencies": {
-            "check_db": True
+            "check_db": True  # 启动前检查数据库（建表迁移、可读写、WAL），失败则不启动
+        },
+        "database": {
+            "url": f"sqlite:///{workspace_path / 'dev.db'}",  # 环境变量 DATABASE_URL 优先
+            "synchronous": "NORMAL",  # WAL 下 NORMAL 只在检查点时 fsync，掉电最多丢失最近的事务，不会损坏库
+            "busy_timeout_ms": 5000,  # 等待其他进程释放写锁的最长时间（毫秒）
+            "cache_size_kb": 16384,  # 每个连接的页缓存（KB）
+            "mmap_size_mb": 64,  # 内存映射读取的大小（MB，0 表示关闭）
+            "cached_statements": 256,  # 每个连接缓存的预编译语句数
+            "write_batch_size": 100,  # 异步写（浏览计数等）攒够多少条提交一次
+            "write_flush_interval": 0.5,  # 异步写最长多久提交一次（秒）
+        },
+        "render": {
+            "cache_max_bytes": 32 * 1024 * 1024,  # 每个子进程的文章HTML缓存（按正文哈希 + 渲染器版本）
+            "rebuild_on_start": True,  # 启动后检查是否有未渲染/旧版本渲染器的文章，有则在后台重新渲染
+            "rebuild_processes": 0,  # 后台重新渲染的进程数（0 表示CPU核数）
+            "rebuild_batch": 50,  # 每个渲染任务包含的文章数
+        },
+        "search": {
+            "max_ranked": 0,  # 0 表示对全部命中文章排序；为正数时只排序最新的这么多篇（限制常见词耗时，更早的命中不出现在结果中）
+            "cache_max_bytes": 8 * 1024 * 1024,  # 每个子进程的检索结果缓存（文章有增删改时失效，0 表示不缓存）
+            "snippet_width": 120,  # 检索结果摘要的字符数
         },
         "waitress": {
             "host": "0.0.0.0",
@@ -56,9 +83,63 @@ def init_config_logger(workspace: str = ".") -> dict:
         },
         "process_pool": {
             "wsgi_process_num": 1,
-            "check_interval": 5,
+            "check_interval": 5,  # 资源采样间隔（秒）；子进程退出由事件立即感知，不受此间隔影响
+            "min_uptime": 5,  # 子进程存活不足该秒数即退出视为崩溃，连续崩溃时按指数退避重建
+            "respawn_backoff_base": 0.5,  # 连续崩溃时首次退避时长（秒），此后每次翻倍
+            "respawn_backoff_max": 30,  # 退避时长上限（秒）
             "resource_warning_cpu": 80,  # CPU告警阈值
             "resource_warning_mem": 90,  # 内存告警阈值
+            "start_method": "spawn",  # 子进程启动方式：spawn（Windows唯一可选）/fork/forkserver（仅Linux/macOS）
+            "reuse_port": False,  # 监听套接字是否设置 SO_REUSEPORT（仅Linux/BSD）
+            "backlog": 1024,  # 内核accept队列长度
+            "min_workers": 0,  # 自动扩缩容下限，0 表示等于 wsgi_process_num
+            "max_workers": 0,  # 自动扩缩容上限，0 表示等于 min_workers（即不自动扩缩容）
+            "report_interval": 1,  # 子进程向主进程上报负载的间隔（秒）
+            "drain_timeout": 30,  # 排空（缩容/回收）时等待在途请求完成的最长时间（秒）
+            "max_requests": 0,  # 子进程处理多少个请求后回收（0 表示不限制）
+            "max_requests_jitter": 0,  # 在 max_requests 上随机增加 0~该值，避免多个进程同时回收
+            "max_rss_mb": 0,  # 子进程常驻内存超过该值（MB）后回收（0 表示不限制）
+            "ready_check_path": "/health",  # 子进程开始监听前在进程内自检的路径，通过后才替换旧进程（空表示不检查）
+        },
+        "watchdog": {
+            "enabled": True,  # 共享内存记分板：各线程状态写入共享内存，主进程据此发现卡死的子进程
+            "interval": 2,  # 检查间隔（秒）
+            "hung_timeout": 60,  # 子进程所有线程都忙于同一批请求超过该秒数视为卡死：记录调用栈并替换
+            "kill_after": 10,  # 判定卡死后该秒数内仍未退出则强制结束
+            "status_page": True,  # 是否开启 /server-status（各子进程线程状态）
+        },
+        "admission": {
+            "enabled": True,  # 准入控制：过载时直接返回 503 + Retry-After，而不是让请求排队到客户端超时
+            "max_in_flight": 0,  # 每个子进程同时处理的请求上限（0 表示不限制）；小于 threads 时为健康检查/静态资源预留线程
+            "max_queue_wait": 2,  # 请求在Waitress队列中等待超过该秒数即返回 503（0 表示不限制）
+            "retry_after": 1,  # 503 响应的 Retry-After（秒）
+            "trust_request_start": False,  # 是否按前置代理的 X-Request-Start 计算排队时长（需时钟同步）
+            "bypass_paths": ["/health", "/metrics", "/server-status"],  # 不受限制的路径
+            "bypass_static": True,  # 前端目录中存在的静态资源不受限制（内存缓存命中，开销很小）
+        },
+        "autoscale": {
+            "interval": 1,  # 扩缩容评估间隔（秒）
+            "up_busy_ratio": 0.75,  # (忙碌线程+排队任务)/总线程数 达到该值视为负载偏高
+            "up_cpu": 70,  # 子进程平均CPU达到该值视为负载偏高
+            "up_accept_queue": 16,  # 内核accept队列积压达到该值视为负载偏高（仅Linux）
+            "up_after": 3,  # 负载偏高持续多少秒才扩容
+            "up_cooldown": 5,  # 距上次调整不足该秒数不扩容
+            "down_busy_ratio": 0.2,  # 低于该值（且CPU低、accept队列为空）视为负载偏低
+            "down_cpu": 20,
+            "down_after": 60,  # 负载偏低持续多少秒才缩容
+            "down_cooldown": 30,  # 距上次调整不足该秒数不缩容
+        },
+        "frontend": {
+            "dir": str(workspace_path / "blog-frontend"),  # 前端项目目录（其下 pages/front 为静态资源）
+            "index_refresh_interval": 2,  # 前端目录索引刷新间隔（秒）
+            "cache_max_bytes": 64 * 1024 * 1024,  # 静态资源缓存总字节预算
+            "cache_max_file_bytes": 1024 * 1024,  # 单文件超过该大小不缓存内容，按大文件流式发送（支持Range）
+            "precompress_min_size": 256,  # 小于该字节数的资源不预压缩
+        },
+        "metrics": {
+            "enabled": True,  # 是否开启请求指标与 /metrics 接口
+            "dir": str(workspace_path / "run" / "metrics"),  # 各进程指标快照目录（/metrics 从这里汇总）
+            "flush_interval": 1,  # 子进程写入指标快照的间隔（秒）
         }
     }
 
@@ -67,8 +148,16 @@ def init_config_logger(workspace: str = ".") -> dict:
             level=log_config.get("level", "DEBUG"),
             log_dir=log_config.get("path", str(workspace_path / "logs")),
             use_json=log_config.get("use_json", False),
-            backup_count=log_config.get("backup_count", 15),
-            max_bytes=log_config.get("max_bytes", 20 * 1024 * 1024)
+            backup_count=log_config.get("backup_count", 0),
+            max_bytes=log_config.get("max_bytes", 20 * 1024 * 1024),
+            compress=log_config.get("compress", True),
+            retention_days=log_config.get("retention_days", 30),
+            retention_max_bytes=log_config.get("retention_max_bytes", 1024 * 1024 * 1024),
+            async_mode=log_config.get("async", False),
+            async_queue_size=log_config.get("async_queue_size", 10000),
+            async_overflow=log_config.get("async_overflow", "block"),
+            async_batch_size=log_config.get("async_batch_size", 256),
+            async_flush_interval=log_config.get("async_flush_interval", 0.5)
         )
         logInfo(f"初始化日志，级别：{log_config.get("level")}，路径：{log_config.get("path")}")
         logInfo("✅ 成功加载日志功能")
@@ -76,11 +165,9 @@ def init_config_logger(workspace: str = ".") -> dict:
     try:
         # 3. 配置文件存在 → 读取配置
         if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = yaml.safe_load(f) or {}  # 空文件返回空字典，避免 None
-            # 合并默认配置（防止配置文件缺失关键字段）
-            config = deep_merge(default_config, config)
-            load_logger(init_logger, config.get("log", {}))
+            # 合并默认配置（防止配置文件缺失关键字段）并校验；文件未修改时直接使用上次的快照
+            config = load_launch_config(config_path, default_config, workspace_path / "run" / "launch.snapshot.json")
+            load_logger(init_logger, config.log)
             logInfo(f"✅ 成功加载配置文件：{config_path}")
 
         # 4. 配置文件不存在 → 创建目录 + 生成默认配置
@@ -96,13 +183,16 @@ def init_config_logger(workspace: str = ".") -> dict:
                     allow_unicode=True,
                     sort_keys=False  # 保持配置顺序，更易读
                 )
-            config = default_config
-            load_logger(init_logger, config.get("log", {}))
+            config = LaunchConfig.from_dict(default_config)
+            load_logger(init_logger, config.log)
             logInfo(f"⚠️  配置文件不存在，已创建默认配置：{config_path}")
 
         return config
 
-    # 5. 异常处理：覆盖文件读取/解析错误
+    # 5. 异常处理：覆盖文件读取/解析/校验错误
+    except ConfigError as e:
+        print(f"❌ 配置校验失败（{config_path}）：{e}")
+        raise
     except yaml.YAMLError as e:
         raise ValueError(f"配置文件格式错误（YAML 解析失败）：{config_path} → {str(e)}")
     except PermissionError:
@@ -112,27 +202,70 @@ def init_config_logger(workspace: str = ".") -> dict:
         raise RuntimeError(f"加载配置失败：{str(e)}")
 
 
-@click.command()
-@click.option(
-    "--workspace",
-    default=".",
-    help="指定工作目录（存放配置文件和程序生成文件），默认：当前文件夹"
-)
-def start(workspace: str):
+def load_config_or_exit(workspace: str) -> LaunchConfig:
+    """命令行入口加载配置：配置有误时在启动阶段直接退出，而不是等子进程用到时才崩溃"""
+    try:
+        return init_config_logger(workspace)
+    except ConfigError:
+        sys.exit(1)
+
+
+def _start_options(func):
+    """start 的命令行参数（不带子命令运行时由命令组接收）"""
+    func = click.option(
+        "--profile-startup",
+        is_flag=True,
+        help="输出启动耗时分析：主进程与每个子进程的模块导入、配置加载、create_app、首个请求耗时"
+    )(func)
+    return click.option(
+        "--workspace",
+        default=".",
+        help="指定工作目录（存放配置文件和程序生成文件），默认：当前文件夹"
+    )(func)
+
+
+@click.group(invoke_without_command=True)
+@_start_options
+@click.pass_context
+def cli(ctx: click.Context, workspace: str, profile_startup: bool):
+    """博客后端命令行入口（不带子命令时启动服务，即 python run.py [--workspace ...] 等同于 start）"""
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(start, workspace=workspace, profile_startup=profile_startup)
+
+
+@cli.command()
+@_start_options
+def start(workspace: str, profile_startup: bool):
+    """启动服务（默认命令）"""
+    from utils.startup_profile import current as current_profile
+    profile = current_profile()
+    if profile is not None:
+        profile.mark("导入 run.py", time.perf_counter() - profile.started)
     # 加载启动配置
-    CONFIG = init_config_logger(workspace)
+    config_started = time.perf_counter()
+    CONFIG = load_config_or_exit(workspace)
+    if profile is not None:
+        profile.mark("加载配置", time.perf_counter() - config_started)
     logInfo(f"🚀 启动配置加载完成，工作目录：{Path(workspace).absolute()}")
     logInfo(f"📌 服务配置 - host: {CONFIG['server']['host']}, port: {CONFIG['server']['port']}")
     logInfo("开始启动后端主进程")
 
-    # Windows必须用spawn启动方式
-    multiprocessing.set_start_method("spawn", force=True)
+    # 启动前检查依赖（数据库等），失败直接退出，而不是让每个子进程在请求到来时才报错
+    check_dependencies(CONFIG)
+
+    # Windows必须用spawn启动方式；Linux可配置 fork（主进程预加载应用，子进程写时复制共享内存）
+    # （平台是否支持已在加载配置时校验）
+    if CONFIG["process_pool"]["start_method"] == "fork":
+        preload_app(CONFIG)
 
     # 初始化管理器（传递配置）
-    manager = WSGIProcessManager(CONFIG)
+    manager = WSGIProcessManager(CONFIG, workspace)
     # 注册退出信号
     signal.signal(signal.SIGINT, manager.signal_handler)
     signal.signal(signal.SIGTERM, manager.signal_handler)
+    # SIGHUP：重新读取 launch.yaml 并逐个平滑替换子进程（Windows 无此信号）
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, manager.reload_handler)
 
     # 启动服务
     try:
@@ -145,132 +278,965 @@ def start(workspace: str):
         time.sleep(1)
 
 
+@cli.command()
+@click.option(
+    "--workspace",
+    default=".",
+    help="指定工作目录（存放配置文件和程序生成文件），默认：当前文件夹"
+)
+@click.option("--level", default=9, type=click.IntRange(1, 9), help="gzip压缩级别，默认：9")
+def precompress(workspace: str, level: int):
+    """预压缩前端资源（生成 .gz/.br 兄弟文件，供 serve_vue 按 Accept-Encoding 直接发送）"""
+    CONFIG = load_config_or_exit(workspace)
+    from app.infrastructure.static.compress import brotli, precompress_directory
+    from app.infrastructure.static.index import resolve_frontend_dir
+
+    front_dir = resolve_frontend_dir(CONFIG["frontend"])
+    logInfo(f"🗜️ 开始预压缩前端资源：{front_dir}（brotli：{'已启用' if brotli else '未安装，仅生成gzip'}）")
+    stats = precompress_directory(
+        front_dir,
+        min_size=CONFIG["frontend"]["precompress_min_size"],
+        level=level
+    )
+    saved = stats.bytes_before - stats.bytes_after
+    logInfo(
+        f"✅ 预压缩完成：扫描 {stats.scanned} 个文件，生成 {stats.written} 个压缩文件，"
+        f"{stats.up_to_date} 个无需更新，{stats.skipped_not_smaller} 个压缩后不变小已跳过，"
+        f"节省 {saved / 1024:.1f} KB"
+    )
+
+
+@cli.command()
+@click.option(
+    "--workspace",
+    default=".",
+    help="指定工作目录（存放配置文件和程序生成文件），默认：当前文件夹"
+)
+def reindex(workspace: str):
+    """重建文章全文索引与标签/归档索引（平时随文章保存增量更新；批量导入数据或修改分词规则后执行）"""
+    CONFIG = load_config_or_exit(workspace)
+    from app.infrastructure.db.post_repository import PostRepository
+    from app.infrastructure.db.sqlite import open_database
+
+    db = open_database(CONFIG["database"])
+    db.migrate()
+    started = time.perf_counter()
+    posts = PostRepository(db)
+    total = posts.rebuild_search_index()
+    posts.rebuild_listing_index()
+    db.close()
+    logInfo(f"✅ 全文索引与标签/归档索引重建完成：{total} 篇已发布文章，耗时 {time.perf_counter() - started:.2f} 秒")
+
+
+def _int_list(ctx, param, value: str) -> list:
+    try:
+        values = [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise click.BadParameter(f"需要逗号分隔的整数：{value}")
+    if not values or min(values) < 1:
+        raise click.BadParameter(f"需要至少一个正整数：{value}")
+    return values
+
+
+@cli.command()
+@click.option(
+    "--workspace",
+    default=".",
+    help="指定工作目录（以其中的 launch.yaml 为基准配置），默认：当前文件夹"
+)
+@click.option("--threads", "threads_list", default="4,8", callback=_int_list, help="扫描的 waitress.threads，逗号分隔")
+@click.option("--processes", "processes_list", default="1,2", callback=_int_list,
+              help="扫描的 process_pool.wsgi_process_num，逗号分隔")
+@click.option("--concurrency", default=16, type=click.IntRange(1), help="并发连接数（每个连接一个线程，长连接）")
+@click.option("--duration", default=10.0, type=click.FloatRange(0.1), help="每个组合的压测时长（秒）")
+@click.option("--warmup", default=2.0, type=click.FloatRange(0), help="每个组合正式压测前的预热时长（秒，结果丢弃）")
+@click.option("--boot-timeout", default=30.0, type=click.FloatRange(1), help="等待服务就绪的最长时间（秒）")
+@click.option("--output", default=None, type=click.Path(dir_okay=False), help="结果另存为该JSON文件")
+def bench(workspace: str, threads_list: list, processes_list: list, concurrency: int, duration: float,
+          warmup: float, boot_timeout: float, output: str):
+    """本地压测：以 launch.yaml 为基准，扫描 threads × wsgi_process_num，输出吞吐与 p50/p95/p99 延迟（JSON）"""
+    import json
+    import shutil
+    from utils.bench import environment_info, free_port, make_synthetic_frontend, run_point
+
+    CONFIG = load_config_or_exit(workspace)
+    # 压测目录：合成前端 + 每个组合的 launch.yaml/日志，每次运行前清空
+    bench_dir = Path(workspace).absolute() / "run" / "bench"
+    shutil.rmtree(bench_dir, ignore_errors=True)
+    frontend_root = make_synthetic_frontend(bench_dir / "frontend")
+
+    results = []
+    for processes in processes_list:
+        for threads in threads_list:
+            workdir = bench_dir / f"t{threads}-p{processes}"
+            # 只覆盖扫描参数与运行目录，其余（日志、准入控制、缓存等）沿用 launch.yaml，反映配置修改的影响
+            config = deep_merge(CONFIG.to_dict(), {
+                "waitress": {"host": "127.0.0.1", "port": free_port(), "threads": threads},
+                # 固定进程数：关闭自动扩缩容
+                "process_pool": {"wsgi_process_num": processes, "min_workers": 0, "max_workers": 0},
+                "frontend": {"dir": str(frontend_root)},
+                "log": {"path": str(workdir / "logs")},
+                "metrics": {"dir": str(workdir / "run" / "metrics")},
+            })
+            logInfo(f"🏁 压测 threads={threads} wsgi_process_num={processes}（并发 {concurrency}，{duration} 秒）")
+            try:
+                result = run_point(config, workdir, concurrency, duration, warmup, boot_timeout)
+            except RuntimeError as e:
+                logError(f"❌ 压测失败：{e}")
+                sys.exit(1)
+            total = result["total"]
+            logInfo(f"📊 {total['rps']} req/s，p50 {total['p50_ms']} ms，p95 {total['p95_ms']} ms，"
+                    f"p99 {total['p99_ms']} ms，错误 {total['errors']}")
+            results.append(result)
+
+    report = {
+        "environment": environment_info(),
+        "parameters": {
+            "concurrency": concurrency,
+            "duration": duration,
+            "warmup": warmup,
+            "threads": threads_list,
+            "wsgi_process_num": processes_list,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logInfo(f"💾 压测结果已保存：{output}")
+    click.echo(text)
+
+
+import logging
 import os
 import sys
 import signal
 import time
 import multiprocessing
-import psutil
 from typing import List
 
 # 强制将项目根目录加入Python路径（优先级最高）
 sys.path.insert(0, os.path.abspath(os.getcwd()))
 
+def check_dependencies(config: LaunchConfig) -> None:
+    """dependencies 节：check_db 为 True 时打开数据库执行迁移并确认可读写，失败则退出"""
+    if not config["dependencies"]["check_db"]:
+        return
+    import sqlite3
+    from app.infrastructure.db.sqlite import open_database
+    started = time.perf_counter()
+    try:
+        detail = open_database(config["database"]).check()
+    except (ValueError, OSError, sqlite3.Error) as e:
+        logError(f"❌ 数据库检查失败：{e}")
+        sys.exit(1)
+    logInfo(f"✅ 数据库检查通过：{detail}，耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+# fork 模式下由主进程预先创建的Flask应用（子进程直接复用，无需重新导入和 create_app）
+_PRELOADED_APP = None
+
+
+def preload_app(config: LaunchConfig):
+    """主进程预加载应用（仅 fork 模式）：导入 Flask/Waitress 与业务代码并创建应用，子进程通过写时复制共享"""
+    global _PRELOADED_APP
+    started = time.perf_counter()
+    from app.app import create_app
+    import waitress  # noqa: F401  子进程 fork 后无需再导入
+    import app.infrastructure.http.worker  # noqa: F401  子进程的服务循环模块，同样预先导入
+    _PRELOADED_APP = create_app(config)
+    elapsed = time.perf_counter() - started
+    logInfo(f"📦 主进程预加载应用完成，耗时 {elapsed * 1000:.1f} ms")
+    from utils.startup_profile import current as current_profile
+    profile = current_profile()
+    if profile is not None:
+        profile.mark("预加载应用（create_app）", elapsed)
+
 
-def run_waitress(config: dict):
+def run_waitress(config: LaunchConfig, log_queue=None, listen_socket=None, spawned_at: float = None, worker_id: int = None,
+                 control_conn=None, scoreboard_spec=None):
     try:
-        # 修正导入：只导入需要的函数，去掉无用的get_logger（如果没用到）
-        from utils.logger import init_logger, logInfo, logError
+        # fork 出的子进程继承了主进程的信号处理函数：
+        # 终端 Ctrl+C 会把 SIGINT 发给整个进程组，由主进程下发排空指令统一停止，子进程忽略，不打断在途请求；
+        # SIGTERM 保持默认，作为排空超时后主进程强制终止的手段
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if hasattr(signal, "SIGHUP"):
+            # 重载由主进程负责；忽略发给整个进程组的 SIGHUP（如 pkill -HUP），避免子进程被直接终止
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        from utils.startup_profile import current as current_profile
+        profile = current_profile()
+        if profile is not None and spawned_at:
+            # spawn：解释器启动 + 导入 run.py + 反序列化参数；fork：几乎为0
+            profile.origin = spawned_at
+            profile.mark("创建进程并导入 run.py", time.time() - spawned_at)
+        phase_started = time.perf_counter()
 
-        # 子进程重新初始化日志
-        init_logger(
-            level=config["log"]["level"],
-            log_dir=config["log"]["path"],
-            use_json=config["log"]["use_json"],
-            backup_count=config["log"]["backup_count"],
-            max_bytes=config["log"]["max_bytes"]
-        )
+        # 子进程重新初始化日志：由主进程收集时只挂队列Handler，否则各自写文件
+        if log_queue is not None:
+            from utils.log_collector import init_worker_logger
+            init_worker_logger(log_queue, level=config["log"]["level"], overflow=config["log"]["async_overflow"])
+        else:
+            init_logger(
+                level=config["log"]["level"],
+                log_dir=config["log"]["path"],
+                use_json=config["log"]["use_json"],
+                backup_count=config["log"]["backup_count"],
+                max_bytes=config["log"]["max_bytes"],
+                compress=config["log"]["compress"],
+                retention_days=config["log"]["retention_days"],
+                retention_max_bytes=config["log"]["retention_max_bytes"],
+                async_mode=config["log"]["async"],
+                async_queue_size=config["log"]["async_queue_size"],
+                async_overflow=config["log"]["async_overflow"],
+                async_batch_size=config["log"]["async_batch_size"],
+                async_flush_interval=config["log"]["async_flush_interval"],
+                recover_leftovers=False,  # 遗留文件已由主进程处理，子进程之间不能互相删除/重复压缩
+            )
+        if profile is not None:
+            profile.mark("初始化日志", time.perf_counter() - phase_started)
 
         waitress_config = config["waitress"]
-        from app.app import create_app
-        app = create_app()
-        logInfo(f"✅ 成功导入Flask应用：{app}")
+        phase_started = time.perf_counter()
+        if _PRELOADED_APP is not None:
+            app = _PRELOADED_APP
+            logInfo(f"✅ 复用主进程预加载的Flask应用：{app}")
+        else:
+            from app.app import create_app
+            app = create_app(config)
+            logInfo(f"✅ 成功导入Flask应用：{app}")
+            if profile is not None:
+                profile.mark("导入应用 + create_app", time.perf_counter() - phase_started)
+        # 按槽位编号输出指标快照（同一槽位的新进程接替旧进程）
+        metrics = app.extensions.get("metrics")
+        if metrics is not None and worker_id is not None:
+            metrics.bind_worker(worker_id)
+        # 挂载主进程创建的记分板：各线程写入本槽位对应的行，/server-status 读取全部行
+        scoreboard = None
+        if scoreboard_spec is not None:
+            from app.infrastructure.http.scoreboard import Scoreboard
+            scoreboard = Scoreboard.attach(scoreboard_spec)
+            app.extensions["scoreboard"] = scoreboard
 
         # 若需要waitress专属logger，用get_logger（现在已补全）
         access_logger = get_logger('waitress.access')
         error_logger = get_logger('waitress')
 
-        from waitress import serve
-        logInfo(f"🚀 启动Waitress服务：http://{waitress_config['host']}:{waitress_config['port']}")
-        serve(
-            app,
-            host=waitress_config["host"],
-            port=waitress_config["port"],
-            threads=waitress_config["threads"],
-            connection_limit=waitress_config["connection_limit"],
-            log_socket_errors=True
+        from app.infrastructure.http.worker import serve_worker
+        boot_ms = f"，启动耗时 {(time.time() - spawned_at) * 1000:.1f} ms" if spawned_at else ""
+        logInfo(f"🚀 启动Waitress服务：http://{waitress_config['host']}:{waitress_config['port']}{boot_ms}")
+        # 主进程已绑定好监听套接字 → 所有子进程共享同一个套接字 accept；否则自行绑定
+        listen_kwargs = (
+            {"sockets": [listen_socket]} if listen_socket is not None
+            else {"host": waitress_config["host"], "port": waitress_config["port"]}
         )
+        # 通过控制管道上报就绪/负载，并响应主进程的排空指令
+        try:
+            serve_worker(
+                app,
+                control_conn,
+                report_interval=config["process_pool"]["report_interval"],
+                drain_timeout=config["process_pool"]["drain_timeout"],
+                max_requests=config["process_pool"]["max_requests"],
+                max_requests_jitter=config["process_pool"]["max_requests_jitter"],
+                ready_check_path=config["process_pool"]["ready_check_path"],
+                scoreboard=scoreboard,
+                scoreboard_row=scoreboard_spec.row if scoreboard_spec is not None else 0,
+                profile_role=f"子进程 槽位 {worker_id}",
+                threads=waitress_config["threads"],
+                connection_limit=waitress_config["connection_limit"],
+                backlog=config["process_pool"]["backlog"],
+                log_socket_errors=True,
+                **listen_kwargs
+            )
+        finally:
+            # multiprocessing 子进程退出时不执行 atexit：在这里提交数据库的剩余批量写入并关闭连接
+            db = app.extensions.get("db")
+            if db is not None:
+                db.close()
     except Exception as e:
         logError(f"❌ Waitress启动失败：{e}")
         import traceback
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 # ===================== 进程管理器 =====================
+class WorkerHandle:
+    """
+    子进程槽位：记录当前进程、控制管道、启动时间与连续崩溃次数
+    - process 为 None 表示该槽位正在退避等待重建（restart_at 为计划重建时间）；
+    - ps 为缓存的 psutil.Process，cpu_percent(None) 依赖上次调用的计数，必须复用同一对象；
+    - draining 为 True 表示已下发排空指令，进程退出后槽位被移除，不再重建；
+    - 回收时先启动替代槽位（replacement），替代进程就绪后才排空本槽位，期间容量不减。
+    """
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.process = None
+        self.conn = None  # 与子进程的控制管道（主进程端）
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = None
+        self.ps = None
+        self.last_pid = None  # 上一个进程的PID（重建日志用）
+        self.restarts = 0
+        self.draining = False
+        self.load = None  # 子进程最近一次上报的负载
+        self.cpu = 0.0  # 最近一次采样的CPU占用
+        self.ready = False  # 子进程是否已上报就绪
+        self.replacement = None  # 回收中：接替本槽位的新槽位
+        self.replaces = None  # 本槽位接替的旧槽位（就绪后排空它）
+        self.kill_at = None  # 看门狗判定卡死后的强制结束时间
+
+
 class WSGIProcessManager:
-    def __init__(self, config: dict):
+    def __init__(self, config: LaunchConfig, workspace: str = "."):
         self.config = config  # 保存配置
-        self.wsgi_processes: List[multiprocessing.Process] = []
+        self.workspace = workspace  # 重新加载配置时使用
+        self.workers: List[WorkerHandle] = []
+        self.listen_socket = None  # 主进程统一绑定的监听套接字
         self.is_running = False
+        self._stopping = False  # stop_all 正在排空子进程
+        self._force_stop = False  # 排空期间再次收到退出信号：不再等待在途请求
         # 提取进程池配置（避免硬编码）
         self.process_pool_config = config["process_pool"]
         self.waitress_config = config["waitress"]
+        # 子进程启动方式（spawn/fork/forkserver）
+        self.mp_context = multiprocessing.get_context(self.process_pool_config["start_method"])
+        if self.process_pool_config["start_method"] == "forkserver":
+            # forkserver 进程预先导入重量级模块，之后每个子进程从它 fork，省去重复导入
+            self.mp_context.set_forkserver_preload(["flask", "waitress", "app.app", "app.infrastructure.http.worker"])
+        # 日志收集器：子进程日志经管道汇总到主进程，由主进程统一写文件和轮转
+        self.log_collector = None
+        if config["log"]["collect_workers"]:
+            from utils.log_collector import LogCollector
+            self.log_collector = LogCollector(
+                self.mp_context,
+                queue_size=config["log"]["async_queue_size"],
+                batch_size=config["log"]["async_batch_size"],
+                flush_interval=config["log"]["async_flush_interval"]
+            )
+        # 指标快照目录（主进程写资源采样，子进程写请求统计）
+        self.metrics_dir = config["metrics"]["dir"] if config["metrics"]["enabled"] else None
+        # 共享内存记分板（start_pool 中创建，行号即槽位号）
+        self.scoreboard = None
+        # 后台重新渲染文章HTML（start_pool 中按需启动）
+        self.render_rebuilder = None
+        # 子进程数范围：min_workers/max_workers 为 0 时分别取 wsgi_process_num / min_workers
+        from utils.autoscale import Autoscaler
+        self.autoscaler = Autoscaler(*self._worker_range(config), config["autoscale"])
+        # 平滑重载：信号处理函数只置标记并通过管道唤醒监控循环，实际工作在监控循环中完成
+        self._reload_requested = False
+        self._reloading = False
+        self._reload_queue: List[WorkerHandle] = []
+        self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+        # 启动耗时分析（--profile-startup，start_pool 中获取）
+        self._profile = None
+        self._pool_started = 0.0
+
+    @staticmethod
+    def _worker_range(config: LaunchConfig) -> tuple:
+        """子进程数范围：min_workers/max_workers 为 0 时分别取 wsgi_process_num / min_workers"""
+        pool = config["process_pool"]
+        min_workers = pool["min_workers"] or pool["wsgi_process_num"]
+        return min_workers, max(pool["max_workers"] or min_workers, min_workers)
+
+    @property
+    def wsgi_processes(self) -> List[multiprocessing.Process]:
+        """当前存活槽位的进程列表"""
+        return [worker.process for worker in self.workers if worker.process is not None]
 
-    def start_waitress_process(self) -> multiprocessing.Process:
+    @property
+    def serving_workers(self) -> List[WorkerHandle]:
+        """计入容量的槽位（不含排空中、等待被替代的）"""
+        return [worker for worker in self.workers if not worker.draining and worker.replacement is None]
+
+    def _scoreboard_row(self, worker: WorkerHandle):
+        """槽位对应的记分板行号；槽位编号超出记分板容量（重载后调大了 max_workers）时不记录"""
+        if self.scoreboard is None or worker.slot >= self.scoreboard.rows:
+            return None
+        return worker.slot
+
+    def start_waitress_process(self, worker_id: int = None, control_conn=None,
+                               scoreboard_spec=None) -> multiprocessing.Process:
         """启动Waitress子进程（传递配置参数）"""
-        process = multiprocessing.Process(
+        process = self.mp_context.Process(
             name="Waitress-Server",
             target=run_waitress,
-            args=(self.config,),  # 将配置作为参数传递给子进程
+            # 将配置（及日志队列、监听套接字、控制管道）作为参数传递给子进程
+            args=(
+                self.config,
+                self.log_collector.queue if self.log_collector else None,
+                self.listen_socket,
+                time.time(),
+                worker_id,
+                control_conn,
+                scoreboard_spec
+            ),
             daemon=False
         )
         process.start()
         logInfo(f"✅ Waitress进程启动成功，PID: {process.pid}")
         return process
 
+    def _spawn(self, worker: WorkerHandle) -> None:
+        """在槽位上启动新进程，并预热 CPU 采样计数"""
+        import psutil
+        parent_conn, child_conn = self.mp_context.Pipe()
+        row = self._scoreboard_row(worker)
+        if row is not None:
+            # 清掉上一个进程留下的状态，避免被误判为卡死
+            self.scoreboard.reset_row(row)
+        worker.process = self.start_waitress_process(
+            worker.slot, child_conn, self.scoreboard.spec(row) if row is not None else None
+        )
+        # 主进程关闭子进程端，子进程退出后 parent_conn 才能读到 EOF
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        worker.load = None
+        worker.ready = False
+        worker.kill_at = None
+        try:
+            worker.ps = psutil.Process(worker.process.pid)
+            worker.ps.cpu_percent(None)
+        except psutil.Error:
+            worker.ps = None
+
+    def _add_worker(self) -> WorkerHandle:
+        """新增一个槽位（编号取最小的空闲值）并启动进程"""
+        used = {worker.slot for worker in self.workers}
+        slot = next(i for i in range(len(used) + 1) if i not in used)
+        worker = WorkerHandle(slot)
+        self._spawn(worker)
+        self.workers.append(worker)
+        return worker
+
     def start_pool(self):
         self.is_running = True
+        if self.log_collector is not None:
+            self.log_collector.start()
+        if self.metrics_dir is not None:
+            self._reset_metrics_dir()
+        # 只绑定一次端口，所有子进程共享（多个子进程各自 bind 同一端口会失败）
+        bind_started = time.perf_counter()
+        from app.infrastructure.http.listener import create_listen_socket
+        self.listen_socket = create_listen_socket(
+            self.waitress_config["host"],
+            self.waitress_config["port"],
+            backlog=self.process_pool_config["backlog"],
+            reuse_port=self.process_pool_config["reuse_port"]
+        )
+        if self.config["watchdog"]["enabled"]:
+            self._create_scoreboard()
+        from utils.startup_profile import current as current_profile
+        self._profile = current_profile()
+        if self._profile is not None:
+            self._profile.mark("绑定套接字/创建记分板", time.perf_counter() - bind_started)
+        self._pool_started = time.perf_counter()
+        initial = min(max(self.process_pool_config["wsgi_process_num"], self.autoscaler.min_workers),
+                      self.autoscaler.max_workers)
+        logInfo(f"🔌 监听套接字已绑定：{self.waitress_config['host']}:{self.waitress_config['port']}"
+                f"（{initial} 个进程共享）")
+        if self.autoscaler.enabled:
+            logInfo(f"📈 自动扩缩容已开启：{self.autoscaler.min_workers} ~ {self.autoscaler.max_workers} 个进程")
         # 启动Waitress进程
-        for _ in range(self.process_pool_config["wsgi_process_num"]):
-            process = self.start_waitress_process()
-            self.wsgi_processes.append(process)
+        for _ in range(initial):
+            self._add_worker()
+        self._start_render_rebuild()
         # 启动监控
         self._monitor_processes()
 
+    def _start_render_rebuild(self) -> None:
+        """文章HTML缺失或来自旧版本渲染器时，主进程在后台用进程池重新渲染（子进程照常服务）"""
+        render_config = self.config["render"]
+        if not render_config["rebuild_on_start"]:
+            return
+        from app.infrastructure.db.rendered_html import RenderedHtmlStore
+        from app.infrastructure.db.sqlite import open_database
+        from app.infrastructure.render.rebuild import RenderRebuilder
+        try:
+            store = RenderedHtmlStore(open_database(self.config["database"]))
+        except ValueError as e:
+            logError(f"❌ 无法打开数据库，跳过后台重新渲染：{e}")
+            return
+        self.render_rebuilder = RenderRebuilder(
+            store, self.mp_context,
+            processes=render_config["rebuild_processes"],
+            batch_size=render_config["rebuild_batch"],
+        )
+        self.render_rebuilder.start()
+
     def _monitor_processes(self):
-        logInfo(f"🔍 启动进程监控，检查间隔：{self.process_pool_config['check_interval']}秒")
+        """
+        事件驱动的监控循环：
+        1. 阻塞等待任一子进程的 sentinel（进程退出时立即可读）或控制管道消息，超时时间取下次资源采样/扩缩容评估/退避重建中最早的一个；
+        2. 子进程退出后立即重建；存活不足 min_uptime 的连续崩溃按指数退避，避免启动即崩溃时空转；
+        3. 资源采样使用非阻塞的 cpu_percent(None)（与上次采样之间的平均值），不再每个进程阻塞 0.1 秒；
+        4. 按子进程上报的负载、CPU 与 accept 队列长度自动扩缩容；
+        5. 看门狗读取共享内存记分板，替换所有线程都卡住的子进程。
+        """
+        from multiprocessing.connection import wait
+        logInfo(f"🔍 启动进程监控（事件驱动），资源采样间隔：{self.process_pool_config['check_interval']}秒")
+        next_sample = time.monotonic() + self.process_pool_config["check_interval"]
+        next_scale = time.monotonic() + self.config["autoscale"]["interval"]
+        next_watchdog = time.monotonic() + self.config["watchdog"]["interval"]
         while self.is_running:
-            for i, process in enumerate(self.wsgi_processes):
-                if not process.is_alive():
-                    exitcode = process.exitcode
-                    logInfo(f"⚠️ Waitress进程（PID:{process.pid}）退出，退出码：{exitcode}")
-                    process.join()
-                    time.sleep(2)
-                    new_process = self.start_waitress_process()
-                    self.wsgi_processes[i] = new_process
-                else:
-                    # 监控资源占用
-                    try:
-                        p = psutil.Process(process.pid)
-                        cpu = p.cpu_percent(interval=0.1)
-                        mem = p.memory_percent()
-                        if cpu > self.config["process_pool"]["resource_warning_cpu"] or mem > self.config["process_pool"]["resource_warning_mem"]:
-                            logDebug(f"⚠️ Waitress进程（PID:{process.pid}）资源过高：CPU {cpu}%，内存 {mem}%")
-                    except psutil.NoSuchProcess:
-                        pass
-            time.sleep(self.process_pool_config["check_interval"])
+            now = time.monotonic()
+            deadline = min(next_sample, next_scale) if self.autoscaler.enabled else next_sample
+            if self.scoreboard is not None:
+                deadline = min(deadline, next_watchdog)
+            waitables = {self._wake_r: None}
+            for worker in self.workers:
+                if worker.restart_at is not None:
+                    deadline = min(deadline, worker.restart_at)
+                if worker.kill_at is not None:
+                    deadline = min(deadline, worker.kill_at)
+                if worker.process is not None:
+                    waitables[worker.process.sentinel] = worker
+                if worker.conn is not None:
+                    waitables[worker.conn] = worker
+            ready = wait(list(waitables), timeout=max(0.0, deadline - now))
+            if not self.is_running:
+                break
+
+            # 1. 处理控制管道消息与已退出的子进程
+            for obj in ready:
+                worker = waitables[obj]
+                if worker is None:
+                    # 唤醒管道：读空即可，具体事件由标记决定
+                    while self._wake_r.poll():
+                        self._wake_r.recv_bytes()
+                elif obj is worker.conn:
+                    self._handle_messages(worker)
+                elif worker.process is not None and obj == worker.process.sentinel:
+                    self._handle_exit(worker)
+
+            # 2. 退避到期的槽位重建
+            now = time.monotonic()
+            for worker in self.workers:
+                if worker.restart_at is not None and worker.restart_at <= now:
+                    self._respawn(worker)
+
+            # 3. 资源采样
+            if now >= next_sample:
+                self._sample_resources()
+                next_sample = now + self.process_pool_config["check_interval"]
+
+            # 4. 自动扩缩容
+            if self.autoscaler.enabled and now >= next_scale:
+                self._autoscale(now)
+                next_scale = now + self.config["autoscale"]["interval"]
+
+            # 5. 看门狗：检查卡死的子进程，强制结束判定卡死后迟迟不退出的进程
+            if self.scoreboard is not None and now >= next_watchdog:
+                self._check_hung()
+                next_watchdog = now + self.config["watchdog"]["interval"]
+            for worker in self.workers:
+                if worker.kill_at is not None and worker.kill_at <= now and worker.process is not None:
+                    logError(f"💀 卡死的Waitress进程（PID:{worker.process.pid}）未能退出，强制结束")
+                    worker.kill_at = None
+                    worker.process.kill()
+
+            # 6. 平滑重载：收到 SIGHUP 后重新加载配置，再逐个替换旧进程
+            if self._reload_requested:
+                self._reload_requested = False
+                self._reload()
+            self._continue_reload()
+
+    def _handle_messages(self, worker: WorkerHandle) -> None:
+        """读取子进程发来的全部消息（就绪/负载上报/回收请求）"""
+        from app.infrastructure.http.worker import MSG_LOAD, MSG_READY, MSG_RECYCLE
+        try:
+            while worker.conn is not None and worker.conn.poll():
+                kind, payload = worker.conn.recv()
+                if kind == MSG_LOAD:
+                    worker.load = payload
+                elif kind == MSG_READY:
+                    self._on_ready(worker)
+                elif kind == MSG_RECYCLE:
+                    self._recycle(worker, payload)
+        except (EOFError, OSError):
+            # 子进程已退出，等待 sentinel 处理
+            worker.conn.close()
+            worker.conn = None
+
+    def _handle_exit(self, worker: WorkerHandle) -> None:
+        process = worker.process
+        process.join()
+        uptime = time.monotonic() - worker.started_at
+        logInfo(f"⚠️ Waitress进程（PID:{process.pid}）退出，退出码：{process.exitcode}，存活 {uptime:.1f} 秒")
+        worker.process = None
+        worker.ps = None
+        worker.last_pid = process.pid
+        if worker.conn is not None:
+            worker.conn.close()
+            worker.conn = None
+        # 排空后退出 / 等待被替代期间退出 → 移除槽位（替代槽位已在启动）
+        if worker.draining or worker.replacement is not None:
+            self._remove_worker(worker)
+            return
+        if uptime >= self.process_pool_config["min_uptime"]:
+            worker.failures = 0
+        else:
+            worker.failures += 1
+        # 首次崩溃立即重建；连续崩溃才退避
+        if worker.failures <= 1:
+            self._respawn(worker)
+            return
+        delay = min(
+            self.process_pool_config["respawn_backoff_base"] * 2 ** (worker.failures - 2),
+            self.process_pool_config["respawn_backoff_max"]
+        )
+        worker.restart_at = time.monotonic() + delay
+        logWarning(f"⏳ Waitress进程连续崩溃 {worker.failures} 次，{delay:.1f} 秒后重建（槽位 {worker.slot}）")
+
+    def _respawn(self, worker: WorkerHandle) -> None:
+        respawn_started = time.perf_counter()
+        self._spawn(worker)
+        worker.restarts += 1
+        logInfo(f"♻️ Waitress进程已重建（PID:{worker.last_pid} → {worker.process.pid}），"
+                f"耗时 {(time.perf_counter() - respawn_started) * 1000:.1f} ms"
+                f"（启动方式：{self.process_pool_config['start_method']}）")
+
+    def _drain_worker(self, worker: WorkerHandle) -> None:
+        """下发排空指令：子进程停止接收新连接，处理完在途请求后自行退出"""
+        from app.infrastructure.http.worker import MSG_DRAIN
+        worker.draining = True
+        if worker.process is None:
+            # 正在退避等待重建的槽位直接移除
+            self._remove_worker(worker)
+            return
+        try:
+            worker.conn.send((MSG_DRAIN, None))
+        except (AttributeError, OSError):
+            # 控制管道不可用，只能直接终止
+            worker.process.terminate()
+
+    def reload_handler(self, sig, frame):
+        """SIGHUP：只置标记并唤醒监控循环（信号处理函数中不做耗时操作）"""
+        self._reload_requested = True
+        try:
+            self._wake_w.send_bytes(b"1")
+        except OSError:
+            pass
+
+    def _reload(self) -> None:
+        """
+        重新读取 launch.yaml（与默认配置 deep_merge），之后新启动的子进程都使用新配置，
+        并把当前所有子进程加入替换队列，由 _continue_reload 逐个替换
+        """
+        logInfo("🔄 收到重载信号，重新加载配置")
+        try:
+            new_config = init_config_logger(self.workspace)
+        except Exception as e:
+            logError(f"❌ 重新加载配置失败，继续使用当前配置：{e}")
+            return
+        # 监听套接字/启动方式只在启动时生效，保持原值
+        old_waitress, old_pool = self.config["waitress"], self.config["process_pool"]
+        for section, key, old in (
+            ("waitress", "host", old_waitress["host"]),
+            ("waitress", "port", old_waitress["port"]),
+            ("process_pool", "backlog", old_pool["backlog"]),
+            ("process_pool", "reuse_port", old_pool["reuse_port"]),
+            ("process_pool", "start_method", old_pool["start_method"]),
+        ):
+            if new_config[section][key] != old:
+                logWarning(f"⚠️ {section}.{key} 修改为 {new_config[section][key]} 需要重启主进程才能生效，当前仍为 {old}")
+                new_config = new_config.with_value(section, key, old)
+        logging.getLogger().setLevel(new_config["log"]["level"].upper())
+        start_method = old_pool["start_method"]
+        if start_method != "spawn":
+            logWarning(f"⚠️ {start_method} 模式下子进程沿用主进程已导入的代码，本次重载只更新配置；代码修改需重启主进程")
+        if start_method == "fork":
+            # 用新配置重新创建预加载应用（旧应用的目录监视线程停掉）
+            if _PRELOADED_APP is not None:
+                _PRELOADED_APP.extensions["frontend_index"].stop_watcher()
+            preload_app(new_config)
+
+        self.config = new_config
+        self.process_pool_config = new_config["process_pool"]
+        self.waitress_config = new_config["waitress"]
+        self.autoscaler.min_workers, self.autoscaler.max_workers = self._worker_range(new_config)
+        self.autoscaler.config = new_config["autoscale"]
+
+        # 替换队列：当前所有在服务的旧进程
+        self._reload_queue = [worker for worker in self.serving_workers]
+        # 新范围下多出的进程直接排空，不足的补齐
+        while len(self._reload_queue) > self.autoscaler.max_workers:
+            self._drain_worker(self._reload_queue.pop())
+        for _ in range(self.autoscaler.min_workers - len(self.serving_workers)):
+            self._add_worker()
+        self._reloading = True
+        logInfo(f"🔁 开始滚动替换 {len(self._reload_queue)} 个子进程")
+
+    def _continue_reload(self) -> None:
+        """一次只替换一个：上一个替代进程就绪（旧进程开始排空）后再替换下一个"""
+        if not self._reloading or any(worker.replacement is not None for worker in self.workers):
+            return
+        while self._reload_queue:
+            worker = self._reload_queue.pop(0)
+            if worker in self.workers and not worker.draining:
+                self._recycle(worker, "配置重载")
+                return
+        self._reloading = False
+        logInfo("✅ 滚动替换完成")
+
+    def _on_ready(self, worker: WorkerHandle) -> None:
+        """子进程就绪：若它是替代进程，此时再排空被替代的旧进程"""
+        worker.ready = True
+        if self._profile is not None and not self._profile.reported and all(w.ready for w in self.serving_workers):
+            self._profile.mark(f"启动 {len(self.serving_workers)} 个子进程至全部就绪",
+                               time.perf_counter() - self._pool_started)
+            logInfo(self._profile.report("主进程"))
+        old = worker.replaces
+        if old is None:
+            return
+        worker.replaces = None
+        if old in self.workers and not old.draining:
+            logInfo(f"🔁 替代进程（槽位 {worker.slot}，PID:{worker.process.pid}）已就绪，开始排空槽位 {old.slot}")
+            self._drain_worker(old)
+
+    def _recycle(self, worker: WorkerHandle, reason: str) -> None:
+        """回收子进程：先启动替代进程，待其就绪后再排空旧进程，容量不出现缺口"""
+        if worker.draining or worker.replacement is not None or worker not in self.workers:
+            return
+        replacement = self._add_worker()
+        replacement.replaces = worker
+        worker.replacement = replacement
+        logInfo(f"♻️ 回收槽位 {worker.slot}（PID:{worker.process.pid if worker.process else '-'}，{reason}），"
+                f"替代槽位 {replacement.slot} 启动中")
+
+    def _remove_worker(self, worker: WorkerHandle) -> None:
+        self.workers.remove(worker)
+        # 替代进程还没就绪就被移除 → 旧进程恢复为正常槽位
+        if worker.replaces is not None:
+            worker.replaces.replacement = None
+            worker.replaces = None
+        if worker.replacement is not None:
+            worker.replacement.replaces = None
+            worker.replacement = None
+        row = self._scoreboard_row(worker)
+        if row is not None:
+            self.scoreboard.reset_row(row)
+        if self.metrics_dir is not None:
+            from app.infrastructure.metrics.registry import worker_snapshot_name
+            try:
+                os.remove(os.path.join(self.metrics_dir, worker_snapshot_name(worker.slot)))
+            except OSError:
+                pass
+        logInfo(f"➖ 槽位 {worker.slot} 已移除，当前 {len(self.serving_workers)} 个进程")
+
+    def _autoscale(self, now: float) -> None:
+        """汇总负载并按策略扩容/缩容一个进程"""
+        from app.infrastructure.http.listener import accept_queue_depth
+        from utils.autoscale import LoadSample
+        serving = self.serving_workers
+        reported = [worker.load for worker in serving if worker.load is not None]
+        threads = self.waitress_config["threads"]
+        busy_ratio = (
+            sum(load["busy"] + load["queued"] for load in reported) / (len(reported) * threads)
+            if reported else 0.0
+        )
+        alive = [worker for worker in serving if worker.ps is not None]
+        cpu = sum(worker.cpu for worker in alive) / len(alive) if alive else 0.0
+        sample = LoadSample(busy_ratio, cpu, accept_queue_depth(self.listen_socket))
+        decision = self.autoscaler.decide(now, len(serving), sample)
+        if decision > 0:
+            worker = self._add_worker()
+            logInfo(f"📈 负载持续偏高（忙碌 {busy_ratio:.0%}，CPU {cpu:.0f}%，accept队列 {sample.accept_queue}），"
+                    f"扩容到 {len(self.serving_workers)} 个进程（新增槽位 {worker.slot}）")
+        elif decision < 0:
+            # 优先移除正在退避的槽位，其次编号最大的
+            worker = max(serving, key=lambda w: (w.process is None, w.slot))
+            self._drain_worker(worker)
+            logInfo(f"📉 负载持续偏低（忙碌 {busy_ratio:.0%}，CPU {cpu:.0f}%），"
+                    f"缩容到 {len(self.serving_workers)} 个进程（排空槽位 {worker.slot}）")
+
+    def _create_scoreboard(self) -> None:
+        """
+        创建记分板：行数为 max_workers 的两倍（回收时新旧进程同时存在），
+        每行线程条目数留出余量，重载时调大 threads 仍可记录
+        """
+        from app.infrastructure.http.scoreboard import Scoreboard
+        rows = self.autoscaler.max_workers * 2
+        threads = max(self.waitress_config["threads"] * 2, 64)
+        self.scoreboard = Scoreboard.create(rows, threads)
+        logInfo(f"🩺 看门狗已开启：记分板 {rows} 行 × {threads} 线程（{self.scoreboard.shm.name}），"
+                f"所有线程忙碌超过 {self.config['watchdog']['hung_timeout']} 秒视为卡死")
+
+    def _check_hung(self) -> None:
+        """读取记分板：所有线程都忙于开始时间早于 hung_timeout 的请求 → 记录调用栈、立即排空并启动替代进程"""
+        from app.infrastructure.http.worker import MSG_DUMP_STACKS
+        watchdog = self.config["watchdog"]
+        threads = self.waitress_config["threads"]
+        if threads > self.scoreboard.threads:
+            return
+        now = time.time()
+        for worker in list(self.workers):
+            row = self._scoreboard_row(worker)
+            if row is None or worker.process is None or not worker.ready or worker.kill_at is not None:
+                continue
+            pid, _, states = self.scoreboard.read(row, threads)
+            # 行头PID不一致：新进程还没写入记分板
+            if pid != worker.process.pid or not states or not all(state.busy for state in states):
+                continue
+            newest = max(state.started_at for state in states)
+            if now - newest < watchdog["hung_timeout"]:
+                continue
+            requests = "；".join(f"{state.method} {state.path}（{now - state.started_at:.0f}s）" for state in states)
+            reason = f"{len(states)} 个线程均已忙碌超过 {now - newest:.0f} 秒"
+            logError(f"🚨 Waitress进程（PID:{pid}，槽位 {worker.slot}）疑似卡死：{reason}，请求：{requests}")
+            try:
+                worker.conn.send((MSG_DUMP_STACKS, reason))
+            except (AttributeError, OSError):
+                pass
+            # 卡死的进程无法处理新请求：先启动替代进程，同时立即排空（停止接收新连接），到期仍未退出则强制结束
+            self._recycle(worker, "看门狗判定卡死")
+            if not worker.draining:
+                self._drain_worker(worker)
+            worker.kill_at = time.monotonic() + watchdog["kill_after"]
+
+    def _sample_resources(self) -> None:
+        """资源采样（非阻塞）：超过阈值时告警，开启指标时写入主进程快照供 /metrics 输出"""
+        import psutil
+        samples = []
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.ps is None:
+                samples.append({"worker": worker.slot, "pid": None, "restarts": worker.restarts})
+                continue
+            try:
+                with worker.ps.oneshot():
+                    cpu = worker.ps.cpu_percent(None)
+                    mem = worker.ps.memory_percent()
+                    rss = worker.ps.memory_info().rss
+                    threads = worker.ps.num_threads()
+                    fds = worker.ps.num_fds() if hasattr(worker.ps, "num_fds") else worker.ps.num_handles()
+            except psutil.Error:
+                continue
+            worker.cpu = cpu
+            if cpu > self.process_pool_config["resource_warning_cpu"] or mem > self.process_pool_config["resource_warning_mem"]:
+                logDebug(f"⚠️ Waitress进程（PID:{worker.ps.pid}）资源过高：CPU {cpu}%，内存 {mem:.1f}%")
+            # 常驻内存超过上限 → 回收（替代进程就绪后再排空）
+            max_rss_mb = self.process_pool_config["max_rss_mb"]
+            if max_rss_mb and rss > max_rss_mb * 1024 * 1024:
+                self._recycle(worker, f"RSS {rss / 1024 / 1024:.0f}MB > {max_rss_mb}MB")
+            samples.append({
+                "worker": worker.slot,
+                "pid": worker.ps.pid,
+                "cpu_percent": cpu,
+                "rss_bytes": rss,
+                "threads": threads,
+                "open_fds": fds,
+                "uptime_seconds": round(now - worker.started_at, 3),
+                "restarts": worker.restarts,
+            })
+        if self.metrics_dir is None:
+            return
+        from app.infrastructure.metrics.registry import MASTER_SNAPSHOT, write_snapshot
+        try:
+            write_snapshot(os.path.join(self.metrics_dir, MASTER_SNAPSHOT), {
+                "time": time.time(),
+                "config": {
+                    "workers_serving": len(self.serving_workers),
+                    "min_workers": self.autoscaler.min_workers,
+                    "max_workers": self.autoscaler.max_workers,
+                    "threads": self.waitress_config["threads"],
+                    "connection_limit": self.waitress_config["connection_limit"],
+                },
+                "workers": samples,
+            })
+        except OSError as e:
+            logDebug(f"❌ 写入主进程指标快照失败：{e}")
+
+    def _reset_metrics_dir(self) -> None:
+        """清空上次运行遗留的快照，避免已不存在的子进程出现在 /metrics 中"""
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        for name in os.listdir(self.metrics_dir):
+            if name.endswith((".json", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.metrics_dir, name))
+                except OSError:
+                    pass
 
     def stop_all(self):
         self.is_running = False
+        self._stopping = True
         logInfo("\n🛑 开始停止所有Waitress进程...")
-        for process in self.wsgi_processes:
-            if process.is_alive():
-                try:
-                    process.terminate()
-                    process.join(timeout=5)
-                    if process.is_alive():
-                        process.kill()
-                    logDebug(f"✅ Waitress进程（PID:{process.pid}）已停止")
-                except Exception as e:
-                    logDebug(f"❌ 停止进程失败：{e}")
-        self.wsgi_processes.clear()
+        if self.render_rebuilder is not None:
+            self.render_rebuilder.stop()
+            self.render_rebuilder = None
+        # 先向所有子进程下发排空指令（与回收相同），等待在途请求完成后自行退出，超时后才强制终止
+        processes = self._drain_for_shutdown(self.process_pool_config["drain_timeout"])
+        for process in processes:
+            try:
+                process.terminate()
+            except Exception as e:
+                logDebug(f"❌ 停止进程失败：{e}")
+        for process in processes:
+            try:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.kill()
+                logDebug(f"✅ Waitress进程（PID:{process.pid}）已停止")
+            except Exception as e:
+                logDebug(f"❌ 停止进程失败：{e}")
+        for worker in self.workers:
+            if worker.conn is not None:
+                worker.conn.close()
+        self.workers.clear()
+        if self.listen_socket is not None:
+            self.listen_socket.close()
+            self.listen_socket = None
+        if self.scoreboard is not None:
+            self.scoreboard.unlink()
+            self.scoreboard = None
         logInfo("✅ 所有进程已停止")
+        if self.log_collector is not None:
+            self.log_collector.stop()
         print("bye")
 
+    def _drain_for_shutdown(self, drain_timeout: float) -> list:
+        """
+        下发排空指令并等待子进程退出，返回超时（或再次收到退出信号）后仍存活、需要强制终止的进程
+        子进程自身在 drain_timeout 后会强制关闭剩余连接，这里多等几秒留给它正常退出
+        """
+        from multiprocessing.connection import wait
+        from app.infrastructure.http.worker import MSG_DRAIN
+
+        pending = []
+        for worker in self.workers:
+            if worker.process is None or not worker.process.is_alive():
+                continue
+            try:
+                worker.conn.send((MSG_DRAIN, None))
+                pending.append(worker.process)
+            except (AttributeError, OSError):
+                # 控制管道不可用，只能直接终止
+                worker.process.terminate()
+        if pending:
+            logInfo(f"🚰 已向 {len(pending)} 个子进程下发排空指令，最多等待 {drain_timeout} 秒")
+        deadline = time.monotonic() + drain_timeout + 5
+        while pending and not self._force_stop:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logWarning(f"⚠️ {len(pending)} 个子进程排空超时，强制终止")
+                break
+            wait([process.sentinel for process in pending], timeout=min(remaining, 0.5))
+            pending = [process for process in pending if process.is_alive()]
+        return [process for process in self.wsgi_processes if process.is_alive()]
+
     def signal_handler(self, sig, frame):
+        if self._stopping:
+            logWarning(f"⚠️ 排空期间再次收到退出信号：{sig}，立即终止所有子进程")
+            self._force_stop = True
+            return
         logDebug(f"\n📢 捕获退出信号：{sig}")
         self.stop_all()
         sys.exit(0)
 
 
 if __name__ == "__main__":
-    start()
+    cli()
@@ -1,8 +1,34 @@
+import hashlib
+import json
 import os
 from pathlib import Path
 import sys
 
 
+def iter_directory(root_path: Path, ignore_dirs: list, max_depth: int):
+    """
+    遍历目录（os.walk封装），逐层产出 (深度, 当前目录, 文件列表)
+
+    Args:
+        root_path: 根目录绝对路径
+        ignore_dirs: 忽略的目录列表
+        max_depth: 最大递归深度
+    """
+    for root, dirs, files in os.walk(root_path):
+        # 计算当前深度
+        rel_path = Path(root).relative_to(root_path)
+        depth = len(rel_path.parts) if rel_path.parts else 0
+
+        # 超过最大深度则停止递归
+        if depth > max_depth:
+            dirs[:] = []  # 清空dirs，停止向下遍历
+            continue
+
+        # 过滤忽略的目录（排序保证输出稳定）
+        dirs[:] = sorted(d for d in dirs if d not in ignore_dirs)
+        yield depth, root, sorted(files)
+
+
 def print_directory_structure(
         root_dir: str,
         ignore_dirs: list = None,
@@ -48,19 +74,7 @@ def print_directory_structure(
     print("=== DDD核心目录会标注【DDD】===\n")
 
     # 遍历目录
-    for root, dirs, files in os.walk(root_path):
-        # 计算当前深度
-        rel_path = Path(root).relative_to(root_path)
-        depth = len(rel_path.parts) if rel_path.parts else 0
-
-        # 超过最大深度则停止递归
-        if depth > max_depth:
-            dirs[:] = []  # 清空dirs，停止向下遍历
-            continue
-
-        # 过滤忽略的目录
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-
+    for depth, root, files in iter_directory(root_path, ignore_dirs, max_depth):
         # 生成缩进
         indent = "    " * depth
         # 当前目录名称
@@ -79,7 +93,70 @@ def print_directory_structure(
                 print(f"{file_indent}├── {file}")
 
 
+def build_asset_manifest(
+        root_dir: str,
+        output: str = None,
+        digest_size: int = 16
+):
+    """
+    为前端静态目录生成资源指纹清单（逻辑路径 → 带内容哈希的路径）
+
+    Args:
+        root_dir: 前端静态目录（如 blog-frontend/pages/front）
+        output: 清单输出路径，默认写到 root_dir/asset-manifest.json
+        digest_size: 指纹长度（十六进制字符数）
+
+    Returns:
+        清单字典
+    """
+    from app.infrastructure.static.compress import ENCODINGS
+    from app.infrastructure.static.manifest import MANIFEST_NAME, fingerprint_name
+
+    root_path = Path(root_dir).absolute()
+    if not root_path.exists():
+        print(f"错误：目录 {root_path} 不存在！")
+        return None
+    output_path = Path(output) if output else root_path / MANIFEST_NAME
+    # 不参与指纹的文件：入口页（必须短缓存）、清单本身、预压缩版本、临时文件
+    skip_suffixes = tuple(suffix for _, suffix in ENCODINGS) + (".tmp",)
+
+    assets = {}
+    for depth, root, files in iter_directory(root_path, ignore_dirs=[], max_depth=1000):
+        for file in files:
+            file_path = Path(root) / file
+            logical = file_path.relative_to(root_path).as_posix()
+            if logical in ("index.html", MANIFEST_NAME) or file.endswith(skip_suffixes):
+                continue
+            # 分块计算内容哈希，避免大文件一次性读入内存
+            hasher = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            st = file_path.stat()
+            digest = hasher.hexdigest()[:digest_size]
+            assets[logical] = {
+                "file": fingerprint_name(logical, digest),
+                "hash": digest,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+            }
+
+    manifest = {"version": 1, "algorithm": "sha256", "assets": assets}
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, output_path)  # 原子替换，服务进程不会读到半个清单
+    print(f"✅ 资源清单已生成：{output_path}（共 {len(assets)} 个资源）")
+    return manifest
+
+
 def main():
+    # python temp.py manifest <前端静态目录> → 生成资源指纹清单
+    if len(sys.argv) > 1 and sys.argv[1] == "manifest":
+        target_dir = sys.argv[2] if len(sys.argv) > 2 else os.getcwd()
+        build_asset_manifest(target_dir)
+        return
+
     # 获取当前执行目录（支持命令行参数指定目录）
     if len(sys.argv) > 1:
         target_dir = sys.argv[1]
@@ -0,0 +1,82 @@
+# 子进程数自动扩缩容策略：负载持续偏高时扩容、持续偏低时缩容（带滞回区间与冷却时间）
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class LoadSample:
+    """一次负载采样（所有在服务子进程的汇总）"""
+    busy_ratio: float  # (忙碌线程 + 排队任务) / 总线程数
+    cpu_percent: float  # 子进程平均CPU占用
+    accept_queue: Optional[int]  # 内核accept队列中等待的连接数（非Linux为None）
+
+
+class Autoscaler:
+    """
+    扩缩容决策（只做判断，不操作进程）：
+    - 任一指标超过扩容阈值并持续 up_after 秒 → 扩容一个；
+    - 所有指标都低于缩容阈值并持续 down_after 秒 → 缩容一个；
+    - 扩容阈值与缩容阈值之间为滞回区间，处于其中时两个计时都清零，避免来回抖动；
+    - 距上次调整不足 up_cooldown（扩容）/ down_cooldown（缩容）秒时不再调整。
+    """
+
+    def __init__(self, min_workers: int, max_workers: int, config: dict):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.config = config
+        self._high_since: Optional[float] = None
+        self._low_since: Optional[float] = None
+        self._last_scale_at = float("-inf")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > self.min_workers
+
+    def decide(self, now: float, current: int, sample: LoadSample) -> int:
+        """
+        :param now: 当前时间（time.monotonic）
+        :param current: 当前在服务的子进程数（不含排空中的进程）
+        :return: +1 扩容 / -1 缩容 / 0 保持
+        """
+        cfg = self.config
+        high = (
+            sample.busy_ratio >= cfg["up_busy_ratio"]
+            or sample.cpu_percent >= cfg["up_cpu"]
+            or (sample.accept_queue is not None and sample.accept_queue >= cfg["up_accept_queue"])
+        )
+        low = (
+            sample.busy_ratio <= cfg["down_busy_ratio"]
+            and sample.cpu_percent <= cfg["down_cpu"]
+            and not sample.accept_queue
+        )
+        if high:
+            self._low_since = None
+            if self._high_since is None:
+                self._high_since = now
+            if (current < self.max_workers
+                    and now - self._high_since >= cfg["up_after"]
+                    and now - self._last_scale_at >= self._cooldown(+1)):
+                return self._scaled(now, +1)
+        elif low:
+            self._high_since = None
+            if self._low_since is None:
+                self._low_since = now
+            if (current > self.min_workers
+                    and now - self._low_since >= cfg["down_after"]
+                    and now - self._last_scale_at >= self._cooldown(-1)):
+                return self._scaled(now, -1)
+        else:
+            self._high_since = None
+            self._low_since = None
+        return 0
+
+    def _cooldown(self, direction: int) -> float:
+        # 扩容冷却短（负载还在涨时尽快追加）；缩容冷却长（突发流量常有反复）
+        return self.config["up_cooldown"] if direction > 0 else self.config["down_cooldown"]
+
+    def _scaled(self, now: float, direction: int) -> int:
+        self._last_scale_at = now
+        # 重新计时：下一次调整需要负载再持续一个完整周期
+        self._high_since = now if direction == +1 else None
+        self._low_since = now if direction == -1 else None
+        return direction
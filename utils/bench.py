@@ -0,0 +1,247 @@
+# 本地压测：生成合成前端目录，按 launch.yaml 启动完整服务（主进程 + Waitress子进程），用长连接并发请求并统计延迟分位数
+import http.client
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+# 资源大小固定，保证不同提交之间的结果可比
+SMALL_ASSET_BYTES = 4 * 1024
+LARGE_ASSET_BYTES = 2 * 1024 * 1024  # 超过默认 cache_max_file_bytes（1MB），走大文件流式发送
+# (名称, 路径)：每个线程按固定顺序循环请求（起点按线程编号错开）
+TARGETS = (
+    ("root", "/"),
+    ("health", "/health"),
+    ("small_asset", "/assets/small.js"),
+    ("spa_fallback", "/posts/2024/hello-world"),
+    ("small_asset", "/assets/small.css"),
+    ("root", "/"),
+    ("health", "/health"),
+    ("spa_fallback", "/about"),
+    ("small_asset", "/assets/small.js"),
+    ("large_asset", "/assets/large.bin"),
+)
+
+
+def make_synthetic_frontend(root: Path) -> Path:
+    """生成合成前端目录（root/pages/front），返回 frontend.dir 应配置的路径（root）"""
+    front = root / "pages" / "front"
+    (front / "assets").mkdir(parents=True, exist_ok=True)
+    (front / "index.html").write_text(
+        "<!doctype html><html><head><meta charset=\"utf-8\"><title>bench</title>"
+        "<link rel=\"stylesheet\" href=\"/assets/small.css\"></head>"
+        "<body><div id=\"app\"></div><script src=\"/assets/small.js\"></script></body></html>\n",
+        encoding="utf-8"
+    )
+    line = "console.log('bench asset line for synthetic frontend');\n"
+    (front / "assets" / "small.js").write_text(line * (SMALL_ASSET_BYTES // len(line) + 1), encoding="utf-8")
+    line = ".bench{color:#333;margin:0 auto;padding:4px}\n"
+    (front / "assets" / "small.css").write_text(line * (SMALL_ASSET_BYTES // len(line) + 1), encoding="utf-8")
+    # 固定内容（非随机），避免压缩率等因素随运行变化
+    block = bytes(range(256)) * 4096
+    (front / "assets" / "large.bin").write_bytes(block * (LARGE_ASSET_BYTES // len(block)))
+    return root
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """最近秩法分位数（输入须已排序）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class RouteStats:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    bytes: int = 0
+
+    def merge(self, other: "RouteStats") -> None:
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        self.bytes += other.bytes
+
+    def summary(self, duration: float) -> dict:
+        values = sorted(self.latencies)
+        return {
+            "requests": len(values),
+            "errors": self.errors,
+            "rps": round(len(values) / duration, 1) if duration else 0.0,
+            "mb_per_s": round(self.bytes / duration / 1024 / 1024, 2) if duration else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+
+
+class LoadGenerator:
+    """
+    多线程长连接压测：每个线程一个 HTTP/1.1 keep-alive 连接，按 TARGETS 顺序循环请求，
+    非 2xx/3xx 或连接错误计为错误（连接出错后重建连接）
+    """
+
+    def __init__(self, host: str, port: int, concurrency: int, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def run(self, duration: float) -> tuple[dict, float]:
+        """压测 duration 秒，返回 ({名称: RouteStats}, 实际耗时)"""
+        stop = threading.Event()
+        results = [dict() for _ in range(self.concurrency)]
+        threads = [
+            threading.Thread(target=self._worker, args=(i, stop, results[i]), name=f"bench-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join(self.timeout)
+        elapsed = time.perf_counter() - started
+
+        merged: dict = {}
+        for per_thread in results:
+            for name, stats in per_thread.items():
+                merged.setdefault(name, RouteStats()).merge(stats)
+        return merged, elapsed
+
+    def _worker(self, index: int, stop: threading.Event, stats: dict) -> None:
+        conn: Optional[http.client.HTTPConnection] = None
+        position = index
+        while not stop.is_set():
+            name, path = TARGETS[position % len(TARGETS)]
+            position += 1
+            route = stats.setdefault(name, RouteStats())
+            if conn is None:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                route.errors += 1
+                conn.close()
+                conn = None
+                continue
+            elapsed = time.perf_counter() - started
+            if response.status >= 400:
+                route.errors += 1
+            else:
+                route.latencies.append(elapsed)
+                route.bytes += len(body)
+            if response.will_close:
+                conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def wait_healthy(host: str, port: int, process: subprocess.Popen, timeout: float) -> bool:
+    """轮询 /health 直到返回 200；服务进程提前退出或超时返回 False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return True
+            conn.close()
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 15.0) -> None:
+    """向主进程发送 SIGINT（Windows 为 CTRL_BREAK），由其正常停止所有子进程；超时则强制结束"""
+    if process.poll() is not None:
+        return
+    try:
+        process.send_signal(signal.CTRL_BREAK_EVENT if os.name == "nt" else signal.SIGINT)
+        process.wait(timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        process.kill()
+        process.wait()
+
+
+def run_point(config: dict, workdir: Path, concurrency: int, duration: float, warmup: float,
+              boot_timeout: float) -> dict:
+    """
+    压测一个参数组合：在 workdir 写入 launch.yaml（config 为完整配置）并以子进程启动 run.py start，压测后停止
+    :return: 该组合的汇总结果
+    """
+    host, port = config["waitress"]["host"], config["waitress"]["port"]
+    workdir.mkdir(parents=True, exist_ok=True)
+    with open(workdir / "launch.yaml", "w", encoding="utf-8") as f:
+        yaml.dump(config, f, indent=4, allow_unicode=True, sort_keys=False)
+
+    run_py = Path(__file__).resolve().parent.parent / "run.py"
+    creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == "nt" else 0
+    with open(workdir / "server.log", "wb") as server_log:
+        process = subprocess.Popen(
+            [sys.executable, str(run_py), "start", "--workspace", str(workdir)],
+            cwd=str(run_py.parent), stdout=server_log, stderr=subprocess.STDOUT, creationflags=creationflags
+        )
+        try:
+            if not wait_healthy(host, port, process, boot_timeout):
+                raise RuntimeError(f"服务未能在 {boot_timeout} 秒内就绪，详见 {workdir / 'server.log'}")
+            generator = LoadGenerator(host, port, concurrency)
+            if warmup > 0:
+                # 预热：等所有子进程就绪、缓存填满，结果丢弃
+                generator.run(warmup)
+            stats, elapsed = generator.run(duration)
+        finally:
+            stop_server(process)
+
+    total = RouteStats()
+    for route in stats.values():
+        total.merge(route)
+    return {
+        "threads": config["waitress"]["threads"],
+        "wsgi_process_num": config["process_pool"]["wsgi_process_num"],
+        "total": total.summary(elapsed),
+        "routes": {name: stats[name].summary(elapsed) for name in sorted(stats)},
+    }
+
+
+def environment_info() -> dict:
+    """运行环境（结果中一并记录，便于判断不同提交的结果是否可比）"""
+    commit = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(Path(__file__).resolve().parent.parent),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
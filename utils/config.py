@@ -1,6 +1,12 @@
-from dotenv import load_dotenv
+import difflib
+import hashlib
+import json
+import logging
+import multiprocessing
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Callable, Optional
 
 
 @dataclass(frozen=True)
@@ -17,6 +23,8 @@ class AppConfig:
 def load_config(PROJECT_ROOT: str) -> AppConfig:
     env_file = PROJECT_ROOT / ".env"
     if env_file.exists():
+        # 按需导入：utils 包被所有进程导入，dotenv 只在这里用到
+        from dotenv import load_dotenv
         load_dotenv(env_file)
         logInfo(f"✅ 加载.env配置：{env_file}")
     else:
@@ -24,3 +32,393 @@ def load_config(PROJECT_ROOT: str) -> AppConfig:
 
     logInfo(f"📝 日志配置完成 - 级别：{config.LOG_LEVEL} | 目录：{config.LOG_DIR}")
 
+
+# ==================== 启动配置（launch.yaml） ====================
+# 合并默认值并校验后的启动配置：冻结的 slots dataclass，兼容原先的字典式访问 config["waitress"]["threads"]。
+# 解析结果按 launch.yaml 的 mtime + 内容哈希缓存为 JSON 快照，文件未修改时跳过 YAML 解析与合并。
+# 快照只保存普通字典，读取时仍经过 from_dict 校验（不反序列化任意对象，工作目录中的快照文件无法注入代码）。
+
+# 快照格式版本：配置类结构变化时递增，使旧快照失效
+SNAPSHOT_VERSION = 6
+
+
+class ConfigError(ValueError):
+    """配置校验失败（消息包含出错的键路径，如 process_pool.max_workers）"""
+
+
+def deep_merge(default: dict, custom: dict) -> dict:
+    """
+    深度合并两个字典：
+    - 自定义配置（custom）覆盖默认配置（default）的同名键；
+    - 嵌套字典逐层合并，而非整体替换；
+    - 非字典类型直接覆盖，字典类型递归合并。
+    """
+    merged = default.copy()  # 先复制默认配置（避免修改原字典）
+    for key, value in custom.items():
+        # 如果自定义值是字典，且默认配置中该键也是字典 → 递归合并
+        if isinstance(value, dict) and key in merged and isinstance(merged[key], dict):
+            merged[key] = deep_merge(merged[key], value)
+        # 否则直接覆盖（非字典类型/默认配置无此键）
+        else:
+            merged[key] = value
+    return merged
+
+
+def _rule(check: Callable, hint: str) -> dict:
+    """字段校验规则：check(值) 为 False 时报错，hint 为期望说明"""
+    return {"check": check, "hint": hint}
+
+
+def _alias(key: str) -> dict:
+    """YAML 中的键名与字段名不同（如 Python 关键字 async）"""
+    return {"key": key}
+
+
+def _positive(hint: str = "必须 > 0") -> dict:
+    return _rule(lambda v: v > 0, hint)
+
+
+def _non_negative(hint: str = "必须 >= 0") -> dict:
+    return _rule(lambda v: v >= 0, hint)
+
+
+def _one_of(*choices) -> dict:
+    return _rule(lambda v: v in choices, f"可选：{'/'.join(choices)}")
+
+
+_ratio = _rule(lambda v: 0 <= v <= 1, "必须在 0~1 之间")
+_percent = _rule(lambda v: 0 <= v <= 100, "必须在 0~100 之间")
+_port = _rule(lambda v: 1 <= v <= 65535, "必须在 1~65535 之间")
+
+
+def _check_type(value, annotation, path: str):
+    """按字段类型检查并规整取值（int 可用于 float 字段；bool 不能当作数字）"""
+    if annotation is bool:
+        if isinstance(value, bool):
+            return value
+    elif annotation is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif annotation is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif annotation is str:
+        if isinstance(value, str):
+            return value
+    elif annotation == tuple[str, ...]:
+        if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+            return tuple(value)
+    else:
+        return value
+    expected = {bool: "true/false", int: "整数", float: "数字", str: "字符串"}.get(annotation, "字符串列表")
+    raise ConfigError(f"{path}：应为{expected}，实际为 {value!r}")
+
+
+class ConfigSection:
+    """配置节基类：由字典构建并校验；支持 config["key"] / config.get("key", default) 的字典式访问"""
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._field_name(key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, self._field_name(key), default)
+
+    def __contains__(self, key: str) -> bool:
+        return self._field_name(key) in self.__dataclass_fields__
+
+    @classmethod
+    def _key(cls, f) -> str:
+        return f.metadata.get("key") or f.name
+
+    @classmethod
+    def _field_name(cls, key: str) -> str:
+        if key in cls.__dataclass_fields__:
+            return key
+        for f in fields(cls):
+            if cls._key(f) == key:
+                return f.name
+        return key
+
+    @classmethod
+    def from_dict(cls, data, path: str = ""):
+        """
+        由（已与默认值合并的）字典构建
+        :raise ConfigError: 缺少键/未知键/类型错误/取值超出范围
+        """
+        if not isinstance(data, dict):
+            raise ConfigError(f"{path or '顶层'}：应为映射（键: 值），实际为 {data!r}")
+        known = {cls._key(f): f for f in fields(cls)}
+        prefix = f"{path}." if path else ""
+        for key in data:
+            if key not in known:
+                close = difflib.get_close_matches(str(key), list(known), n=1)
+                suggestion = f"，是否为 {prefix}{close[0]}？" if close else f"，可用的键：{', '.join(known)}"
+                raise ConfigError(f"{prefix}{key}：未知配置项{suggestion}")
+        values = {}
+        for key, f in known.items():
+            key_path = f"{prefix}{key}"
+            if key not in data:
+                raise ConfigError(f"{key_path}：缺少配置项")
+            annotation = f.type
+            if isinstance(annotation, type) and issubclass(annotation, ConfigSection):
+                value = annotation.from_dict(data[key], key_path)
+            else:
+                value = _check_type(data[key], annotation, key_path)
+                check = f.metadata.get("check")
+                if check is not None and not check(value):
+                    raise ConfigError(f"{key_path}：{f.metadata['hint']}，实际为 {value!r}")
+            values[f.name] = value
+        section = cls(**values)
+        section.validate(path)
+        return section
+
+    def validate(self, path: str) -> None:
+        """跨字段校验（子类覆盖）"""
+
+    def to_dict(self) -> dict:
+        """转换回普通字典（YAML 键名，元组转列表），用于写出 launch.yaml"""
+        result = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, ConfigSection):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = list(value)
+            result[self._key(f)] = value
+        return result
+
+
+@dataclass(frozen=True, slots=True)
+class ServerConfig(ConfigSection):
+    host: str
+    port: int = field(metadata=_port)
+    reload: bool
+    workers: int = field(metadata=_positive())
+
+
+@dataclass(frozen=True, slots=True)
+class LogConfig(ConfigSection):
+    level: str = field(metadata=_rule(
+        lambda v: v.upper() in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"), "可选：DEBUG/INFO/WARNING/ERROR/CRITICAL"
+    ))
+    path: str
+    use_json: bool
+    backup_count: int = field(metadata=_non_negative())
+    max_bytes: int = field(metadata=_non_negative())
+    compress: bool
+    retention_days: int = field(metadata=_non_negative())
+    retention_max_bytes: int = field(metadata=_non_negative())
+    async_mode: bool = field(metadata=_alias("async"))
+    async_queue_size: int = field(metadata=_positive())
+    async_overflow: str = field(metadata=_one_of("block", "drop_debug", "drop_oldest"))
+    async_batch_size: int = field(metadata=_positive())
+    async_flush_interval: float = field(metadata=_positive())
+    collect_workers: bool
+
+
+@dataclass(frozen=True, slots=True)
+class DependenciesConfig(ConfigSection):
+    check_db: bool
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseConfig(ConfigSection):
+    url: str = field(metadata=_rule(lambda v: v.startswith("sqlite:///"), "必须为 sqlite:///<文件路径>"))
+    synchronous: str = field(metadata=_one_of("OFF", "NORMAL", "FULL", "EXTRA"))
+    busy_timeout_ms: int = field(metadata=_non_negative())
+    cache_size_kb: int = field(metadata=_non_negative())
+    mmap_size_mb: int = field(metadata=_non_negative())
+    cached_statements: int = field(metadata=_non_negative())
+    write_batch_size: int = field(metadata=_positive())
+    write_flush_interval: float = field(metadata=_positive())
+
+
+@dataclass(frozen=True, slots=True)
+class RenderConfig(ConfigSection):
+    cache_max_bytes: int = field(metadata=_non_negative())
+    rebuild_on_start: bool
+    rebuild_processes: int = field(metadata=_non_negative())
+    rebuild_batch: int = field(metadata=_positive())
+
+
+@dataclass(frozen=True, slots=True)
+class SearchConfig(ConfigSection):
+    max_ranked: int = field(metadata=_non_negative())
+    cache_max_bytes: int = field(metadata=_non_negative())
+    snippet_width: int = field(metadata=_positive())
+
+
+@dataclass(frozen=True, slots=True)
+class WaitressConfig(ConfigSection):
+    host: str
+    port: int = field(metadata=_port)
+    threads: int = field(metadata=_positive())
+    connection_limit: int = field(metadata=_positive())
+    access_log_path: str
+    error_log_path: str
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessPoolConfig(ConfigSection):
+    wsgi_process_num: int = field(metadata=_positive())
+    check_interval: float = field(metadata=_positive())
+    min_uptime: float = field(metadata=_non_negative())
+    respawn_backoff_base: float = field(metadata=_non_negative())
+    respawn_backoff_max: float = field(metadata=_non_negative())
+    resource_warning_cpu: float = field(metadata=_non_negative())
+    resource_warning_mem: float = field(metadata=_percent)
+    start_method: str = field(metadata=_one_of("spawn", "fork", "forkserver"))
+    reuse_port: bool
+    backlog: int = field(metadata=_positive())
+    min_workers: int = field(metadata=_non_negative())
+    max_workers: int = field(metadata=_non_negative())
+    report_interval: float = field(metadata=_positive())
+    drain_timeout: float = field(metadata=_non_negative())
+    max_requests: int = field(metadata=_non_negative())
+    max_requests_jitter: int = field(metadata=_non_negative())
+    max_rss_mb: int = field(metadata=_non_negative())
+    ready_check_path: str = field(metadata=_rule(lambda v: v == "" or v.startswith("/"), "必须为空或以 / 开头"))
+
+    def validate(self, path: str) -> None:
+        if self.min_workers and self.max_workers and self.max_workers < self.min_workers:
+            raise ConfigError(f"{path}.max_workers：不能小于 min_workers（{self.min_workers}），实际为 {self.max_workers}")
+        if self.start_method not in multiprocessing.get_all_start_methods():
+            raise ConfigError(f"{path}.start_method：当前平台不支持 {self.start_method}，"
+                              f"可选：{'/'.join(multiprocessing.get_all_start_methods())}")
+
+
+@dataclass(frozen=True, slots=True)
+class WatchdogConfig(ConfigSection):
+    enabled: bool
+    interval: float = field(metadata=_positive())
+    hung_timeout: float = field(metadata=_positive())
+    kill_after: float = field(metadata=_non_negative())
+    status_page: bool
+
+
+@dataclass(frozen=True, slots=True)
+class AdmissionConfig(ConfigSection):
+    enabled: bool
+    max_in_flight: int = field(metadata=_non_negative())
+    max_queue_wait: float = field(metadata=_non_negative())
+    retry_after: int = field(metadata=_non_negative())
+    trust_request_start: bool
+    bypass_paths: tuple[str, ...] = field(metadata=_rule(
+        lambda v: all(p.startswith("/") for p in v), "每一项都必须以 / 开头"
+    ))
+    bypass_static: bool
+
+
+@dataclass(frozen=True, slots=True)
+class AutoscaleConfig(ConfigSection):
+    interval: float = field(metadata=_positive())
+    up_busy_ratio: float = field(metadata=_ratio)
+    up_cpu: float = field(metadata=_non_negative())
+    up_accept_queue: int = field(metadata=_non_negative())
+    up_after: float = field(metadata=_non_negative())
+    up_cooldown: float = field(metadata=_non_negative())
+    down_busy_ratio: float = field(metadata=_ratio)
+    down_cpu: float = field(metadata=_non_negative())
+    down_after: float = field(metadata=_non_negative())
+    down_cooldown: float = field(metadata=_non_negative())
+
+    def validate(self, path: str) -> None:
+        # 缩容阈值必须低于扩容阈值，否则没有滞回区间，进程数会来回抖动
+        if self.down_busy_ratio >= self.up_busy_ratio:
+            raise ConfigError(f"{path}.down_busy_ratio：必须小于 up_busy_ratio（{self.up_busy_ratio}），"
+                              f"实际为 {self.down_busy_ratio}")
+        if self.down_cpu >= self.up_cpu:
+            raise ConfigError(f"{path}.down_cpu：必须小于 up_cpu（{self.up_cpu}），实际为 {self.down_cpu}")
+
+
+@dataclass(frozen=True, slots=True)
+class FrontendConfig(ConfigSection):
+    dir: str
+    index_refresh_interval: float = field(metadata=_positive())
+    cache_max_bytes: int = field(metadata=_non_negative())
+    cache_max_file_bytes: int = field(metadata=_non_negative())
+    precompress_min_size: int = field(metadata=_non_negative())
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsConfig(ConfigSection):
+    enabled: bool
+    dir: str
+    flush_interval: float = field(metadata=_positive())
+
+
+@dataclass(frozen=True, slots=True)
+class LaunchConfig(ConfigSection):
+    """launch.yaml 的完整配置（与默认值合并后）"""
+    server: ServerConfig
+    log: LogConfig
+    dependencies: DependenciesConfig
+    database: DatabaseConfig
+    render: RenderConfig
+    search: SearchConfig
+    waitress: WaitressConfig
+    process_pool: ProcessPoolConfig
+    watchdog: WatchdogConfig
+    admission: AdmissionConfig
+    autoscale: AutoscaleConfig
+    frontend: FrontendConfig
+    metrics: MetricsConfig
+
+    def with_value(self, section: str, key: str, value) -> "LaunchConfig":
+        """返回替换了 section.key 的新配置（配置对象不可修改）"""
+        part = self[section]
+        return replace(self, **{section: replace(part, **{part._field_name(key): value})})
+
+
+def _defaults_digest(defaults: dict) -> str:
+    # 默认值（含由工作目录推导的路径）变化时快照失效
+    return hashlib.sha256(repr(defaults).encode("utf-8")).hexdigest()
+
+
+def load_launch_config(config_path: Path, defaults: dict, snapshot_path: Optional[Path] = None) -> LaunchConfig:
+    """
+    读取 launch.yaml：与默认值深度合并并校验
+    1. 快照的键（launch.yaml 的 mtime + 内容哈希 + 默认值哈希 + 快照版本）一致时由快照中的字典重建（仍做校验）；
+    2. 否则用 libyaml 的 CSafeLoader（未安装时退回纯Python的 SafeLoader）解析，合并、校验后写入新快照。
+    :raise ConfigError: 配置校验失败
+    :raise yaml.YAMLError: YAML 格式错误
+    """
+    content = config_path.read_bytes()
+    key = [
+        SNAPSHOT_VERSION,
+        config_path.stat().st_mtime_ns,
+        hashlib.sha256(content).hexdigest(),
+        _defaults_digest(defaults),
+    ]
+    if snapshot_path is not None:
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot["key"] == key:
+                return LaunchConfig.from_dict(snapshot["config"])
+        except (OSError, ValueError, KeyError, TypeError):
+            # 快照不存在/损坏/校验不通过/来自旧版本代码 → 重新解析（ConfigError 也是 ValueError）
+            pass
+
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    custom = yaml.load(content, Loader=loader) or {}  # 空文件返回空字典，避免 None
+    if not isinstance(custom, dict):
+        raise ConfigError(f"顶层应为映射（键: 值），实际为 {custom!r}")
+    config = LaunchConfig.from_dict(deep_merge(defaults, custom))
+
+    if snapshot_path is not None:
+        try:
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "config": config.to_dict()}, f, ensure_ascii=False)
+            os.replace(tmp_path, snapshot_path)
+        except (OSError, TypeError, ValueError) as e:
+            # 快照只是加速手段，写不了（如只读目录）不影响启动
+            logging.getLogger(__name__).debug("写入配置快照失败：%s", e)
+    return config
@@ -0,0 +1,109 @@
+# 多进程日志汇集：Waitress子进程只把日志记录发给主进程，由主进程统一写文件、轮转
+import logging
+import logging.handlers
+import queue
+import threading
+
+from utils.logger import output_handlers, write_records
+
+
+class LogCollector:
+    """
+    主进程日志收集器：
+    - 所有子进程通过同一个 multiprocessing.Queue（底层为管道）发送日志记录；
+    - 收集线程批量取出记录，直接写入主进程的文件/控制台Handler，每批只 flush 一次；
+    - 日志文件只有主进程一个写者，轮转不再在多个进程间竞争。
+    """
+
+    def __init__(self, mp_context, queue_size: int = 10000, batch_size: int = 256, flush_interval: float = 0.5):
+        """
+        :param mp_context: multiprocessing 上下文（与子进程启动方式一致）
+        :param queue_size: 队列容量（子进程发送过快时按溢出策略处理）
+        :param batch_size: 每批最多写入的记录数
+        :param flush_interval: 无新记录时最长等待多久（秒）
+        """
+        self.queue = mp_context.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="LogCollector", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        targets = output_handlers()
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if record is None:  # 停止标记
+                return
+            batch = [record]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            write_records(targets, batch)
+            if stop:
+                return
+
+    def stop(self, timeout: float = 5) -> None:
+        """写完队列中剩余的记录后停止"""
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except (queue.Full, ValueError, OSError):
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+
+class WorkerQueueHandler(logging.handlers.QueueHandler):
+    """
+    子进程日志Handler：记录在本进程内合并好消息与异常堆栈后发给主进程
+    队列满时：overflow 为 block 则等待，否则丢弃DEBUG记录（跨进程队列无法丢弃最旧记录）
+    """
+
+    def __init__(self, log_queue, overflow: str = "block"):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow != "block" and record.levelno <= logging.DEBUG:
+                self.dropped += 1
+                return
+            self.queue.put(record)
+
+
+def init_worker_logger(log_queue, level: str = "INFO", overflow: str = "block") -> None:
+    """
+    子进程日志初始化：只挂一个发往主进程的队列Handler（不再各自打开日志文件）
+    fork 模式下继承来的Handler要关闭而不只是移除：否则子进程一直持有主进程的日志文件，
+    fork 后重新启动的异步写线程/压缩线程也会一直运行
+    """
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        try:
+            handler.close()
+        except Exception:
+            pass
+    root_logger.setLevel(level.upper())
+    root_logger.addHandler(WorkerQueueHandler(log_queue, overflow))
@@ -0,0 +1,263 @@
+# 日志轮转：按日期与大小切分，切下来的文件由后台线程 gzip 压缩，并按保留天数/总大小/个数清理
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Optional
+
+# 未关闭的压缩器（弱引用）；fork 出的子进程没有压缩线程，由模块级钩子统一重新创建
+_compressors: "weakref.WeakSet[LogCompressor]" = weakref.WeakSet()
+
+
+def _restart_after_fork() -> None:
+    for compressor in list(_compressors):
+        compressor._init_state()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class LogCompressor:
+    """
+    后台压缩线程：轮转时只把文件名放入队列（请求线程/日志写线程不做压缩），
+    压缩完成后按保留策略清理旧日志
+    """
+
+    def __init__(self, log_dir: str, prefix: str, compress: bool = True, retention_days: int = 0,
+                 retention_max_bytes: int = 0, backup_count: int = 0):
+        """
+        :param retention_days: 已轮转日志最多保留多少天（按修改时间，0 表示不限）
+        :param retention_max_bytes: 日志目录中本类日志的总字节数上限（含当前文件，0 表示不限）
+        :param backup_count: 已轮转日志最多保留多少个（0 表示不限）
+        """
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.compress = compress
+        self.retention_days = retention_days
+        self.retention_max_bytes = retention_max_bytes
+        self.backup_count = backup_count
+        # app.2026-10-18.3.log / app.2026-10-18.3.log.gz
+        self._rotated = re.compile(rf"^{re.escape(prefix)}\.\d{{4}}-\d{{2}}-\d{{2}}\.\d+\.log(\.gz)?$")
+        self._init_state()
+        _compressors.add(self)
+
+    def _init_state(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="LogCompressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Optional[str]) -> None:
+        """压缩 path（None 表示只执行一次清理）"""
+        self._queue.put(path)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """等待已提交的压缩任务完成"""
+        _compressors.discard(self)
+        self._queue.put(StopIteration)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            if path is StopIteration:
+                return
+            try:
+                if path is not None and self.compress:
+                    self._gzip(path)
+                self.enforce_retention()
+            except OSError as e:
+                # 日志系统自身出错时不能再写日志，输出到标准错误
+                print(f"❌ 日志压缩/清理失败：{e}", file=sys.stderr)
+
+    @staticmethod
+    def _gzip(path: str) -> None:
+        # 先写临时文件再改名：压缩中途退出不会留下不完整的 .gz；临时文件名带进程号，多个进程互不覆盖
+        target = path + ".gz"
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(path, "rb") as source, gzip.open(tmp_path, "wb", compresslevel=6) as output:
+            shutil.copyfileobj(source, output, 1024 * 1024)
+        stat = os.stat(path)
+        os.utime(tmp_path, (stat.st_atime, stat.st_mtime))  # 保留时间用于按天数清理
+        os.replace(tmp_path, target)
+        os.remove(path)
+
+    def rotated_files(self) -> list[tuple[str, os.stat_result]]:
+        """已轮转的日志（含尚未压缩的），按修改时间从新到旧"""
+        files = []
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if self._rotated.match(entry.name):
+                    try:
+                        files.append((entry.path, entry.stat()))
+                    except FileNotFoundError:
+                        continue
+        files.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        return files
+
+    def enforce_retention(self) -> int:
+        """按个数、天数、总大小删除最旧的已轮转日志（当前写入的文件不删），返回删除的文件数"""
+        files = self.rotated_files()
+        oldest = time.time() - self.retention_days * 86400
+        total = sum(stat.st_size for stat in self._active_stats())
+        removed = 0
+        for index, (path, stat) in enumerate(files):
+            total += stat.st_size
+            if ((self.backup_count and index >= self.backup_count)
+                    or (self.retention_days and stat.st_mtime < oldest)
+                    or (self.retention_max_bytes and total > self.retention_max_bytes)):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def _active_stats(self) -> list[os.stat_result]:
+        active = re.compile(rf"^{re.escape(self.prefix)}\.\d{{4}}-\d{{2}}-\d{{2}}\.log$")
+        stats = []
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if active.match(entry.name):
+                    try:
+                        stats.append(entry.stat())
+                    except FileNotFoundError:
+                        continue
+        return stats
+
+
+class DailySizeRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    按日期 + 大小轮转的文件Handler：
+    - 当前文件为 <prefix>.<日期>.log，跨过零点或超过 max_bytes 时改名为 <prefix>.<日期>.<序号>.log，
+      交给 LogCompressor 在后台压缩为 .gz，再打开新文件（长期运行的进程也会按当天日期写文件）；
+    - 文件大小按写入的字符数估算，只在估算值接近上限时读取一次真实位置，不在每条记录上 flush/格式化两次；
+    - 多个进程写同一文件时（未开启 collect_workers），先轮转的进程改名后，其余进程发现文件已被换掉就直接重新打开；
+      启动时的遗留文件处理只由主进程执行（recover_leftovers），子进程不会删除/重复压缩其他进程正在处理的文件。
+    """
+
+    def __init__(self, log_dir: str, prefix: str = "app", max_bytes: int = 0, compressor: Optional[LogCompressor] = None,
+                 encoding: str = "utf-8", recover_leftovers: bool = True):
+        """
+        :param max_bytes: 单个文件的大小上限（0 表示只按日期轮转）
+        :param recover_leftovers: 启动时是否处理以前留下的文件（只应由一个进程执行）
+        """
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.compressor = compressor
+        self._date = datetime.now().date()
+        super().__init__(self._path(self._date), "a", encoding=encoding)
+        self._rollover_at = self._next_midnight()
+        self._reset_size()
+        if recover_leftovers:
+            self._rotate_leftovers()
+
+    def _path(self, date) -> str:
+        return os.path.join(self.log_dir, f"{self.prefix}.{date:%Y-%m-%d}.log")
+
+    def _next_midnight(self) -> float:
+        return datetime.combine(self._date + timedelta(days=1), datetime.min.time()).timestamp()
+
+    def _reset_size(self) -> None:
+        """_written：估算的当前文件字节数；_next_check：估算值达到它时读取真实大小"""
+        self._written = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._next_check = self._check_point(self._written)
+
+    def _check_point(self, size: int) -> int:
+        # UTF-8 每个字符最多 4 字节：剩余额度的 1/4 个字符写完之前不可能超过上限
+        return size + max((self.max_bytes - size) // 4, 4096)
+
+    def format(self, record: logging.LogRecord) -> str:
+        msg = super().format(record)
+        self._written += len(msg) + len(self.terminator)
+        return msg
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if record.created >= self._rollover_at:
+            return True
+        if self.max_bytes <= 0 or self._written < self._next_check or self.stream is None:
+            return False
+        size = self.stream.tell()  # 会先 flush，只在检查点执行
+        if size >= self.max_bytes:
+            return True
+        self._written = size
+        self._next_check = self._check_point(size)
+        return False
+
+    def doRollover(self) -> None:
+        replaced = self._replaced()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if not replaced:
+            self._rotate(self.baseFilename, self._date)
+        self._date = datetime.now().date()
+        self.baseFilename = os.path.abspath(self._path(self._date))
+        self._rollover_at = self._next_midnight()
+        self.stream = self._open()
+        self._reset_size()
+
+    def _replaced(self) -> bool:
+        """当前打开的文件是否已被其他进程轮转（改名后路径指向新文件或不存在）"""
+        if self.stream is None:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _rotate(self, path: str, date) -> None:
+        """把 path 改名为该日期下一个序号的文件并提交压缩（空文件直接删除）"""
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+                return
+        except OSError:
+            return
+        pattern = re.compile(rf"^{re.escape(self.prefix)}\.{date:%Y-%m-%d}\.(\d+)\.log(\.gz)?$")
+        sequence = 1 + max(
+            (int(match.group(1)) for match in map(pattern.match, os.listdir(self.log_dir)) if match is not None),
+            default=0,
+        )
+        rotated = os.path.join(self.log_dir, f"{self.prefix}.{date:%Y-%m-%d}.{sequence}.log")
+        try:
+            os.rename(path, rotated)
+        except OSError:
+            # Windows 上其他进程仍打开着该文件时不能改名：继续写原文件，下一次轮转再试
+            return
+        if self.compressor is not None:
+            self.compressor.submit(rotated)
+
+    def _rotate_leftovers(self) -> None:
+        """启动时处理以前留下的文件：往日的当前文件改名压缩，未压缩完的轮转文件重新压缩"""
+        if self.compressor is None:
+            return
+        active = re.compile(rf"^{re.escape(self.prefix)}\.(\d{{4}}-\d{{2}}-\d{{2}})\.log$")
+        for name in sorted(os.listdir(self.log_dir)):
+            match = active.match(name)
+            if match is not None and match.group(1) != f"{self._date:%Y-%m-%d}":
+                self._rotate(os.path.join(self.log_dir, name), datetime.strptime(match.group(1), "%Y-%m-%d").date())
+        for name in os.listdir(self.log_dir):
+            if name.startswith(f"{self.prefix}.") and ".log.gz." in name and name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.log_dir, name))
+                except OSError:
+                    pass
+        for path, _ in self.compressor.rotated_files():
+            if not path.endswith(".gz"):
+                self.compressor.submit(path)
+        self.compressor.submit(None)
+
+    def close(self) -> None:
+        super().close()
+        if self.compressor is not None:
+            self.compressor.close()
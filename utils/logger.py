@@ -1,9 +1,13 @@
 import logging
-import logging.handlers
 import os
 import json
 import inspect
-from logging import Logger, LogRecord
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from logging import Logger
 from typing import Optional, Tuple
 
 # ==================== 全局单例控制（极简版） ====================
@@ -12,17 +16,36 @@ def init_logger(
         level: str = "INFO",
         use_json: bool = False,
         max_bytes: int = 50 * 1024 * 1024,
-        backup_count: int = 30,
+        backup_count: int = 0,
+        compress: bool = True,
+        retention_days: int = 30,
+        retention_max_bytes: int = 1024 * 1024 * 1024,
+        async_mode: bool = False,
+        async_queue_size: int = 10000,
+        async_overflow: str = "block",
+        async_batch_size: int = 256,
+        async_flush_interval: float = 0.5,
+        recover_leftovers: bool = True,
 ) -> None:
-    """初始化全局日志（仅调用一次）"""
+    """
+    初始化全局日志（仅调用一次）
+    :param max_bytes: 单个日志文件的大小上限（0 表示只按日期轮转）
+    :param backup_count: 已轮转日志最多保留多少个（0 表示不限）
+    :param compress: 轮转下来的文件是否在后台 gzip 压缩
+    :param retention_days: 已轮转日志最多保留多少天（0 表示不限）
+    :param retention_max_bytes: 日志总大小上限（含当前文件，0 表示不限）
+    :param async_mode: 异步模式：请求线程只把记录放入有界队列，由单独的写线程批量写文件/控制台
+    :param async_queue_size: 异步队列容量
+    :param async_overflow: 队列满时的策略：block（等待）/drop_debug（丢弃DEBUG，其余等待）/drop_oldest（丢弃最旧记录）
+    :param async_batch_size: 写线程攒够多少条记录写一次
+    :param async_flush_interval: 写线程最长等待多久写一次（秒）
+    :param recover_leftovers: 是否处理以前留下的未压缩/压缩到一半的日志（多进程各自写文件时只由主进程处理）
+    """
     if logging.getLogger().handlers:  # 避免重复初始化
         return
 
     # 创建日志目录
     os.makedirs(log_dir, exist_ok=True)
-    # 日志文件名
-    from datetime import datetime
-    log_file = os.path.join(log_dir, f"app.{datetime.now().strftime('%Y-%m-%d')}.log")
 
     # 格式器
     if use_json:
@@ -46,10 +69,14 @@ def init_logger(
             datefmt="%Y-%m-%d %H:%M:%S",
         )
 
-    # 文件Handler
-    file_handler = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    # 文件Handler：app.<日期>.log，跨天或超过 max_bytes 时轮转，旧文件在后台压缩并按保留策略清理
+    from utils.log_rotation import DailySizeRotatingFileHandler, LogCompressor
+    compressor = LogCompressor(
+        log_dir, "app", compress=compress, retention_days=retention_days,
+        retention_max_bytes=retention_max_bytes, backup_count=backup_count,
     )
+    file_handler = DailySizeRotatingFileHandler(log_dir, "app", max_bytes=max_bytes, compressor=compressor,
+                                                recover_leftovers=recover_leftovers)
     file_handler.setFormatter(formatter)
     # 控制台Handler
     console_handler = logging.StreamHandler()
@@ -58,82 +85,252 @@ def init_logger(
     # 配置root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(level.upper())
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    if async_mode:
+        root_logger.addHandler(AsyncBatchHandler(
+            [file_handler, console_handler],
+            queue_size=async_queue_size,
+            overflow=async_overflow,
+            batch_size=async_batch_size,
+            flush_interval=async_flush_interval,
+        ))
+    else:
+        root_logger.addHandler(file_handler)
+        root_logger.addHandler(console_handler)
 
-# ==================== 核心：硬编码栈帧索引（根据调试结果修改） ====================
-def logInfo(msg: str, *args, **kwargs):
-    """全局INFO日志（硬编码栈帧索引，确保定位到父函数）"""
-    logger = logging.getLogger()
-    # 硬编码跳过3帧（根据调试结果调整，比如3）
-    stack = inspect.stack()
-    if len(stack) >= 4:  # 栈帧3是父函数
-        frame_info = stack[3]
-        # 手动构造LogRecord
-        record = LogRecord(
-            name=logger.name,
-            level=logging.INFO,
-            pathname=frame_info.filename,
-            lineno=frame_info.lineno,
-            msg=msg,
-            args=args,
-            exc_info=kwargs.get("exc_info"),
-            func=frame_info.function,
-        )
-        # 提取模块名（去掉路径和.py后缀）
-        record.module = os.path.basename(frame_info.filename).replace(".py", "")
-        record.process = os.getpid()
-        # 直接处理记录
-        logger.handle(record)
+
+# ==================== 异步日志（有界队列 + 单写线程批量写） ====================
+# 未关闭的异步Handler（弱引用）；fork 出的子进程没有写线程，由模块级钩子统一重新创建
+_async_handlers: "weakref.WeakSet[AsyncBatchHandler]" = weakref.WeakSet()
+
+
+def _restart_writers_after_fork() -> None:
+    for handler in list(_async_handlers):
+        if handler._closed:
+            _async_handlers.discard(handler)
+            continue
+        handler._init_state()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_writers_after_fork)
+
+
+class AsyncBatchHandler(logging.Handler):
+    """
+    异步批量日志Handler：
+    - emit 只把记录放入内存队列（请求线程不再持有文件锁、不做磁盘/控制台I/O）；
+    - 单独的写线程攒批后一次性写入目标Handler，每批只 flush 一次；
+    - 队列有界，满时按 overflow 策略处理。
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop_debug", "drop_oldest")
+
+    def __init__(
+            self,
+            targets: list,
+            queue_size: int = 10000,
+            overflow: str = "block",
+            batch_size: int = 256,
+            flush_interval: float = 0.5,
+    ):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的日志队列溢出策略：{overflow}，仅支持{'/'.join(self.OVERFLOW_POLICIES)}")
+        super().__init__()
+        self.targets = targets
+        self.queue_size = queue_size
+        self.overflow = overflow
+        # 攒批阈值不能超过队列容量，否则队列满时写线程仍在等待
+        self.batch_size = max(1, min(batch_size, queue_size))
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._init_state()
+        _async_handlers.add(self)
+
+    def _init_state(self) -> None:
+        self._buffer: deque = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._pending = 0  # 已出队但尚未写完的记录数（flush 时需要等待）
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="AsyncLogWriter", daemon=True)
+        self._writer.start()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 不获取 Handler 自身的锁：队列由条件变量保护，请求线程之间不再串行
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # 提前合并参数，避免写线程格式化时参数已被调用方修改
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+        except Exception:
+            self.handleError(record)
+            return
+        with self._cond:
+            if len(self._buffer) >= self.queue_size:
+                if self.overflow == "drop_oldest":
+                    self._buffer.popleft()
+                    self.dropped += 1
+                elif self.overflow == "drop_debug" and record.levelno <= logging.DEBUG:
+                    self.dropped += 1
+                    return
+                else:
+                    while len(self._buffer) >= self.queue_size and not self._closed:
+                        self._cond.notify_all()  # 立即唤醒写线程腾出空间
+                        self._cond.wait()
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._buffer) < self.batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._pending = len(batch)
+                # 唤醒因队列满而阻塞的生产者
+                self._cond.notify_all()
+                if not batch and self._closed:
+                    return
+            if batch:
+                self._write_batch(batch)
+            with self._cond:
+                self._pending = 0
+                self._cond.notify_all()
+
+    def _write_batch(self, batch: list) -> None:
+        write_records(self.targets, batch)
+
+    def flush(self) -> None:
+        """等待队列中已有的记录全部写出"""
+        with self._cond:
+            self._cond.notify_all()
+            while (self._buffer or self._pending) and self._writer.is_alive():
+                self._cond.wait(0.1)
+
+    def close(self) -> None:
+        _async_handlers.discard(self)
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        for target in self.targets:
+            target.close()
+        super().close()
+
+def write_records(targets: list, batch: list) -> None:
+    """把一批记录写入目标Handler（StreamHandler/FileHandler 整批只 flush 一次，保留文件轮转判断）"""
+    for target in targets:
+        if isinstance(target, logging.StreamHandler):
+            _write_stream_batch(target, batch)
+        else:
+            for record in batch:
+                if record.levelno >= target.level:
+                    target.handle(record)
+
+
+def _write_stream_batch(target: logging.StreamHandler, batch: list) -> None:
+    should_rollover = getattr(target, "shouldRollover", None)
+    with target.lock:
+        for record in batch:
+            if record.levelno < target.level or not target.filter(record):
+                continue
+            try:
+                if should_rollover is not None and should_rollover(record):
+                    target.stream.flush()
+                    target.doRollover()
+                if target.stream is None:
+                    target.stream = target._open()
+                target.stream.write(target.format(record) + target.terminator)
+            except Exception:
+                target.handleError(record)
+        try:
+            if target.stream is not None:
+                target.stream.flush()
+        except Exception:
+            pass
+
+
+def output_handlers() -> list:
+    """root logger 实际负责输出的Handler（异步模式下展开为写线程的目标Handler）"""
+    handlers = []
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, AsyncBatchHandler):
+            handlers.extend(handler.targets)
+        else:
+            handlers.append(handler)
+    return handlers
+
+
+# ==================== 核心：快速日志入口 ====================
+# root logger 在进程内是同一个对象，缓存引用避免每次 getLogger()
+_root_logger = logging.getLogger()
+# sys._getframe 只定位需要的那一帧（inspect.stack() 会为整条调用栈构造 FrameInfo 并读取源码行）
+_getframe = getattr(sys, "_getframe", None)
+
+
+def _log(level: int, msg: str, args: tuple, exc_info=None, stacklevel: int = 1) -> None:
+    """
+    所有 logXxx 共用的快速路径
+    :param stacklevel: 调用者相对 logXxx 的层数（1 = 直接调用 logXxx 的函数）
+    """
+    logger = _root_logger
+    # 1. 级别未启用 → 直接返回（isEnabledFor 有按级别的缓存，几乎零开销）
+    if not logger.isEnabledFor(level):
+        return
+    # 2. 只向上走 stacklevel+1 帧（跳过 _log 与 logXxx 本身）定位调用者
+    if _getframe is not None:
+        frame = _getframe(stacklevel + 1)
     else:
-        # 兜底
-        logger.info(msg, *args, **kwargs)
+        frame = inspect.currentframe()
+        for _ in range(stacklevel + 1):
+            frame = frame.f_back
+    code = frame.f_code
+    if exc_info and not isinstance(exc_info, (tuple, BaseException)):
+        exc_info = sys.exc_info()
+    elif isinstance(exc_info, BaseException):
+        exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+    # 3. 构造记录（module/process 由 LogRecord 根据 pathname 自动填充）
+    record = logger.makeRecord(
+        logger.name, level, code.co_filename, frame.f_lineno, msg, args,
+        exc_info or None, func=code.co_name
+    )
+    logger.handle(record)
+
 
-# 其他日志级别同理（复制logInfo，改级别）
 def logDebug(msg: str, *args, **kwargs):
-    logger = logging.getLogger()
-    stack = inspect.stack()
-    if len(stack) >= 4:
-        frame_info = stack[3]
-        record = LogRecord(
-            name=logger.name,
-            level=logging.DEBUG,
-            pathname=frame_info.filename,
-            lineno=frame_info.lineno,
-            msg=msg,
-            args=args,
-            exc_info=kwargs.get("exc_info"),
-            func=frame_info.function,
-        )
-        record.module = os.path.basename(frame_info.filename).replace(".py", "")
-        record.process = os.getpid()
-        logger.handle(record)
-    else:
-        logger.debug(msg, *args, **kwargs)
+    _log(logging.DEBUG, msg, args, kwargs.get("exc_info"), kwargs.get("stacklevel", 1))
+
+
+def logInfo(msg: str, *args, **kwargs):
+    """全局INFO日志（文件名/行号/函数名定位到调用 logInfo 的位置）"""
+    _log(logging.INFO, msg, args, kwargs.get("exc_info"), kwargs.get("stacklevel", 1))
+
+
+def logWarning(msg: str, *args, **kwargs):
+    _log(logging.WARNING, msg, args, kwargs.get("exc_info"), kwargs.get("stacklevel", 1))
+
 
 def logError(msg: str, *args, **kwargs):
-    logger = logging.getLogger()
-    stack = inspect.stack()
-    if len(stack) >= 4:
-        frame_info = stack[3]
-        record = LogRecord(
-            name=logger.name,
-            level=logging.ERROR,
-            pathname=frame_info.filename,
-            lineno=frame_info.lineno,
-            msg=msg,
-            args=args,
-            exc_info=kwargs.get("exc_info"),
-            func=frame_info.function,
-        )
-        record.module = os.path.basename(frame_info.filename).replace(".py", "")
-        record.process = os.getpid()
-        logger.handle(record)
-    else:
-        logger.error(msg, *args, **kwargs)
+    _log(logging.ERROR, msg, args, kwargs.get("exc_info"), kwargs.get("stacklevel", 1))
+
+
+def logCritical(msg: str, *args, **kwargs):
+    _log(logging.CRITICAL, msg, args, kwargs.get("exc_info"), kwargs.get("stacklevel", 1))
+
 
 def logException(msg: str, *args, **kwargs):
-    logError(msg, *args, exc_info=True, **kwargs)
+    _log(logging.ERROR, msg, args, True, kwargs.get("stacklevel", 1))
 
 # ==================== 补全缺失的get_logger函数 ====================
 def get_logger(name: str = "app") -> Logger:
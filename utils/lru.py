@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    线程安全的LRU缓存（同时按条目数和字节数限制容量）
+    - 每个条目写入时需给出占用字节数，超出预算时从最久未使用的条目开始淘汰；
+    - 单个条目超过总预算时直接拒绝写入（避免把整个缓存挤空）。
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 0):
+        """
+        :param max_bytes: 缓存总字节预算（<=0 表示禁用缓存）
+        :param max_entries: 最大条目数（<=0 表示不限制）
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.current_bytes = 0
+        self._data: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            self._data.move_to_end(key)
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        """写入条目，返回是否成功进入缓存"""
+        if size > self.max_bytes:
+            self.pop(key)
+            return False
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            # 淘汰最久未使用的条目，直到满足字节/条目双重限制
+            while self.current_bytes > self.max_bytes or (
+                    self.max_entries > 0 and len(self._data) > self.max_entries):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+        return True
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return None
+            self.current_bytes -= item[1]
+            return item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
@@ -0,0 +1,123 @@
+# 启动耗时分析（--profile-startup）：记录每个模块的导入耗时与各启动阶段耗时，启动完成后输出到日志
+# 通过环境变量开启，spawn/forkserver 启动的子进程继承环境变量后在 run.py 顶部自动开启
+import os
+import sys
+import time
+from typing import Optional
+
+ENV_FLAG = "BLOG_PROFILE_STARTUP"
+
+# 当前进程的分析器（未开启时为 None）
+_profile: Optional["StartupProfile"] = None
+
+
+class StartupProfile:
+    """
+    - 导入计时：元路径查找器在模块被找到后包装其 loader.exec_module，记录模块代码执行耗时；
+      嵌套导入用栈计算"自身耗时"（扣除其中导入其他模块的时间）；
+    - 阶段计时：mark(名称, 秒) 按调用顺序记录。
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.origin: Optional[float] = None  # 进程创建时刻（time.time()，子进程为主进程调用 start 的时刻）
+        self.imports: dict = {}  # 模块名 → [累计耗时, 自身耗时]
+        self.import_total = 0.0  # 最外层导入的累计耗时之和（嵌套导入不重复计算）
+        self.phases: list = []  # [(阶段, 秒)]
+        self._stack: list = []  # 正在执行的导入：[模块名, 开始时间, 子导入耗时]
+        self.reported = False
+
+    def mark(self, phase: str, seconds: float) -> None:
+        self.phases.append((phase, seconds))
+
+    def timed_exec(self, name: str, exec_module):
+        def _exec_module(module):
+            frame = [name, time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            try:
+                return exec_module(module)
+            finally:
+                self._stack.pop()
+                total = time.perf_counter() - frame[1]
+                self.imports[name] = [total, total - frame[2]]
+                if self._stack:
+                    self._stack[-1][2] += total
+                else:
+                    self.import_total += total
+        return _exec_module
+
+    def reset(self) -> None:
+        """fork 出的子进程：父进程的记录不属于本进程"""
+        self.__init__()
+
+    def report(self, role: str, top: int = 15) -> str:
+        """生成报告文本：阶段耗时 + 导入总耗时 + 自身耗时最长的 top 个模块"""
+        self.reported = True
+        lines = [f"⏱️ 启动耗时分析（{role}，PID {os.getpid()}）"]
+        for phase, seconds in self.phases:
+            lines.append(f"    {phase:<24} {seconds * 1000:9.1f} ms")
+        if self.origin is not None:
+            lines.append(f"    {'合计（自创建进程起）':<24} {(time.time() - self.origin) * 1000:9.1f} ms")
+        lines.append(f"    导入 {len(self.imports)} 个模块，合计 {self.import_total * 1000:.1f} ms；自身耗时最长的模块：")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        for name, (total, own) in slowest:
+            lines.append(f"    {name:<40} 自身 {own * 1000:8.1f} ms   累计 {total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+class FirstRequestProbe:
+    """WSGI包装：第一个请求到达时记录"开始监听至首个请求"并输出报告，之后直接透传"""
+
+    def __init__(self, app, profile: StartupProfile, role: str, log):
+        self.app = app
+        self.profile = profile
+        self.role = role
+        self.log = log
+        self.listening_at = time.perf_counter()
+
+    def __call__(self, environ, start_response):
+        if not self.profile.reported:
+            self.profile.reported = True
+            self.profile.mark("开始监听至首个请求", time.perf_counter() - self.listening_at)
+            self.log(self.profile.report(self.role))
+        return self.app(environ, start_response)
+
+
+class _ImportTimer:
+    """元路径查找器：交给其余查找器定位模块，再给 loader 实例挂上计时的 exec_module"""
+
+    def __init__(self, profile: StartupProfile):
+        self.profile = profile
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # 内置/冻结模块的 loader 是类本身（类方法），不能在实例上替换；它们本来也很快
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+                try:
+                    loader.exec_module = self.profile.timed_exec(name, loader.exec_module)
+                except AttributeError:
+                    pass
+            return spec
+        return None
+
+
+def install() -> StartupProfile:
+    """开启当前进程的启动分析（重复调用返回同一个分析器）"""
+    global _profile
+    if _profile is None:
+        _profile = StartupProfile()
+        sys.meta_path.insert(0, _ImportTimer(_profile))
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_profile.reset)
+    return _profile
+
+
+def current() -> Optional[StartupProfile]:
+    """当前进程的分析器，未开启时为 None"""
+    return _profile